@@ -0,0 +1,74 @@
+import json
+import re
+import time
+from typing import List
+from langchain.schema import AIMessage, BaseMessage
+
+_IP_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+_GROUP_RE = re.compile(r"^\[([^\]]+)\]")
+_WEB_PORT_RE = re.compile(r'"host":"([^"]+)","port":(80|443)\b')
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for ChatOllama
+
+    Planning prompts get one nmap task per IP address in each request,
+    tagged with the request's group id, as JSON lines.
+    Analysis prompts get a gobuster and an ffuf task for every open web
+    port in the new nmap results, and nothing for directory results, so
+    each target goes through exactly one plan -> execute -> analyze cycle.
+
+    Args:
+        latency: Seconds each call sleeps to emulate model inference
+        wordlist: Wordlist path put into suggested fuzzing tasks
+    """
+
+    model = "fake-llm"
+
+    def __init__(self, latency: float = 0.0, wordlist: str = "wordlists/common.txt"):
+        self.latency = latency
+        self.wordlist = wordlist
+        self.calls = 0
+
+    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        system, human = messages[0].content, messages[-1].content
+        if system.startswith("Analyze"):
+            return AIMessage(content=self._analysis(human))
+        return AIMessage(content=self._plan(human))
+
+    def _plan(self, requests: str) -> str:
+        lines = []
+        for request in requests.splitlines():
+            group = _GROUP_RE.match(request)
+            for ip in dict.fromkeys(_IP_RE.findall(request)):
+                lines.append(json.dumps({
+                    "group": group.group(1) if group else None,
+                    "tool": "nmap",
+                    "target": ip,
+                    "parameters": {"ports": "22,80,443"},
+                    "description": f"Service scan of {ip}"
+                }))
+        return "\n".join(lines)
+
+    def _analysis(self, context: str) -> str:
+        new_results = context.split("New results:", 1)[-1]
+        lines = []
+        for host, port in dict.fromkeys(_WEB_PORT_RE.findall(new_results)):
+            scheme = "https" if port == "443" else "http"
+            url = f"{scheme}://{host}/"
+            lines.append(json.dumps({
+                "tool": "gobuster",
+                "target": url,
+                "parameters": {"wordlist": self.wordlist},
+                "description": f"Directory enumeration on {url}"
+            }))
+            lines.append(json.dumps({
+                "tool": "ffuf",
+                "target": f"{url}FUZZ",
+                "parameters": {"wordlist": self.wordlist},
+                "description": f"Content fuzzing on {url}"
+            }))
+        return "\n".join(lines)
@@ -0,0 +1,198 @@
+"""
+Offline end-to-end benchmark of the SecurityAgent plan -> execute -> analyze loop
+
+Stub nmap/gobuster/ffuf executables from benchmarks/stubs are put first on
+PATH and the LLM is replaced by a deterministic FakeChatModel, so the run
+needs neither Ollama nor real scanners. Example:
+
+    python -m benchmarks.run_benchmark --targets 1 4 16 --tool-latency 0.2
+    python -m benchmarks.run_benchmark --output current.json --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STUBS_DIR = Path(__file__).resolve().parent / "stubs"
+sys.path.insert(0, str(REPO_ROOT))
+
+from loguru import logger  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+from src.agents.security_agent import SecurityAgent  # noqa: E402
+from src.core.llm_cache import CachedChatModel  # noqa: E402
+from src.core.rules import Rule, RuleEngine, default_rules  # noqa: E402
+from src.core.scope import ScopeDefinition  # noqa: E402
+from src.tools.ffuf_tool import FfufTool  # noqa: E402
+from src.tools.gobuster_tool import GobusterTool  # noqa: E402
+from src.tools.wordlist import WordlistCache  # noqa: E402
+
+STAGES = {
+    "plan": "_plan_tasks",
+    "execute": "_execute_task",
+    "analyze": "_analyze_tasks",
+    "report": "_generate_report"
+}
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _timed(func: Callable, samples: List[float]) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+def _peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is KiB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }
+
+def run_once(target_count: int, args: argparse.Namespace, work_dir: Path) -> Dict[str, Any]:
+    targets = [f"10.20.{i // 250}.{i % 250 + 1}" for i in range(target_count)]
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.20.0.0/16"], wildcards=[])
+    wordlist = str(REPO_ROOT / "wordlists" / "common.txt")
+    agent = SecurityAgent(
+        scope,
+        max_workers=args.workers,
+        use_llm_cache=False,
+        use_result_cache=False,
+        # The stub lab's ssh ports are known to need nothing, so they are settled explicitly
+        rules=RuleEngine(default_rules(wordlist=wordlist, settle_uninteresting=True)
+                         + [Rule(name="lab-ssh", ports=[22], settles=True)]),
+        use_rules=not args.no_rules
+    )
+    fake_llm = FakeChatModel(latency=args.llm_latency, wordlist=wordlist)
+    agent.llm = CachedChatModel(fake_llm, cache=None)
+    wordlists = WordlistCache(str(work_dir / "wordlists"))
+    agent.tools["gobuster"] = GobusterTool(wordlists=wordlists)
+    agent.tools["ffuf"] = FfufTool(wordlists=wordlists)
+
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for stage, method in STAGES.items():
+        setattr(agent, method, _timed(getattr(agent, method), samples[stage]))
+
+    start = time.perf_counter()
+    report = agent.run(f"Assess targets: {', '.join(targets)}")
+    elapsed = time.perf_counter() - start
+
+    summary = report["summary"]
+    return {
+        "targets": target_count,
+        "elapsed_s": round(elapsed, 4),
+        "tasks": summary["total_tasks"],
+        "completed_tasks": summary["completed_tasks"],
+        "failed_tasks": summary["failed_tasks"],
+        "findings": summary["total_findings"],
+        "tasks_per_s": round(summary["completed_tasks"] / elapsed, 3) if elapsed else 0.0,
+        "llm_calls": fake_llm.calls,
+        "llm_calls_avoided": agent.metrics.counter("llm_calls_avoided"),
+        "stages": {
+            stage: {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2)
+            }
+            for stage, values in samples.items()
+        },
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Return a message for every target count whose throughput regressed beyond tolerance"""
+    previous = {run["targets"]: run for run in baseline}
+    regressions = []
+    for run in current:
+        base = previous.get(run["targets"])
+        if not base or not base["tasks_per_s"]:
+            continue
+        change = run["tasks_per_s"] / base["tasks_per_s"] - 1
+        if change < -tolerance:
+            regressions.append(
+                f"{run['targets']} targets: {run['tasks_per_s']} tasks/s vs "
+                f"{base['tasks_per_s']} baseline ({change:+.0%})"
+            )
+    return regressions
+
+def _print_table(runs: List[Dict[str, Any]]):
+    print(f"{'targets':>8} {'tasks':>6} {'elapsed s':>10} {'tasks/s':>8} "
+          f"{'exec p50':>9} {'exec p95':>9} {'plan ms':>8} {'analyze p95':>12} {'rss MB':>7}")
+    for run in runs:
+        stages = run["stages"]
+        print(f"{run['targets']:>8} {run['tasks']:>6} {run['elapsed_s']:>10.3f} {run['tasks_per_s']:>8.2f} "
+              f"{stages['execute']['p50_ms']:>9.1f} {stages['execute']['p95_ms']:>9.1f} "
+              f"{stages['plan']['p50_ms']:>8.1f} {stages['analyze']['p95_ms']:>12.1f} "
+              f"{run['peak_rss_mb']['self']:>7.1f}")
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, nargs="+", default=[1, 4, 16],
+                        help="Target counts to benchmark (scaling series)")
+    parser.add_argument("--workers", type=int, default=4, help="SecurityAgent max_workers")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds each stub tool takes")
+    parser.add_argument("--tool-hits", type=int, default=25, help="Discoveries each fuzzing stub prints")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds each fake LLM call takes")
+    parser.add_argument("--no-rules", action="store_true", help="Send every result to the (fake) LLM")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare tasks/s with a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative throughput drop before failing (default 0.2)")
+    parser.add_argument("--verbose", action="store_true", help="Keep agent logging enabled")
+    return parser.parse_args(argv)
+
+@contextmanager
+def _stub_environment(args: argparse.Namespace) -> Iterator[None]:
+    """Stub tools first on PATH and agent logging silenced, both undone on exit"""
+    saved = {name: os.environ.get(name) for name in ("PATH", "FAKE_TOOL_LATENCY", "FAKE_TOOL_HITS")}
+    os.environ["PATH"] = f"{STUBS_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ["FAKE_TOOL_LATENCY"] = str(args.tool_latency)
+    os.environ["FAKE_TOOL_HITS"] = str(args.tool_hits)
+    if not args.verbose:
+        logger.disable("src")
+    try:
+        yield
+    finally:
+        logger.enable("src")
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    with _stub_environment(args), tempfile.TemporaryDirectory(prefix="agent-bench-") as tmp:
+        runs = [run_once(count, args, Path(tmp)) for count in args.targets]
+
+    _print_table(runs)
+    if args.output:
+        Path(args.output).write_text(json.dumps(runs, indent=2))
+
+    if args.baseline:
+        regressions = compare(runs, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ setup(
     install_requires=[
         "langchain",
         "loguru",
-        "ollama"
+        "ollama",
+        "httpx"
     ]
 )
\ No newline at end of file
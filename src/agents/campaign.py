@@ -0,0 +1,247 @@
+"""
+Campaign mode: per-target assessments spread across worker processes
+
+    python -m src.agents.campaign targets.txt --campaign lab-sweep --workers 8
+    python -m src.agents.campaign --campaign lab-sweep --rerun-failed
+"""
+import argparse
+import ipaddress
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from loguru import logger
+from src.agents.security_agent import SecurityAgent, default_tools
+from src.core.fingerprint import default_result_cache
+from src.core.llm_cache import default_llm_cache
+from src.core.ollama_client import AsyncOllamaChat
+from src.core.rate_limit import HostRateLimiter
+from src.core.scope import ScopeDefinition
+from src.core.work_queue import DEFAULT_QUEUE_PATH, WorkQueue
+
+DEFAULT_OUTPUT_DIR = "campaigns"
+DEFAULT_INSTRUCTION = "Assess {target}: scan for open ports and enumerate any web content"
+
+def read_targets(path: str) -> List[str]:
+    """Targets from a file, one per line; blank lines, # comments and repeats are skipped"""
+    targets = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            target = line.split("#", 1)[0].strip()
+            if target:
+                targets.append(target)
+    return list(dict.fromkeys(targets))
+
+def target_scope(target: str) -> ScopeDefinition:
+    """Scope limited to one target: its IP or network, or its domain and subdomains"""
+    host = (urlsplit(target).hostname if "://" in target else target) or target
+    try:
+        ipaddress.ip_network(host, strict=False)
+        return ScopeDefinition(domains=[], ip_ranges=[host], wildcards=[])
+    except ValueError:
+        return ScopeDefinition(domains=[host], ip_ranges=[], wildcards=[])
+
+@lru_cache(maxsize=None)
+def _shared_resources() -> Dict[str, Any]:
+    # One LLM pool, tool registry and cache set per worker process, reused for every target
+    return {
+        "llm": AsyncOllamaChat(model="mistral"),
+        "tools": default_tools(),
+        "llm_cache": default_llm_cache(),
+        "result_cache": default_result_cache(),
+        "rate_limiter": HostRateLimiter()
+    }
+
+def default_agent_factory(scope: ScopeDefinition, scan_id: str) -> SecurityAgent:
+    return SecurityAgent(scope, scan_id=scan_id, **_shared_resources())
+
+def _worker(index: int, config: Dict[str, Any], stop: Any):
+    """Worker process: claim targets until the queue is empty or a drain is requested"""
+    # Ctrl-C reaches the whole process group; only the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    campaign_id = config["campaign_id"]
+    worker = f"worker-{index}"
+    work = WorkQueue(config["queue_path"])
+    output = Path(config["output_dir"]) / campaign_id / f"{worker}.ndjson"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    factory: Callable[[ScopeDefinition, str], Any] = config["agent_factory"]
+
+    with open(output, "a", encoding="utf-8") as out:
+        while not stop.is_set():
+            target = work.claim(campaign_id, worker)
+            if target is None:
+                break
+            scan_id = f"{campaign_id}-{uuid.uuid4().hex[:12]}"
+            started = time.time()
+            record: Dict[str, Any] = {"campaign_id": campaign_id, "target": target,
+                                      "scan_id": scan_id, "worker": worker}
+            try:
+                agent = factory(target_scope(target), scan_id)
+                report = agent.run(config["instruction"].format(target=target))
+                work.complete(campaign_id, target, scan_id)
+                record.update(status="completed", summary=report.get("summary"),
+                              findings=report.get("findings", []))
+            except Exception as e:
+                logger.error(f"{worker} failed on {target}: {str(e)}")
+                work.fail(campaign_id, target, str(e), scan_id)
+                record.update(status="failed", error=str(e))
+            record["elapsed"] = round(time.time() - started, 3)
+            # One line per target, flushed so results stream while the campaign runs
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+    work.close()
+
+class CampaignRunner:
+    """
+    Runs one assessment per target across a pool of worker processes
+
+    Targets live in a WorkQueue, so a campaign survives restarts: rerunning
+    it continues with whatever is still pending. Each worker appends one
+    NDJSON record per finished target to <output_dir>/<campaign>/worker-<n>.ndjson.
+    stop() (or SIGINT/SIGTERM during run()) drains: workers finish their
+    current target and claim no new ones.
+
+    Args:
+        queue_path: SQLite file of the work queue
+        workers: Worker processes (defaults to one per CPU core)
+        output_dir: Directory receiving the per-worker result streams
+        agent_factory: Picklable callable building the agent for (scope, scan_id)
+        instruction: Instruction template for each target, formatted with {target}
+        start_method: multiprocessing start method; spawn avoids forking live threads
+    """
+
+    def __init__(self,
+                 queue_path: str = DEFAULT_QUEUE_PATH,
+                 workers: Optional[int] = None,
+                 output_dir: str = DEFAULT_OUTPUT_DIR,
+                 agent_factory: Callable[[ScopeDefinition, str], Any] = default_agent_factory,
+                 instruction: str = DEFAULT_INSTRUCTION,
+                 start_method: str = "spawn",
+                 progress_interval: float = 10.0):
+        self.queue_path = queue_path
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir
+        self.agent_factory = agent_factory
+        self.instruction = instruction
+        self.progress_interval = progress_interval
+        self._context = multiprocessing.get_context(start_method)
+        self._stop = self._context.Event()
+        self.queue = WorkQueue(queue_path)
+
+    def add_targets(self, campaign_id: str, targets: Iterable[str]) -> int:
+        added = self.queue.add(campaign_id, targets)
+        logger.info(f"Added {added} targets to campaign {campaign_id}")
+        return added
+
+    def stop(self):
+        """Let workers finish their current target, then exit"""
+        if not self._stop.is_set():
+            logger.info("Draining campaign workers")
+            self._stop.set()
+
+    def run(self, campaign_id: str, rerun_failed: bool = False) -> Dict[str, Any]:
+        """Process the campaign's pending targets and return the final counts"""
+        # Nothing is running yet, so targets left running belong to an earlier, killed run
+        self.queue.requeue(campaign_id, ["running", "failed"] if rerun_failed else ["running"])
+        pending = self.queue.counts(campaign_id)["pending"]
+        workers = min(self.workers, pending)
+        self._stop.clear()
+
+        config = {
+            "campaign_id": campaign_id,
+            "queue_path": self.queue_path,
+            "output_dir": self.output_dir,
+            "agent_factory": self.agent_factory,
+            "instruction": self.instruction
+        }
+        processes = [
+            self._context.Process(target=_worker, args=(i, config, self._stop), name=f"campaign-worker-{i}")
+            for i in range(workers)
+        ]
+        logger.info(f"Campaign {campaign_id}: {pending} pending targets on {workers} workers")
+        started = time.time()
+        restore = self._handle_signals()
+        try:
+            for process in processes:
+                process.start()
+            while any(process.is_alive() for process in processes):
+                for process in processes:
+                    process.join(timeout=self.progress_interval / max(len(processes), 1))
+                counts = self.queue.counts(campaign_id)
+                logger.info(f"Campaign {campaign_id}: {counts['completed']} completed, "
+                            f"{counts['failed']} failed, {counts['running']} running, "
+                            f"{counts['pending']} pending")
+        finally:
+            restore()
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        for process in processes:
+            if process.exitcode:
+                logger.error(f"{process.name} exited with code {process.exitcode}")
+        abandoned = self.queue.abandon(campaign_id, "worker exited before finishing the target")
+        if abandoned:
+            logger.warning(f"Campaign {campaign_id}: {abandoned} targets were abandoned by dead workers")
+
+        counts = self.queue.counts(campaign_id)
+        return {
+            "campaign_id": campaign_id,
+            "workers": workers,
+            "elapsed": round(time.time() - started, 3),
+            "counts": counts,
+            "drained": self._stop.is_set() and counts["pending"] > 0,
+            "outputs": sorted(str(p) for p in (Path(self.output_dir) / campaign_id).glob("worker-*.ndjson"))
+        }
+
+    def _handle_signals(self) -> Callable[[], None]:
+        """First SIGINT/SIGTERM drains; a second one stops waiting and terminates the workers"""
+        if threading.current_thread() is not threading.main_thread():
+            return lambda: None
+
+        def handler(signum, frame):
+            if self._stop.is_set():
+                raise KeyboardInterrupt
+            self.stop()
+
+        previous = {sig: signal.signal(sig, handler) for sig in (signal.SIGINT, signal.SIGTERM)}
+        return lambda: [signal.signal(sig, old) for sig, old in previous.items()]
+
+    def close(self):
+        self.queue.close()
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="?", help="File with one target (host, IP, CIDR or URL) per line")
+    parser.add_argument("--campaign", required=True, help="Campaign id; rerunning it resumes pending targets")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite work queue file")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Per-worker NDJSON output directory")
+    parser.add_argument("--instruction", default=DEFAULT_INSTRUCTION, help="Instruction template with {target}")
+    parser.add_argument("--rerun-failed", action="store_true", help="Queue failed targets again")
+    return parser.parse_args(argv)
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    runner = CampaignRunner(args.queue, workers=args.workers, output_dir=args.output_dir,
+                            instruction=args.instruction)
+    try:
+        if args.targets:
+            runner.add_targets(args.campaign, read_targets(args.targets))
+        result = runner.run(args.campaign, rerun_failed=args.rerun_failed)
+    finally:
+        runner.close()
+    print(json.dumps(result, indent=2))
+    return 1 if result["counts"]["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
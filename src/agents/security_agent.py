@@ -1,95 +1,366 @@
-from typing import Dict, Any, List, Optional
-from langchain.chat_models import ChatOllama
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Dict, Any, Iterable, List, Optional
+import json
+import uuid
+from pathlib import Path
+from langchain.chat_models.base import BaseChatModel
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import SystemMessage, HumanMessage
 from loguru import logger
 from src.core.scope import ScopeDefinition
 from src.core.task_manager import TaskManager, TaskStatus, Task
+from src.core.executor import TaskExecutor
+from src.core.llm_cache import CachedChatModel, default_llm_cache, invoke_all
+from src.core.ollama_client import AsyncOllamaChat
+from src.core.analysis_context import AnalysisContext
+from src.core.fingerprint import ResultCache, default_result_cache
+from src.core.store import ScanStore
+from src.core.planner import BatchPlanner, PLAN_FORMAT, filter_in_scope, parse_plan
+from src.core.report import ReportBuilder, describe, iter_findings, open_writers
+from src.core.rules import RuleEngine
+from src.core.rescan import (DEFAULT_MAX_AGE, Baseline, Changes, PortKey, detect_changes, diff_findings,
+                             observed_at, port_spec)
+from src.core.rate_limit import (THROTTLE_STATUSES, TOOL_THREADS, HostRateLimiter, host_of, tool_arguments,
+                                 unrequested_statuses, without_statuses)
+from src.utils.cache import DiskCache
+from src.utils.metrics import Metrics
+from src.agents.workflow import build_workflow, initial_state, run_config
 from src.tools.nmap_tool import NmapTool
 from src.tools.gobuster_tool import GobusterTool
 from src.tools.ffuf_tool import FfufTool
+from src.tools.streaming import ToolInterrupted
+
+def default_tools() -> Dict[str, Any]:
+    """A fresh registry of the supported tools; the tools are safe to share between agents"""
+    return {
+        "nmap": NmapTool(),
+        "gobuster": GobusterTool(),
+        "ffuf": FfufTool()
+    }
 
 class SecurityAgent:
-    def __init__(self, scope: ScopeDefinition):
+    def __init__(self,
+                 scope: ScopeDefinition,
+                 max_workers: int = 4,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 llm_cache: Optional[DiskCache] = None,
+                 use_llm_cache: bool = True,
+                 analysis_token_budget: int = 3000,
+                 result_cache: Optional[ResultCache] = None,
+                 use_result_cache: bool = True,
+                 store: Optional[ScanStore] = None,
+                 scan_id: Optional[str] = None,
+                 metrics_dir: Optional[str] = None,
+                 llm: Optional[BaseChatModel] = None,
+                 tools: Optional[Dict[str, Any]] = None,
+                 report_dir: Optional[str] = None,
+                 max_report_findings: int = 1000,
+                 plan_batch_size: int = 20,
+                 analysis_chunk_size: int = 1,
+                 rules: Optional[RuleEngine] = None,
+                 use_rules: bool = True,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 use_rate_limit: bool = True,
+                 task_timeout: Optional[float] = None,
+                 tool_timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            scope: Targets the agent is allowed to touch
+            max_workers: Maximum number of tasks running at once (1 runs them sequentially)
+            tool_limits: Per-tool cap on concurrent tasks, e.g. {"nmap": 2}
+            llm_cache: Cache for LLM responses (defaults to the shared on-disk cache)
+            use_llm_cache: Set to False to bypass the LLM response cache
+            analysis_token_budget: Approximate token limit for each analysis prompt
+            result_cache: Cache of tool results by task fingerprint (defaults to a 24h on-disk cache)
+            use_result_cache: Set to False to always run tools even for identical invocations
+            store: Durable scan store; enables resume() after a crash or restart
+            scan_id: Identifier for this scan (generated when omitted)
+            metrics_dir: Directory receiving <scan_id>.prom and <scan_id>.json metrics at scan end
+            llm: Chat model to use (defaults to a new AsyncOllamaChat client); pass a
+                shared one to reuse its connection pool across agents
+            tools: Tool registry by name (defaults to new nmap/gobuster/ffuf tools)
+            report_dir: Directory receiving <scan_id>.ndjson, .sarif and .csv reports
+            max_report_findings: Findings included inline in the returned report; the
+                report files always contain all of them
+            plan_batch_size: Requests planned per LLM call by plan_batch()
+            analysis_chunk_size: Split new results into analyses of this many results
+                each, sent to the LLM concurrently (by default one analysis per result;
+                0 analyses them all in one prompt)
+            rules: Rules that plan obvious follow-ups without the LLM (defaults to the built-in rules)
+            use_rules: Set to False to send every result to the LLM
+            rate_limiter: Per-host request budget for gobuster/ffuf; share one between
+                agents scanning the same hosts (a new one is created when omitted)
+            use_rate_limit: Set to False to run the fuzzers with their own thread defaults
+            task_timeout: Wall-clock budget in seconds for each task, shared by its retries
+                (None, the default, for no limit); a run that exceeds it is stopped, and
+                retries resume from its partial result within what is left of the budget
+            tool_timeouts: Per-tool budgets overriding task_timeout, e.g. {"nmap": 3600};
+                the shards of a large CIDR scan share one budget
+        """
         self.scope = scope
-        self.task_manager = TaskManager()
-        self.llm = ChatOllama(model="mistral")
-        self.tools = {
-            "nmap": NmapTool(),
-            "gobuster": GobusterTool(),
-            "ffuf": FfufTool()
-        }
-
-    def _plan_tasks(self, instruction: str) -> List[Dict]:
+        self.scan_id = scan_id or str(uuid.uuid4())
+        self.store = store
+        self.metrics = Metrics(scan_id=self.scan_id)
+        self.metrics_dir = metrics_dir
+        self.report_dir = report_dir
+        self.max_report_findings = max_report_findings
+        self.plan_batch_size = plan_batch_size
+        self.analysis_chunk_size = analysis_chunk_size
+        self.task_manager = TaskManager(store=store, scan_id=self.scan_id)
+        self.executor = TaskExecutor(max_workers=max_workers, tool_limits=tool_limits)
+        self.analysis_context = AnalysisContext(token_budget=analysis_token_budget)
+        self.result_cache = (result_cache or default_result_cache()) if use_result_cache else None
+        self.rules = (rules or RuleEngine()) if use_rules else None
+        self.rate_limiter = (rate_limiter or HostRateLimiter()) if use_rate_limit else None
+        self.task_timeout = task_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self._deadlines: Dict[str, float] = {}
+        self.llm = CachedChatModel(
+            llm or AsyncOllamaChat(model="mistral"),
+            cache=(llm_cache or default_llm_cache()) if use_llm_cache else None,
+            metrics=self.metrics
+        )
+        self.tools = tools if tools is not None else default_tools()
+        self.workflow = build_workflow(self)
+
+    def _plan_tasks(self, instruction: str) -> List[Task]:
         """Plan security tasks based on instruction"""
+        return self.plan_batch({"main": instruction})["main"]
+
+    def plan_batch(self, requests: Dict[str, str]) -> Dict[str, List[Task]]:
+        """
+        Plan many instructions or target groups with one LLM call per `plan_batch_size` requests
+
+        Args:
+            requests: Request id -> instruction; the returned dict maps each id
+                to the tasks added for it
+        """
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                SystemMessage(content=(
-                    "You are a cybersecurity expert. Break down the security task into "
-                    "specific steps using available tools: nmap, gobuster, ffuf"
-                )),
-                HumanMessage(content=instruction)
-            ])
-            
-            response = self.llm.invoke(prompt)
-            tasks = self._parse_tasks(response.content)
-            
-            planned_tasks = []
-            for task in tasks:
-                if self.scope.is_in_scope(task["parameters"]["target"]):
-                    planned_task = self.task_manager.add_task(**task)
-                    planned_tasks.append(planned_task)
-                else:
-                    logger.warning(f"Task for target {task['parameters']['target']} is out of scope")
-            
-            return planned_tasks
+            with self.metrics.span("plan"):
+                planner = BatchPlanner(self.llm, self.scope, batch_size=self.plan_batch_size, tools=self.tools)
+                planned = planner.plan(requests)
+                self._reject(planner.rejected)
+                return {group: self._add_tasks(tasks) for group, tasks in planned.items()}
         except Exception as e:
             logger.error(f"Error in planning tasks: {str(e)}")
             raise
 
+    def _add_tasks(self, tasks: List[Dict]) -> List[Task]:
+        """Add parsed, in-scope tasks, skipping unknown tools and duplicates"""
+        added = []
+        for task in tasks:
+            task.pop("group", None)
+            if task["tool"] not in self.tools:
+                logger.warning(f"Skipping task for unknown tool: {task['tool']}")
+                continue
+            planned_task = self.task_manager.add_task(**task)
+            if planned_task:
+                added.append(planned_task)
+            else:
+                logger.info(f"Skipping duplicate task: {task.get('description')}")
+        return added
+
+    def _reject(self, tasks: List[Dict]):
+        for task in tasks:
+            logger.warning(f"Task for target {task['parameters']['target']} is out of scope")
+        if tasks:
+            self.metrics.inc("scope_violations", len(tasks))
+
     def _execute_task(self, task: Task) -> Optional[Dict]:
         """Execute a single task"""
-        try:
-            if task.tool not in self.tools:
-                raise ValueError(f"Unknown tool: {task.tool}")
+        labels = {"tool": task.tool, "target": task.parameters.get("target")}
+        with self.metrics.span("execute", **labels):
+            try:
+                if task.tool not in self.tools:
+                    raise ValueError(f"Unknown tool: {task.tool}")
 
-            tool = self.tools[task.tool]
-            result = tool.run(**task.parameters)
-            
-            self.task_manager.update_task_status(
-                task.id, 
-                TaskStatus.COMPLETED, 
-                result=result
-            )
+                if self.result_cache is not None:
+                    cached = self.result_cache.get(task.fingerprint)
+                    if cached is not None:
+                        logger.info(f"Reusing cached result for task: {task.description}")
+                        self.metrics.inc("cache_hits", cache="result", tool=task.tool)
+                        self.task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result=cached)
+                        return cached
 
-            return result
-        except Exception as e:
-            logger.error(f"Task execution failed: {str(e)}")
-            if task.retries < task.max_retries:
-                task.retries += 1
-                self.task_manager.update_task_status(task.id, TaskStatus.PENDING)
-            else:
-                self.task_manager.update_task_status(task.id, TaskStatus.FAILED)
+                self.task_manager.update_task_status(task.id, TaskStatus.RUNNING)
+                tool = self.tools[task.tool]
+                with self.metrics.span("tool_run", **labels):
+                    result = self._run_tool(task, tool)
+                if self.result_cache is not None:
+                    self.result_cache.set(task.fingerprint, result)
+                
+                self.task_manager.update_task_status(
+                    task.id, 
+                    TaskStatus.COMPLETED, 
+                    result=result
+                )
+                self._deadlines.pop(task.id, None)
+
+                return result
+            except ToolInterrupted as e:
+                logger.error(f"Task interrupted: {str(e)}")
+                self.metrics.inc("interrupted_tasks", tool=task.tool)
+                if task.retries < task.max_retries and self._time_left(task) != 0:
+                    task.retries += 1
+                    self.metrics.inc("retries", tool=task.tool)
+                    # Kept with the task, so the retry resumes from it instead of starting over
+                    self.task_manager.update_task_status(task.id, TaskStatus.PENDING, result=e.partial)
+                    return None
+                # Out of retries or time: report what was found rather than discarding it
+                self._deadlines.pop(task.id, None)
+                self.metrics.inc("partial_results", tool=task.tool)
+                self.task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result=e.partial)
+                return e.partial
+            except Exception as e:
+                logger.error(f"Task execution failed: {str(e)}")
+                if task.retries < task.max_retries:
+                    task.retries += 1
+                    self.metrics.inc("retries", tool=task.tool)
+                    self.task_manager.update_task_status(task.id, TaskStatus.PENDING)
+                else:
+                    self._deadlines.pop(task.id, None)
+                    self.metrics.inc("failed_tasks", tool=task.tool)
+                    self.task_manager.update_task_status(task.id, TaskStatus.FAILED)
+                return None
+
+    def _time_left(self, task: Task) -> Optional[float]:
+        """
+        Seconds left of a task's budget, started by its first attempt
+
+        Retries share the budget rather than each getting a fresh one;
+        returns None when the tool has no budget and 0 once it is spent.
+        """
+        timeout = self._tool_timeout(task.tool)
+        if timeout is None:
             return None
+        deadline = self._deadlines.setdefault(task.id, time.monotonic() + timeout)
+        return max(deadline - time.monotonic(), 0)
+
+    def _tool_timeout(self, tool: str) -> Optional[float]:
+        return self.tool_timeouts.get(tool, self.task_timeout)
+
+    def _run_tool(self, task: Task, tool: Any) -> Dict:
+        """
+        Run a task's tool within its time budget
+
+        A retry after an interrupted run passes the partial result as
+        `resume`; the web fuzzers are paced with the per-host rate limiter,
+        and waiting for a share of the host's budget uses up the task's.
+        """
+        arguments = dict(task.parameters)
+        time_left = self._time_left(task)
+        if time_left is not None:
+            arguments["timeout"] = time_left
+        if task.result and task.result.get("partial"):
+            arguments["resume"] = task.result
+        if self.rate_limiter is None or task.tool not in TOOL_THREADS:
+            return tool.run(**arguments)
+
+        host = host_of(task.parameters["target"])
+        with ExitStack() as stack:
+            try:
+                lease = stack.enter_context(self.rate_limiter.lease(host, TOOL_THREADS[task.tool], timeout=time_left))
+            except TimeoutError as e:
+                raise ToolInterrupted(str(e), task.result or {"partial": True}, timed_out=True) from e
+            if time_left is not None:
+                arguments["timeout"] = self._time_left(task)
+            try:
+                result = tool.run(**tool_arguments(task.tool, arguments, lease))
+            except ToolInterrupted as e:
+                # Running out of our own time budget says nothing about the host
+                e.partial = self._observe_host(task, host, e.partial, arguments.get("resume"),
+                                               failed=not e.timed_out)
+                raise
+            except Exception:
+                self.rate_limiter.observe(host, failed=True)
+                raise
+        return self._observe_host(task, host, result, arguments.get("resume"))
+
+    def _observe_host(self,
+                      task: Task,
+                      host: str,
+                      result: Dict,
+                      resume: Optional[Dict] = None,
+                      failed: bool = False) -> Dict:
+        """
+        Report a fuzzer run's throttled responses to the rate limiter
+
+        The share of 429/503 responses is taken over the requests the run
+        sent (as the tool reports them, else the results). Returns the
+        result without the 429/503 records only matched to measure this.
+        """
+        statuses = [finding.status for finding in iter_findings(task.tool, task.parameters["target"], result)]
+        throttled = sum(status in THROTTLE_STATUSES for status in statuses)
+        if throttled:
+            self.metrics.inc("throttled_responses", throttled, host=host)
+        # A resumed run's request count includes what the interrupted attempt already reported
+        requests = result.get("requests", 0) - (resume or {}).get("requests", 0)
+        self.rate_limiter.observe(host, max(requests, len(statuses)), throttled, failed=failed)
+        return without_statuses(task.tool, result, unrequested_statuses(task.tool, task.parameters))
+
+    def _analyze_tasks(self, tasks: List[Task]) -> List[Task]:
+        """
+        Plan follow-ups for completed tasks, by rule where one matches
+
+        Only results with findings no rule matched go to the LLM; the rest
+        are folded into the analysis summary so later prompts still see them.
+        """
+        done = [task for task in tasks if task.result]
+        if self.rules is None:
+            return self._analyze_results([task.result for task in done])
 
-    def _analyze_results(self, results: List[Dict]) -> List[Dict]:
-        """Analyze results and determine next steps"""
+        follow_ups, handled, unmatched = [], [], []
+        with self.metrics.span("rules"):
+            for task in done:
+                outcome = self.rules.evaluate(task.tool, task.parameters.get("target"), task.result)
+                follow_ups.extend(outcome.tasks)
+                for rule, count in outcome.matches.items():
+                    self.metrics.inc("rule_matches", count, rule=rule)
+                (handled if outcome.handled else unmatched).append(task.result)
+            allowed, rejected = filter_in_scope(self.scope, follow_ups)
+            self._reject(rejected)
+            added = self._add_tasks(allowed)
+            self.analysis_context.remember(handled)
+
+        avoided = self._llm_calls(len(done)) - self._llm_calls(len(unmatched))
+        if avoided:
+            self.metrics.inc("llm_calls_avoided", avoided)
+        logger.info(
+            f"Rules settled {len(handled)} of {len(done)} results with {len(added)} follow-up tasks; "
+            f"{len(unmatched)} go to the LLM"
+        )
+        return added + self._analyze_results(unmatched)
+
+    def _llm_calls(self, results: int) -> int:
+        """LLM calls _analyze_results() makes for this many results"""
+        size = self.analysis_chunk_size or results
+        return -(-results // size) if results else 0
+
+    def _analyze_results(self, results: List[Dict]) -> List[Task]:
+        """Analyze results that are new since the last pass and determine next steps"""
+        if not results:
+            return []
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                SystemMessage(content="Analyze the security scan results and suggest next steps."),
-                HumanMessage(content=str(results))
-            ])
-            
-            response = self.llm.invoke(prompt)
-            new_tasks = self._parse_tasks(response.content)
-            
-            planned_tasks = []
-            for task in new_tasks:
-                if self.scope.is_in_scope(task["parameters"]["target"]):
-                    planned_task = self.task_manager.add_task(**task)
-                    planned_tasks.append(planned_task)
-            
-            return planned_tasks
+            with self.metrics.span("analyze"):
+                size = self.analysis_chunk_size or len(results)
+                chunks = [results[i:i + size] for i in range(0, len(results), size)]
+                prompts = [
+                    ChatPromptTemplate.from_messages([
+                        SystemMessage(content="Analyze the security scan results and suggest next steps.\n" + PLAN_FORMAT),
+                        HumanMessage(content=context)
+                    ])
+                    for context in self.analysis_context.build_many(chunks)
+                ]
+
+                # Chunks are independent analyses; the model answers them concurrently
+                tasks = []
+                for response in invoke_all(self.llm, prompts):
+                    tasks.extend(self._parse_tasks(response.content))
+                allowed, rejected = filter_in_scope(self.scope, tasks)
+                self._reject(rejected)
+                return self._add_tasks(allowed)
         except Exception as e:
             logger.error(f"Error in analyzing results: {str(e)}")
             return []
@@ -97,94 +368,267 @@ class SecurityAgent:
     def run(self, instruction: str) -> Dict[str, Any]:
         """Run the security assessment workflow"""
         try:
-            logger.info(f"Starting security assessment: {instruction}")
-            
-            # Initial task planning
-            tasks = self._plan_tasks(instruction)
-            results = []
-            
-            # Execute tasks and analyze results in a loop
-            while tasks:
-                for task in tasks:
-                    logger.info(f"Executing task: {task.description}")
-                    result = self._execute_task(task)
-                    if result:
-                        results.append(result)
-                
-                # Analyze results and get new tasks
-                tasks = self._analyze_results(results)
-            
-            # Generate final report
-            return self._generate_report()
+            logger.info(f"Starting security assessment {self.scan_id}: {instruction}")
+            if self.store is not None:
+                self.store.create_scan(self.scan_id, instruction, self.scope.model_dump())
             
+            return self._run_workflow(initial_state(self.scan_id, instruction))
+
         except Exception as e:
             logger.error(f"Error running security assessment: {str(e)}")
+            self._finish_scan("failed")
+            raise
+
+    def resume(self, scan_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resume a persisted scan without re-running its completed tasks
+
+        With a workflow checkpoint the graph continues from the last node that
+        finished; otherwise pending and interrupted (running) tasks are
+        executed again and the usual analyze loop continues from their results.
+        """
+        if self.store is None:
+            raise ValueError("Resuming requires a ScanStore")
+        scan_id = scan_id or self.scan_id
+        scan = self.store.load_scan(scan_id)
+        if scan is None:
+            raise ValueError(f"Unknown scan: {scan_id}")
+
+        try:
+            self.scan_id = scan_id
+            self.metrics.scan_id = scan_id
+            self.task_manager = TaskManager(store=self.store, scan_id=scan_id)
+            tasks = self.task_manager.restore(self.store.load_tasks(scan_id))
+            completed = self.task_manager.get_tasks(TaskStatus.COMPLETED)
+            self.analysis_context.remember([t.result for t in completed if t.result])
+            self.store.set_scan_status(scan_id, "running")
+
+            if self.store.load_checkpoint(scan_id) is not None:
+                logger.info(f"Resuming security assessment {scan_id} from its last checkpoint")
+                state = None
+            else:
+                logger.info(f"Resuming security assessment {scan_id} with {len(tasks)} outstanding tasks")
+                state = initial_state(scan_id, scan["instruction"], resumed=True, analyzed=len(completed))
+            return self._run_workflow(state)
+        except Exception as e:
+            logger.error(f"Error resuming security assessment: {str(e)}")
+            self._finish_scan("failed")
             raise
 
+    def rescan(self, previous_scan_id: str, max_age: float = DEFAULT_MAX_AGE) -> Dict[str, Any]:
+        """
+        Assess again only what changed since a previous scan and report the differences
+
+        A light nmap sweep (--version-light) repeats the previous port scans
+        and compares port sets and banners. Full -sV scans run only for new,
+        changed, unverified or expired ports, and their follow-ups go through
+        the usual analyze loop; gobuster/ffuf results of untouched ports are
+        carried forward until they expire. The report gains a "diff" section
+        of new, closed and changed findings.
+
+        Args:
+            previous_scan_id: Scan in the store to compare against
+            max_age: Seconds after which a carried result is scanned again
+        """
+        if self.store is None:
+            raise ValueError("Rescanning requires a ScanStore")
+        previous = self.store.load_scan(previous_scan_id)
+        if previous is None:
+            raise ValueError(f"Unknown scan: {previous_scan_id}")
+        instruction = f"Rescan of {previous_scan_id}: {previous['instruction']}"
+
+        # Staleness is decided by max_age; the result cache could hand back older results
+        result_cache, self.result_cache = self.result_cache, None
+        try:
+            logger.info(f"Starting security rescan {self.scan_id} against {previous_scan_id}")
+            self.store.create_scan(self.scan_id, instruction, self.scope.model_dump())
+            baseline = Baseline(self.store.load_tasks(previous_scan_id), max_age)
+
+            with self.metrics.span("change_detection"):
+                changes = self._detect_changes(baseline)
+            self._plan_rescan(previous_scan_id, baseline, changes)
+            # Sweeps and carried results are not analyzed again
+            report = self._run_workflow(initial_state(self.scan_id, instruction, resumed=True,
+                                                      analyzed=self.task_manager.count(TaskStatus.COMPLETED)))
+        except Exception as e:
+            logger.error(f"Error rescanning security assessment: {str(e)}")
+            self._finish_scan("failed")
+            raise
+        finally:
+            self.result_cache = result_cache
+
+        current = [
+            finding
+            for task in self.task_manager.get_tasks(TaskStatus.COMPLETED) if task.result
+            for finding in iter_findings(task.tool, task.parameters.get("target"), task.result)
+        ]
+        report["diff"] = {"previous_scan_id": previous_scan_id, **diff_findings(baseline.findings, current)}
+        if self.report_dir:
+            path = Path(self.report_dir) / f"{self.scan_id}.diff.json"
+            path.write_text(json.dumps(report["diff"], indent=2, default=str), encoding="utf-8")
+            report["files"]["diff"] = str(path)
+        logger.info(f"Rescan {self.scan_id} differences: {report['diff']['summary']}")
+        return report
+
+    def _detect_changes(self, baseline: Baseline) -> Changes:
+        """Run the baseline's light sweeps and compare what they found with the baseline"""
+        sweeps = []
+        for sweep in baseline.sweeps:
+            parameters = {key: value for key, value in sweep.items() if value}
+            task = self.task_manager.add_task(description=f"Change detection sweep of {sweep['target']}",
+                                              tool="nmap", parameters={**parameters, "version_light": True})
+            if task:
+                sweeps.append(task)
+        results = self.executor.run_all(sweeps, self._sweep)
+
+        failed = [task.parameters["target"] for task in sweeps if task.status == TaskStatus.FAILED]
+        changes = detect_changes(baseline, [port for result in results for port in result.get("open_ports", [])],
+                                 failed)
+        for outcome, keys in changes._asdict().items():
+            self.metrics.inc("rescan_ports", len(keys), outcome=outcome)
+        logger.info(
+            f"Change detection over {len(sweeps)} sweeps: {len(changes.new)} new, {len(changes.closed)} closed, "
+            f"{len(changes.changed)} changed, {len(changes.unchanged)} unchanged, "
+            f"{len(changes.unverified)} unverified ports"
+        )
+        return changes
+
+    def _sweep(self, task: Task) -> Optional[Dict]:
+        """Run one change-detection sweep; a failed sweep is not retried"""
+        target = task.parameters["target"]
+        with self.metrics.span("execute", tool=task.tool, target=target):
+            self.task_manager.update_task_status(task.id, TaskStatus.RUNNING)
+            try:
+                result = self.tools[task.tool].run(**task.parameters, timeout=self._tool_timeout(task.tool))
+            except Exception as e:
+                logger.error(f"Change detection sweep of {target} failed: {str(e)}")
+                self.metrics.inc("failed_tasks", tool=task.tool)
+                self.task_manager.update_task_status(task.id, TaskStatus.FAILED)
+                return None
+        # Only the host list is kept: light banners must not reach the report as findings
+        self.task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result={
+            "hosts": result.get("hosts", []), "stats": result.get("stats", {})
+        })
+        return result
+
+    def _plan_rescan(self, previous_scan_id: str, baseline: Baseline, changes: Changes):
+        """Queue full scans of what changed or expired and carry the rest forward"""
+        stale = {key for key in changes.unchanged if baseline.expired(key)}
+        keep = changes.unchanged - stale
+        rescanned = changes.new | changes.changed | changes.unverified | stale
+        tasks = [
+            {"description": f"Service scan of changed ports on {target}", "tool": "nmap",
+             "parameters": {"target": target, "ports": port_spec(keys)}}
+            for target, keys in self._by_target(rescanned, baseline).items()
+        ]
+
+        carried = []
+        for target, keys in self._by_target(keep, baseline).items():
+            records = [baseline.ports[key] for key in sorted(keys)]
+            seen = min(baseline.observed[key] for key in keys)
+            carried.append({"description": f"Open ports of {target} carried from {previous_scan_id}", "tool": "nmap",
+                            "parameters": {"target": target, "ports": port_spec(keys)},
+                            "result": {"open_ports": records, "observed_at": seen.isoformat()}})
+        for task in baseline.web:
+            key = baseline.web_key(task)
+            if key in baseline.ports and key not in keep:
+                # Closed, changed or stale port: the full scan's follow-ups enumerate it again
+                continue
+            planned = {"description": task.description, "tool": task.tool, "parameters": task.parameters}
+            if observed_at(task) < baseline.cutoff:
+                tasks.append(planned)
+            else:
+                carried.append({**planned, "result": {**task.result, "observed_at": observed_at(task).isoformat()}})
+
+        allowed, rejected = filter_in_scope(self.scope, tasks + carried)
+        self._reject(rejected)
+        queued = self._add_tasks([task for task in allowed if "result" not in task])
+        kept = []
+        for task in allowed:
+            if "result" not in task:
+                continue
+            result = {**task.pop("result"), "carried_from": previous_scan_id}
+            added = self.task_manager.add_task(**task)
+            if added:
+                self.task_manager.update_task_status(added.id, TaskStatus.COMPLETED, result=result)
+                kept.append(added)
+        self.analysis_context.remember([task.result for task in kept])
+
+        self.metrics.inc("rescan_tasks", len(queued), outcome="rescanned")
+        self.metrics.inc("rescan_tasks", len(kept), outcome="carried")
+        logger.info(f"Rescan {self.scan_id}: {len(queued)} tasks to run, {len(kept)} carried from {previous_scan_id}")
+
+    @staticmethod
+    def _by_target(keys: Iterable[PortKey], baseline: Baseline) -> Dict[str, List[PortKey]]:
+        """Port keys grouped by the nmap target that reaches them (the host name it was scanned by, if any)"""
+        targets: Dict[str, List[PortKey]] = defaultdict(list)
+        for key in sorted(keys):
+            targets[baseline.target_for(key[0])].append(key)
+        return dict(targets)
+
+    def _run_workflow(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the workflow graph (from its checkpoint when state is None) and finish the scan"""
+        final = self.workflow.invoke(state, run_config(self.scan_id))
+        # A run that had already reached the end has nothing left to emit
+        report = final["report"] if final else self._generate_report()
+        report["metrics"] = self.metrics.summary()
+        logger.info(f"Scan {self.scan_id} metrics: {report['metrics']['stages']} {report['metrics']['counters']}")
+        self._finish_scan("completed")
+        return report
+
+    def _finish_scan(self, status: str):
+        if self.metrics_dir is not None:
+            self.metrics.write(
+                prometheus_path=f"{self.metrics_dir}/{self.scan_id}.prom",
+                json_path=f"{self.metrics_dir}/{self.scan_id}.json"
+            )
+        if self.store is not None:
+            self.store.set_scan_status(self.scan_id, status)
+            self.store.flush()
+
     def _generate_report(self) -> Dict[str, Any]:
-        """Generate final report"""
-        completed_tasks = [t for t in self.task_manager.tasks if t.status == TaskStatus.COMPLETED]
-        failed_tasks = [t for t in self.task_manager.tasks if t.status == TaskStatus.FAILED]
-
-        findings = []
-        for task in completed_tasks:
-            if task.result:
-                findings.extend(self._parse_findings(task))
-
-        return {
-            "findings": findings,
-            "summary": {
-                "total_tasks": len(self.task_manager.tasks),
-                "completed_tasks": len(completed_tasks),
-                "failed_tasks": len(failed_tasks),
-                "total_findings": len(findings)
+        """Generate final report, streaming every finding to the report files"""
+        with self.metrics.span("report"):
+            writers = open_writers(self.report_dir, self.scan_id) if self.report_dir else []
+            # Grouped by host, so repeats fall within the builder's deduplication window
+            tasks = sorted(self.task_manager.get_tasks(TaskStatus.COMPLETED),
+                           key=lambda task: host_of(task.parameters.get("target") or ""))
+            with ReportBuilder(writers, keep=self.max_report_findings) as builder:
+                for task in tasks:
+                    if task.result:
+                        builder.add_result(task.tool, task.parameters.get("target"), task.result)
+
+            counts = self.task_manager.summary()
+            aggregates = builder.summary()
+            # Tasks that ran out of time or retries are completed, but their scans are not
+            partial = sum(1 for task in self.task_manager.get_tasks(TaskStatus.COMPLETED)
+                          if task.result and task.result.get("partial"))
+            return {
+                "findings": [finding._asdict() for finding in builder.kept],
+                "summary": {
+                    "total_tasks": counts["total"],
+                    "completed_tasks": counts[TaskStatus.COMPLETED.value] - partial,
+                    "partial_tasks": partial,
+                    "failed_tasks": counts[TaskStatus.FAILED.value],
+                    "total_findings": builder.total,
+                    "truncated": builder.total > len(builder.kept)
+                },
+                "aggregates": {k: v for k, v in aggregates.items() if k != "total_findings"},
+                "files": builder.files()
             }
-        }
 
     def _parse_tasks(self, llm_response: str) -> List[Dict]:
         """Parse LLM response into structured tasks"""
-        tasks = []
         try:
-            lines = llm_response.split("\n")
-            current_task = {}
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("Tool:"):
-                    if current_task:
-                        tasks.append(current_task)
-                    current_task = {"tool": line.split(":")[1].strip()}
-                elif line.startswith("Target:"):
-                    current_task["parameters"] = {"target": line.split(":")[1].strip()}
-                elif line.startswith("Parameters:"):
-                    # Update existing parameters
-                    current_task["parameters"].update(eval(line.split(":", 1)[1].strip()))
-                elif line.startswith("Description:"):
-                    current_task["description"] = line.split(":", 1)[1].strip()
-
-            if current_task:
-                tasks.append(current_task)
-
-            return tasks
+            return parse_plan(llm_response)
         except Exception as e:
             logger.error(f"Error parsing tasks: {str(e)}")
             return []
 
-    def _parse_findings(self, task: Task) -> List[str]:
-        """Parse task results into findings"""
-        findings = []
+    def task_findings(self, task: Task) -> List[str]:
+        """Findings of a task's result as readable sentences"""
         try:
-            if task.tool == "nmap":
-                # Parse nmap results
-                if "open_ports" in task.result:
-                    for port in task.result["open_ports"]:
-                        findings.append(f"Port {port} is open on {task.parameters['target']}")
-            elif task.tool in ["gobuster", "ffuf"]:
-                # Parse directory discovery results
-                if "discovered_paths" in task.result:
-                    for path in task.result["discovered_paths"]:
-                        findings.append(f"Directory {path} found on {task.parameters['target']}")
+            return [describe(f) for f in iter_findings(task.tool, task.parameters.get("target"), task.result)]
         except Exception as e:
             logger.error(f"Error parsing findings: {str(e)}")
-        
-        return findings
\ No newline at end of file
+            return []
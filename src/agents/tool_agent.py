@@ -1,17 +1,29 @@
-from typing import Dict, Any, List
-from langchain.chat_models import ChatOllama
+from typing import Dict, Any, List, Optional, Tuple
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import SystemMessage, HumanMessage
 from loguru import logger
+from ..core.analysis_context import AnalysisContext
 from ..core.scope import ScopeDefinition
+from ..core.planner import PLAN_FORMAT, assign_groups, filter_in_scope, parse_plan
+from ..core.llm_cache import CachedChatModel, default_llm_cache, invoke_all
+from ..core.ollama_client import AsyncOllamaChat
+from ..utils.cache import DiskCache
 from ..tools.nmap_tool import NmapTool
 from ..tools.gobuster_tool import GobusterTool
 from ..tools.ffuf_tool import FfufTool
 
 class ToolAgent:
-    def __init__(self, scope: ScopeDefinition):
+    def __init__(self,
+                 scope: ScopeDefinition,
+                 llm_cache: Optional[DiskCache] = None,
+                 use_llm_cache: bool = True,
+                 analysis_token_budget: int = 3000):
         self.scope = scope
-        self.llm = ChatOllama(model="mistral")
+        self.analysis_context = AnalysisContext(token_budget=analysis_token_budget)
+        self.llm = CachedChatModel(
+            AsyncOllamaChat(model="mistral"),
+            cache=(llm_cache or default_llm_cache()) if use_llm_cache else None
+        )
         self.tools = {
             "nmap": NmapTool(),
             "gobuster": GobusterTool(),
@@ -40,51 +52,50 @@ class ToolAgent:
 
     def analyze_output(self, tool_name: str, output: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Analyze tool output and suggest next steps"""
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=f"You are a security expert analyzing {tool_name} output. "
-                                "Suggest next steps based on the findings."),
-            HumanMessage(content=str(output))
-        ])
+        return self.analyze_outputs([(tool_name, output)])[0]
 
-        response = self.llm.invoke(prompt)
-        
-        # Parse the response into a list of suggested next steps
-        suggestions = self._parse_suggestions(response.content)
-        
-        # Filter suggestions to ensure they're in scope
-        valid_suggestions = [
-            suggestion for suggestion in suggestions
-            if self.scope.is_in_scope(suggestion.get("target", ""))
-        ]
+    def analyze_outputs(self,
+                        outputs: List[Tuple[str, Dict[str, Any]]],
+                        batch_size: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        Analyze several tool outputs with one concurrent LLM call per `batch_size` outputs
 
-        return valid_suggestions
+        The outputs of a batch share the analysis token budget, so verbose
+        fields and long lists are shortened before they reach the prompt.
+        Returns the in-scope suggestions for each output, in input order
+        """
+        suggestions: List[List[Dict[str, Any]]] = [[] for _ in outputs]
+        budget = self.analysis_context.char_budget
+        batches = [
+            list(enumerate(outputs[start:start + batch_size], start=start))
+            for start in range(0, len(outputs), batch_size)
+        ]
+        prompts = [
+            ChatPromptTemplate.from_messages([
+                SystemMessage(content="You are a security expert analyzing tool output. "
+                                      "Suggest next steps based on the findings. Outputs are "
+                                      "given as [id] tool: output; use the id as group.\n" + PLAN_FORMAT),
+                HumanMessage(content="\n".join(
+                    f"[{i}] {tool}: {self.analysis_context.render(output, budget // len(batch))}"
+                    for i, (tool, output) in batch
+                ))
+            ])
+            for batch in batches
+        ]
 
-    def _parse_suggestions(self, llm_response: str) -> List[Dict[str, Any]]:
-        """Parse LLM response into structured suggestions"""
-        try:
-            # This is a simple implementation - you might want to make it more robust
-            suggestions = []
-            lines = llm_response.split("\n")
-            
-            current_suggestion = {}
-            for line in lines:
-                if line.startswith("Tool:"):
-                    if current_suggestion:
-                        suggestions.append(current_suggestion)
-                    current_suggestion = {"tool": line.split(":")[1].strip()}
-                elif line.startswith("Target:"):
-                    current_suggestion["target"] = line.split(":")[1].strip()
-                elif line.startswith("Parameters:"):
-                    params_str = line.split(":")[1].strip()
-                    current_suggestion["parameters"] = eval(params_str)  # Be careful with eval!
+        for batch, response in zip(batches, invoke_all(self.llm, prompts)):
+            tasks = assign_groups(parse_plan(response.content), [str(i) for i, _ in batch], self.tools)
 
-            if current_suggestion:
-                suggestions.append(current_suggestion)
+            # Filter suggestions to ensure they're in scope
+            valid, _ = filter_in_scope(self.scope, tasks)
+            for task in valid:
+                suggestions[int(task["group"])].append({
+                    "tool": task["tool"],
+                    "target": task["parameters"]["target"],
+                    "parameters": task["parameters"]
+                })
 
-            return suggestions
-        except Exception as e:
-            logger.error(f"Failed to parse suggestions: {str(e)}")
-            return []
+        return suggestions
 
     def validate_tool_parameters(self, tool_name: str, parameters: Dict[str, Any]) -> bool:
         """Validate that the parameters for a tool are correct and safe"""
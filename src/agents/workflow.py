@@ -0,0 +1,122 @@
+from collections import defaultdict
+from typing import Any, Dict, Optional, TYPE_CHECKING
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointAt
+from langgraph.graph import END, Graph
+from loguru import logger
+from src.core.store import ScanStore
+from src.core.task_manager import TaskStatus
+
+if TYPE_CHECKING:
+    from src.agents.security_agent import SecurityAgent
+
+# Every node is followed by an edge step, so one plan/execute/analyze round
+# costs a handful of graph steps; this leaves room for long scans
+RECURSION_LIMIT = 10000
+
+class ScanStoreSaver(BaseCheckpointSaver):
+    """
+    Checkpoints the workflow into the scan store after every graph step
+
+    The thread_id of the run config is the scan_id. Checkpoints go through
+    the same write queue as task updates, so a saved checkpoint never refers
+    to task state that has not been persisted.
+    """
+
+    store: ScanStore
+    at: CheckpointAt = CheckpointAt.END_OF_STEP
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def get(self, config: RunnableConfig) -> Optional[Checkpoint]:
+        saved = self.store.load_checkpoint(config["configurable"]["thread_id"])
+        if saved is None:
+            return None
+        # JSON loses the defaultdicts the Pregel loop relies on
+        saved["channel_versions"] = defaultdict(int, saved["channel_versions"])
+        saved["versions_seen"] = defaultdict(
+            lambda: defaultdict(int),
+            {node: defaultdict(int, seen) for node, seen in saved["versions_seen"].items()}
+        )
+        return saved
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint) -> None:
+        self.store.save_checkpoint(config["configurable"]["thread_id"], checkpoint)
+
+def initial_state(scan_id: str,
+                  instruction: Optional[str],
+                  resumed: bool = False,
+                  analyzed: int = 0) -> Dict[str, Any]:
+    """
+    Graph state passed between nodes
+
+    Only counts are kept here; tasks and results live in the TaskManager
+    (and the scan store), which keeps checkpoints small. "analyzed" is a
+    watermark: completed tasks never change status again, so the first
+    `analyzed` tasks in completion order are the ones already analyzed.
+    """
+    return {
+        "scan_id": scan_id,
+        "instruction": instruction,
+        "resumed": resumed,
+        "analyzed": analyzed,
+        "pending": 0,
+        "report": None
+    }
+
+def build_workflow(agent: "SecurityAgent"):
+    """
+    Compile the plan -> execute -> analyze -> (execute | report) graph for an agent
+
+    Tasks run in parallel inside the execute node through the agent's
+    TaskExecutor, which applies the global and per-tool concurrency limits.
+    """
+
+    def plan(state: Dict[str, Any]) -> Dict[str, Any]:
+        # Resumed scans already have their tasks in the store
+        if not state["resumed"]:
+            agent._plan_tasks(state["instruction"])
+        return {**state, "pending": agent.task_manager.count(TaskStatus.PENDING)}
+
+    def execute(state: Dict[str, Any]) -> Dict[str, Any]:
+        tasks = agent.task_manager.get_tasks(TaskStatus.PENDING)
+        if tasks:
+            agent.executor.run_all(tasks, agent._execute_task)
+        return state
+
+    def analyze(state: Dict[str, Any]) -> Dict[str, Any]:
+        # Completed tasks past the watermark, so a replayed execute node loses nothing
+        completed = agent.task_manager.get_tasks(TaskStatus.COMPLETED)
+        agent._analyze_tasks(completed[state["analyzed"]:])
+        return {
+            **state,
+            "analyzed": len(completed),
+            "pending": agent.task_manager.count(TaskStatus.PENDING)
+        }
+
+    def report(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {**state, "report": agent._generate_report()}
+
+    def next_step(state: Dict[str, Any]) -> str:
+        return "execute" if state["pending"] else "report"
+
+    graph = Graph()
+    graph.add_node("plan", plan)
+    graph.add_node("execute", execute)
+    graph.add_node("analyze", analyze)
+    graph.add_node("report", report)
+    graph.set_entry_point("plan")
+    graph.add_conditional_edges("plan", next_step, {"execute": "execute", "report": "report"})
+    graph.add_edge("execute", "analyze")
+    graph.add_conditional_edges("analyze", next_step, {"execute": "execute", "report": "report"})
+    graph.set_finish_point("report")
+
+    app = graph.compile()
+    if agent.store is not None:
+        app = app.copy(update={"saver": ScanStoreSaver(store=agent.store)})
+    logger.debug(f"Compiled scan workflow with nodes: {', '.join(graph.nodes)}")
+    return app
+
+def run_config(scan_id: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": scan_id}, "recursion_limit": RECURSION_LIMIT}
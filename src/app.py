@@ -1,10 +1,99 @@
+import time
+from pathlib import Path
 import streamlit as st
-from agents.security_agent import SecurityAgent
+from agents.security_agent import SecurityAgent, default_tools
 from core.scope import ScopeDefinition
+from core.jobs import JobManager
+from core.llm_cache import default_llm_cache
+from core.ollama_client import AsyncOllamaChat
+from core.rate_limit import HostRateLimiter
+from core.fingerprint import default_result_cache
+from core.store import ScanStore
 from loguru import logger
 
+# Seconds between refreshes while a scan is running
+POLL_INTERVAL = 2.0
+REPORT_DIR = "reports"
+# Ollama requests in flight across all scans
+LLM_CONCURRENCY = 4
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """One job manager per server, shared by every session and rerun"""
+    # Built once: the LLM client, tools, caches and store are reused by every scan
+    llm = AsyncOllamaChat(model="mistral", max_concurrency=LLM_CONCURRENCY)
+    tools = default_tools()
+    llm_cache = default_llm_cache()
+    result_cache = default_result_cache()
+    store = ScanStore()
+    # Scans of the same host share its request budget
+    rate_limiter = HostRateLimiter()
+
+    def build_agent(scope: ScopeDefinition, scan_id: str) -> SecurityAgent:
+        return SecurityAgent(
+            scope,
+            scan_id=scan_id,
+            llm=llm,
+            tools=tools,
+            llm_cache=llm_cache,
+            result_cache=result_cache,
+            store=store,
+            report_dir=REPORT_DIR,
+            rate_limiter=rate_limiter
+        )
+
+    logger.info("Started scan job manager")
+    return JobManager(build_agent)
+
+def show_job(manager: JobManager, job_id: str):
+    snapshot = manager.status(job_id)
+    if snapshot is None:
+        st.warning(f"Scan job {job_id} is not known to this server (it may have been restarted)")
+        return
+
+    st.header("Scan Progress")
+    st.caption(f"Job {job_id}: {snapshot['instruction']}")
+    summary = snapshot["summary"]
+    finished = summary["completed"] + summary["failed"]
+    st.progress(finished / summary["total"] if summary["total"] else 0.0,
+                text=f"{snapshot['status']} - {finished}/{summary['total']} tasks, {snapshot['elapsed']}s")
+
+    cols = st.columns(4)
+    for col, key in zip(cols, ("pending", "running", "completed", "failed")):
+        col.metric(key.capitalize(), summary[key])
+
+    if snapshot["tasks"]:
+        st.dataframe(snapshot["tasks"], use_container_width=True, hide_index=True)
+
+    st.subheader("Findings")
+    if snapshot["findings"]:
+        for finding in snapshot["findings"]:
+            st.write(f"- {finding}")
+    else:
+        st.write("No findings yet")
+
+    if snapshot["status"] == "completed":
+        st.success("Scan completed!")
+        show_report(snapshot["report"])
+    elif snapshot["status"] == "failed":
+        st.error(f"Scan failed: {snapshot['error']}")
+    else:
+        # Poll: the scan keeps running in the background between reruns
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
+def show_report(report: dict):
+    st.json(report["summary"])
+    # Inline preview only; the complete report is in the downloadable files
+    st.dataframe(report["findings"], use_container_width=True, hide_index=True)
+    for fmt, path in report["files"].items():
+        with open(path, "rb") as f:
+            st.download_button(f"Download {fmt.upper()}", f, file_name=Path(path).name, key=path)
+
 def main():
     st.title("Cybersecurity Audit Assistant")
+    manager = get_job_manager()
+    session_jobs = st.session_state.setdefault("jobs", [])
 
     # Scope Definition
     st.header("Define Scope")
@@ -26,20 +115,22 @@ def main():
     )
 
     if st.button("Start Scan"):
-        agent = SecurityAgent(scope)
-        
-        # Create a progress container
-        progress_container = st.empty()
-        
-        try:
-            with st.spinner("Running security scan..."):
-                result = agent.run(instruction)
-                
-                # Display results
-                st.success("Scan completed!")
-                st.json(result)
-        except Exception as e:
-            st.error(f"Scan failed: {str(e)}")
+        job_id = manager.submit(scope, instruction)
+        session_jobs.append(job_id)
+        # Keep the job in the URL so a browser refresh reattaches to it
+        st.query_params["job"] = job_id
+
+    with st.sidebar:
+        st.header("Scans")
+        for job in manager.list_jobs():
+            if job["job_id"] not in session_jobs and job["job_id"] != st.query_params.get("job"):
+                continue
+            if st.button(f"{job['status']}: {job['instruction'][:40]}", key=job["job_id"]):
+                st.query_params["job"] = job["job_id"]
+
+    job_id = st.query_params.get("job") or (session_jobs[-1] if session_jobs else None)
+    if job_id:
+        show_job(manager, job_id)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,141 @@
+import json
+from typing import Any, Dict, List
+from loguru import logger
+
+# Free-text fields that dominate result size; structured fields are kept in full when possible
+_VERBOSE_KEYS = {"stdout", "stderr", "raw_output", "output", "error"}
+
+class AnalysisContext:
+    """
+    Builds bounded LLM analysis prompts across iterations
+
+    Each call to build() renders only the results that are new since the
+    previous call, preceded by a running one-line-per-result summary of
+    everything analysed earlier. The rendered text is kept under
+    `token_budget` (estimated at `chars_per_token` characters per token)
+    by shrinking verbose fields, then list lengths, then old summary lines.
+
+    Args:
+        token_budget: Approximate prompt size limit in tokens
+        chars_per_token: Characters assumed per token when estimating size
+        summary_share: Fraction of the budget the running summary may use
+    """
+
+    def __init__(self,
+                 token_budget: int = 3000,
+                 chars_per_token: int = 4,
+                 summary_share: float = 0.3):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+        self.summary_share = summary_share
+        self.summary: List[str] = []
+        self.dropped_summary = 0
+
+    @property
+    def char_budget(self) -> int:
+        return self.token_budget * self.chars_per_token
+
+    def build(self, new_results: List[Dict[str, Any]]) -> str:
+        """Render the prompt for new_results and fold them into the running summary"""
+        return self.build_many([new_results])[0]
+
+    def build_many(self, chunks: List[List[Dict[str, Any]]]) -> List[str]:
+        """
+        Render one prompt per chunk of new results, all against the same summary
+
+        The prompts do not depend on each other, so they can be analysed
+        concurrently; every chunk is folded into the summary afterwards.
+        """
+        summary_text = self._render_summary(int(self.char_budget * self.summary_share))
+        remaining = max(self.char_budget - len(summary_text), self.char_budget // 2)
+
+        prompts = []
+        for chunk in chunks:
+            sections = []
+            if summary_text:
+                sections.append(f"Findings from earlier iterations:\n{summary_text}")
+            sections.append(f"New results:\n{self._render_results(chunk, remaining)}")
+            prompts.append("\n\n".join(sections))
+
+        for chunk in chunks:
+            self.remember(chunk)
+        return prompts
+
+    def render(self, result: Dict[str, Any], budget: int) -> str:
+        """One result compacted to at most `budget` characters, without touching the summary"""
+        return self._render_results([result], budget)
+
+    def remember(self, results: List[Dict[str, Any]]):
+        """Add results to the running summary without rendering them as new"""
+        self.summary.extend(self._digest(result) for result in results)
+
+    def _render_summary(self, budget: int) -> str:
+        # Drop the oldest lines first; the count keeps the model aware of them
+        total = sum(len(line) + 1 for line in self.summary)
+        while self.summary and total > budget:
+            total -= len(self.summary.pop(0)) + 1
+            self.dropped_summary += 1
+        lines = list(self.summary)
+        if self.dropped_summary:
+            lines.insert(0, f"({self.dropped_summary} earlier results omitted)")
+        return "\n".join(lines)
+
+    def _render_results(self, results: List[Dict[str, Any]], budget: int) -> str:
+        if not results:
+            return "(none)"
+        per_result = max(budget // len(results), 200)
+        text_chars, max_items = 2000, 50
+        while True:
+            rendered = "\n".join(
+                self._dumps(self._compact(result, text_chars, max_items))[:per_result]
+                for result in results
+            )
+            if len(rendered) <= budget or (text_chars <= 100 and max_items <= 5):
+                break
+            text_chars, max_items = max(text_chars // 2, 100), max(max_items // 2, 5)
+
+        if len(rendered) > budget:
+            logger.debug(f"Analysis context truncated from {len(rendered)} to {budget} chars")
+            rendered = rendered[:budget]
+        return rendered
+
+    def _compact(self, value: Any, text_chars: int, max_items: int, key: str = "") -> Any:
+        if isinstance(value, str):
+            limit = text_chars if key in _VERBOSE_KEYS else max(text_chars // 4, 100)
+            if len(value) > limit:
+                return f"{value[:limit]}...[+{len(value) - limit} chars]"
+            return value
+        if isinstance(value, dict):
+            return {
+                k: self._compact(v, text_chars, max_items, k)
+                for k, v in value.items()
+                if not (k in _VERBOSE_KEYS and not v)
+            }
+        if isinstance(value, (list, tuple)):
+            items = [self._compact(v, text_chars, max_items) for v in value[:max_items]]
+            if len(value) > max_items:
+                items.append(f"...(+{len(value) - max_items} more)")
+            return items
+        return value
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        return json.dumps(value, default=str, separators=(",", ":"))
+
+    @staticmethod
+    def _digest(result: Dict[str, Any]) -> str:
+        """One-line summary: the command plus the size of each structured collection"""
+        label = result.get("command") or "result"
+        counts = []
+        for key, value in result.items():
+            if key in _VERBOSE_KEYS:
+                continue
+            if isinstance(value, (list, tuple)):
+                counts.append(f"{key}={len(value)}")
+            elif isinstance(value, dict):
+                counts.extend(
+                    f"{key}.{k}={len(v)}" for k, v in value.items() if isinstance(v, (list, tuple))
+                )
+        if "return_code" in result:
+            counts.append(f"rc={result['return_code']}")
+        return f"- {label[:200]}: {', '.join(counts) or 'no structured data'}"
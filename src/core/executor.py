@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from loguru import logger
+from src.core.task_manager import Task, TaskStatus
+
+class TaskExecutor:
+    """
+    Run independent tasks concurrently with global and per-tool limits
+
+    Args:
+        max_workers: Maximum number of tasks running at once
+        tool_limits: Per-tool cap on concurrent tasks
+        retry_delay: Seconds before a task's first retry, doubled for each later one
+        max_retry_delay: Upper bound for a single retry delay
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 retry_delay: float = 0.5,
+                 max_retry_delay: float = 30.0):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.tool_limits = dict(tool_limits or {})
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    def _tool_limit(self, tool: str) -> int:
+        return max(1, min(self.tool_limits.get(tool, self.max_workers), self.max_workers))
+
+    def _backoff(self, task: Task) -> float:
+        return min(self.max_retry_delay, self.retry_delay * 2 ** max(task.retries - 1, 0))
+
+    def run_all(self,
+                tasks: List[Task],
+                execute: Callable[[Task], Optional[Dict]]) -> List[Dict]:
+        """
+        Execute tasks and return the non-empty results in completion order
+
+        Args:
+            tasks: Tasks to run
+            execute: Callable running one task. It owns the task status
+                transitions; a task it leaves in PENDING is scheduled again
+                after a backoff delay, while other tasks keep running.
+        """
+        # Stable sort keeps planning order among tasks of equal priority
+        queue: Deque[Task] = deque(sorted(tasks, key=lambda t: -t.priority))
+        running: Dict[Future, Task] = {}
+        per_tool: Dict[str, int] = {}
+        results: List[Dict] = []
+        # (ready_at, sequence, task) of retries waiting out their backoff
+        delayed: List[Tuple[float, int, Task]] = []
+        sequence = itertools.count()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="task") as pool:
+            while queue or running or delayed:
+                while delayed and delayed[0][0] <= time.monotonic():
+                    queue.append(heapq.heappop(delayed)[2])
+                # Dispatch every queued task whose tool still has a free slot
+                deferred: Deque[Task] = deque()
+                while queue and len(running) < self.max_workers:
+                    task = queue.popleft()
+                    if per_tool.get(task.tool, 0) >= self._tool_limit(task.tool):
+                        deferred.append(task)
+                        continue
+                    per_tool[task.tool] = per_tool.get(task.tool, 0) + 1
+                    logger.info(f"Executing task: {task.description}")
+                    running[pool.submit(execute, task)] = task
+                queue.extendleft(reversed(deferred))
+
+                next_retry = max(delayed[0][0] - time.monotonic(), 0) if delayed else None
+                if not running:
+                    if next_retry is None:
+                        break
+                    time.sleep(next_retry)
+                    continue
+
+                done, _ = wait(running, timeout=next_retry, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    per_tool[task.tool] -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Task {task.id} raised unexpectedly: {str(e)}")
+                        result = None
+
+                    if result:
+                        results.append(result)
+                    elif task.status == TaskStatus.PENDING:
+                        delay = self._backoff(task)
+                        logger.info(f"Retrying task {task.id} (attempt {task.retries + 1}) in {delay:.1f}s")
+                        heapq.heappush(delayed, (time.monotonic() + delay, next(sequence), task))
+
+        return results
@@ -0,0 +1,78 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+from loguru import logger
+from src.utils.cache import DiskCache
+
+DEFAULT_RESULT_CACHE_PATH = ".cache/tool_results.db"
+
+# Parameters that change how fast a tool runs but not what it finds
+_NON_SEMANTIC_PARAMS = {"threads", "rate", "delay", "timeout"}
+# Comma separated parameters whose order does not matter
+_UNORDERED_LIST_PARAMS = {"ports", "status_codes", "extensions"}
+
+def _normalize_target(target: str) -> str:
+    target = target.strip()
+    if "://" not in target:
+        return target.lower().rstrip(".")
+    parts = urlsplit(target)
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+def _normalize_value(key: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if key in _UNORDERED_LIST_PARAMS:
+            return ",".join(sorted(v.strip() for v in value.split(",") if v.strip()))
+        return value
+    if isinstance(value, dict):
+        return {k: _normalize_value(k, v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(key, v) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value)
+
+def task_fingerprint(tool: str, parameters: Dict[str, Any]) -> str:
+    """Canonical hash of a tool invocation, independent of parameter order and speed settings"""
+    canonical = {}
+    for key, value in parameters.items():
+        if key in _NON_SEMANTIC_PARAMS:
+            continue
+        if key == "target" and isinstance(value, str):
+            canonical[key] = _normalize_target(value)
+        else:
+            canonical[key] = _normalize_value(key, value)
+    payload = json.dumps([tool.strip().lower(), canonical], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Tool results memoized by task fingerprint across runs
+
+    Args:
+        cache: Backing store; its max_age acts as the result TTL
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        raw = self.cache.get(fingerprint)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding corrupt cached result {fingerprint[:12]}")
+            return None
+
+    def set(self, fingerprint: str, result: Dict[str, Any]):
+        self.cache.set(fingerprint, json.dumps(result, default=str))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+def default_result_cache(ttl: float = 24 * 3600) -> ResultCache:
+    return ResultCache(DiskCache(DEFAULT_RESULT_CACHE_PATH, max_entries=20000, max_age=ttl))
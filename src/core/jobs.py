@@ -0,0 +1,144 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+from src.core.scope import ScopeDefinition
+from src.core.task_manager import TaskStatus
+
+DEFAULT_MAX_FINISHED_JOBS = 50
+
+class ScanJob:
+    """One scan submitted to the JobManager and the agent running it"""
+
+    def __init__(self, job_id: str, instruction: str, agent: Any):
+        self.job_id = job_id
+        self.instruction = instruction
+        self.agent = agent
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def snapshot(self, max_findings: int = 200) -> Dict[str, Any]:
+        """Live view of the job: task states and the first findings of finished tasks"""
+        manager = self.agent.task_manager
+        tasks = []
+        findings = []
+        for status in TaskStatus:
+            for task in manager.get_tasks(status):
+                tasks.append({
+                    "id": task.id,
+                    "description": task.description,
+                    "tool": task.tool,
+                    "target": task.parameters.get("target"),
+                    "status": task.status.value,
+                    "retries": task.retries
+                })
+                if status == TaskStatus.COMPLETED and task.result and len(findings) < max_findings:
+                    findings.extend(self.agent.task_findings(task))
+
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "instruction": self.instruction,
+            "status": self.status,
+            "elapsed": round(end - self.started_at, 1) if self.started_at else 0.0,
+            "summary": manager.summary(),
+            "tasks": tasks,
+            "findings": findings[:max_findings],
+            "report": self.report,
+            "error": self.error
+        }
+
+class JobManager:
+    """
+    Runs scans on background threads so callers (e.g. Streamlit reruns) never block
+
+    Jobs outlive the request that submitted them and are looked up by id;
+    the job id doubles as the scan id. Only the newest `max_finished_jobs`
+    finished jobs are kept, together with their agents; older ones are
+    forgotten (their scans stay in the scan store, if any).
+
+    Args:
+        agent_factory: Builds the agent for a job from (scope, scan_id)
+        max_concurrent_scans: Scans running at once; further jobs wait queued
+        max_finished_jobs: Finished jobs kept for status() and list_jobs()
+    """
+
+    def __init__(self,
+                 agent_factory: Callable[[ScopeDefinition, str], Any],
+                 max_concurrent_scans: int = 4,
+                 max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS):
+        self.agent_factory = agent_factory
+        self.max_finished_jobs = max_finished_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent_scans, thread_name_prefix="scan")
+        self._jobs: Dict[str, ScanJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, scope: ScopeDefinition, instruction: str) -> str:
+        job_id = str(uuid.uuid4())
+        job = ScanJob(job_id, instruction, self.agent_factory(scope, job_id))
+        with self._lock:
+            self._jobs[job_id] = job
+        job.future = self._pool.submit(self._run, job)
+        logger.info(f"Queued scan job {job_id}: {instruction}")
+        return job_id
+
+    def _run(self, job: ScanJob):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.report = job.agent.run(job.instruction)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Scan job {job.job_id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._evict()
+
+    def _evict(self):
+        """Forget the oldest finished jobs beyond max_finished_jobs"""
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished_at or 0.0)
+            for job in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+                del self._jobs[job.job_id]
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Newest first, without per-task detail"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.submitted_at, reverse=True)
+        return [
+            {"job_id": j.job_id, "instruction": j.instruction, "status": j.status,
+             "submitted_at": j.submitted_at}
+            for j in jobs
+        ]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes and return its final snapshot"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.future.result(timeout=timeout)
+        return job.snapshot()
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,125 @@
+import hashlib
+from typing import Any, List, Optional, Sequence
+from langchain.schema import AIMessage, BaseMessage
+from loguru import logger
+from src.utils.cache import DiskCache
+from src.utils.metrics import Metrics
+
+DEFAULT_LLM_CACHE_PATH = ".cache/llm_responses.db"
+
+def default_llm_cache() -> DiskCache:
+    """Shared on-disk cache for prompt -> response pairs"""
+    return DiskCache(DEFAULT_LLM_CACHE_PATH, max_entries=5000, max_age=30 * 24 * 3600)
+
+def invoke_all(llm: Any, prompts: Sequence[Any]) -> List[BaseMessage]:
+    """Run independent prompts through llm.batch() when the model has it, one by one otherwise"""
+    if not prompts:
+        return []
+    if len(prompts) > 1 and hasattr(llm, "batch"):
+        return list(llm.batch(list(prompts)))
+    return [llm.invoke(prompt) for prompt in prompts]
+
+class CachedChatModel:
+    """
+    Chat model wrapper that memoizes responses on disk
+
+    Responses are keyed by a SHA-256 of the model name and the rendered
+    prompt messages, so identical planning/analysis prompts skip the LLM.
+
+    Args:
+        llm: Underlying chat model (e.g. ChatOllama)
+        cache: Cache to use; None disables caching entirely
+        bypass: When True, always call the model and refresh the cached entry
+        metrics: Optional Metrics receiving cache hit/miss counters
+    """
+
+    def __init__(self,
+                 llm: Any,
+                 cache: Optional[DiskCache] = None,
+                 bypass: bool = False,
+                 metrics: Optional[Metrics] = None):
+        self.llm = llm
+        self.cache = cache
+        self.bypass = bypass
+        self.metrics = metrics
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm, "model", None) or type(self.llm).__name__
+
+    @staticmethod
+    def _to_messages(prompt: Any) -> Any:
+        """Render prompt templates to the message list the model accepts"""
+        if hasattr(prompt, "format_messages"):
+            return prompt.format_messages()
+        return prompt
+
+    @staticmethod
+    def _prompt_text(messages: Any) -> str:
+        if isinstance(messages, str):
+            return messages
+        if isinstance(messages, list):
+            return "\n".join(
+                f"{m.type}: {m.content}" if isinstance(m, BaseMessage) else str(m)
+                for m in messages
+            )
+        return str(messages)
+
+    def _key(self, messages: Any) -> str:
+        text = self._prompt_text(messages)
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def invoke(self, prompt: Any, bypass: Optional[bool] = None) -> BaseMessage:
+        """Return the cached response for prompt, calling the model on a miss"""
+        messages = self._to_messages(prompt)
+        bypass = self.bypass if bypass is None else bypass
+        if self.cache is None:
+            return self.llm.invoke(messages)
+
+        key = self._key(messages)
+        if not bypass:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"LLM cache hit for {self.model_name} ({key[:12]})")
+                if self.metrics is not None:
+                    self.metrics.inc("cache_hits", cache="llm")
+                return AIMessage(content=cached)
+            if self.metrics is not None:
+                self.metrics.inc("cache_misses", cache="llm")
+
+        response = self.llm.invoke(messages)
+        self.cache.set(key, response.content)
+        return response
+
+    def batch(self, prompts: Sequence[Any], bypass: Optional[bool] = None) -> List[BaseMessage]:
+        """
+        Answer independent prompts, sending only the cache misses to the model
+
+        Misses go out together through the model's batch() (concurrently for
+        AsyncOllamaChat); responses come back in prompt order
+        """
+        messages = [self._to_messages(prompt) for prompt in prompts]
+        bypass = self.bypass if bypass is None else bypass
+        if self.cache is None:
+            return invoke_all(self.llm, messages)
+
+        keys = [self._key(m) for m in messages]
+        responses: List[Optional[BaseMessage]] = [None] * len(messages)
+        if not bypass:
+            for i, key in enumerate(keys):
+                cached = self.cache.get(key)
+                if cached is not None:
+                    responses[i] = AIMessage(content=cached)
+            if self.metrics is not None:
+                hits = sum(r is not None for r in responses)
+                self.metrics.inc("cache_hits", hits, cache="llm")
+                self.metrics.inc("cache_misses", len(messages) - hits, cache="llm")
+
+        misses = [i for i, response in enumerate(responses) if response is None]
+        for i, response in zip(misses, invoke_all(self.llm, [messages[i] for i in misses])):
+            self.cache.set(keys[i], response.content)
+            responses[i] = response
+        return responses
+
+    def stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {"enabled": False}
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import httpx
+from langchain.schema import AIMessage, BaseMessage
+from loguru import logger
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+class OllamaError(RuntimeError):
+    """The Ollama API rejected a request or kept failing after retries"""
+
+class AsyncOllamaChat:
+    """
+    Async client for the Ollama /api/chat endpoint with a pooled keep-alive connection set
+
+    Requests share one httpx.AsyncClient per event loop, at most
+    `max_concurrency` of them in flight. A loop's client is closed when the
+    loop shuts down (e.g. at the end of asyncio.run) or by aclose(). Every attempt has a wall-clock
+    timeout; timeouts, connection errors and 408/429/5xx responses are
+    retried with exponential backoff and jitter.
+
+    Synchronous callers use invoke()/batch(), which run on a private event
+    loop thread, so threads of the task executor share the same pool.
+
+    Args:
+        model: Ollama model name
+        base_url: Ollama server URL
+        max_concurrency: Requests in flight at once (also the pool size)
+        timeout: Seconds allowed per attempt
+        connect_timeout: Seconds allowed to open a connection
+        retries: Extra attempts after a retryable failure
+        backoff: Base delay in seconds, doubled per attempt
+        max_backoff: Upper bound for a single delay
+        keep_alive: How long Ollama keeps the model loaded after a request
+        options: Model options passed through (temperature, num_ctx, ...)
+    """
+
+    def __init__(self,
+                 model: str = "mistral",
+                 base_url: str = DEFAULT_OLLAMA_URL,
+                 max_concurrency: int = 4,
+                 timeout: float = 120.0,
+                 connect_timeout: float = 5.0,
+                 retries: int = 3,
+                 backoff: float = 0.25,
+                 max_backoff: float = 8.0,
+                 keep_alive: Optional[str] = "5m",
+                 options: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.keep_alive = keep_alive
+        self.options = dict(options or {})
+        self._pools: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    async def _pool(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            # Loops closed without shutting down their async generators leave a stale entry
+            for stale in [other for other in self._pools if other.is_closed()]:
+                del self._pools[stale]
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+            lifetime = self._lifetime(loop, client)
+            await lifetime.__anext__()
+            pool = self._pools[loop] = (client, asyncio.Semaphore(self.max_concurrency), lifetime)
+        return pool[0], pool[1]
+
+    async def _lifetime(self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> AsyncIterator[None]:
+        # A started async generator is finalized by the loop's shutdown_asyncgens(),
+        # which closes the client along with the loop it belongs to
+        try:
+            yield
+        finally:
+            self._pools.pop(loop, None)
+            await client.aclose()
+
+    @staticmethod
+    def _messages(prompt: Any) -> List[Dict[str, str]]:
+        if hasattr(prompt, "format_messages"):
+            prompt = prompt.format_messages()
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+        return [
+            {"role": _ROLES.get(m.type, "user"), "content": m.content} if isinstance(m, BaseMessage)
+            else {"role": "user", "content": str(m)}
+            for m in prompt
+        ]
+
+    def _delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.backoff * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+    async def ainvoke(self, prompt: Any, timeout: Optional[float] = None) -> AIMessage:
+        """Send one chat request and return the assistant message"""
+        client, semaphore = await self._pool()
+        payload: Dict[str, Any] = {"model": self.model, "messages": self._messages(prompt), "stream": False}
+        if self.options:
+            payload["options"] = self.options
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    response = await asyncio.wait_for(client.post("/api/chat", json=payload), timeout)
+                if response.status_code == 200:
+                    return AIMessage(content=response.json()["message"]["content"])
+                if response.status_code not in _RETRY_STATUS:
+                    raise OllamaError(f"Ollama returned {response.status_code}: {response.text[:200]}")
+                error = f"HTTP {response.status_code}"
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                error = f"timed out after {timeout}s"
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {str(e)}"
+
+            if attempt >= self.retries:
+                raise OllamaError(f"Ollama request failed after {attempt + 1} attempts: {error}")
+            delay = self._delay(attempt)
+            logger.warning(f"Ollama request failed ({error}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def abatch(self, prompts: Sequence[Any], timeout: Optional[float] = None) -> List[AIMessage]:
+        """Send independent requests concurrently, bounded by max_concurrency"""
+        return list(await asyncio.gather(*(self.ainvoke(p, timeout) for p in prompts)))
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="ollama-client", daemon=True).start()
+            return self._loop
+
+    def invoke(self, prompt: Any, timeout: Optional[float] = None) -> AIMessage:
+        """Blocking ainvoke() for synchronous callers"""
+        return asyncio.run_coroutine_threadsafe(self.ainvoke(prompt, timeout), self._background_loop()).result()
+
+    def batch(self, prompts: Sequence[Any], timeout: Optional[float] = None) -> List[AIMessage]:
+        """Blocking abatch() for synchronous callers"""
+        return asyncio.run_coroutine_threadsafe(self.abatch(prompts, timeout), self._background_loop()).result()
+
+    async def aclose(self):
+        """Close the pooled connections of the running loop"""
+        pool = self._pools.get(asyncio.get_running_loop())
+        if pool is not None:
+            await pool[2].aclose()
+
+    def close(self):
+        """Close the pooled connections of the background loop and stop it"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,186 @@
+import ast
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema import SystemMessage, HumanMessage
+from loguru import logger
+from src.core.llm_cache import invoke_all
+from src.core.scope import ScopeDefinition
+
+PLAN_FORMAT = (
+    "Respond with one JSON object per line and nothing else, one line per task:\n"
+    '{"group": "<request id>", "tool": "nmap|gobuster|ffuf", "target": "<host, IP or URL>", '
+    '"parameters": {<extra tool options>}, "description": "<short description>"}'
+)
+
+def _task(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalize one plan entry into add_task() keyword arguments plus its group"""
+    tool = str(entry.get("tool") or "").strip().lower()
+    parameters = entry.get("parameters") or {}
+    if not isinstance(parameters, dict):
+        return None
+    target = parameters.get("target") or entry.get("target")
+    if not tool or not target:
+        return None
+    parameters = {**parameters, "target": str(target).strip()}
+    task = {
+        "tool": tool,
+        "parameters": parameters,
+        "description": entry.get("description") or f"{tool} on {parameters['target']}"
+    }
+    if isinstance(entry.get("priority"), int):
+        task["priority"] = entry["priority"]
+    if entry.get("group") is not None:
+        task["group"] = str(entry["group"])
+    return task
+
+def parse_plan(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse an LLM plan in a single pass over its lines
+
+    JSON object lines (the prompted format) are the primary form. The older
+    "Tool:/Target:/Parameters:/Description:" blocks are still understood,
+    with Parameters read by ast.literal_eval rather than eval. Anything
+    else (prose, code fences) is ignored.
+    """
+    entries: List[Dict[str, Any]] = []
+    block: Dict[str, Any] = {}
+
+    def close_block():
+        if block:
+            entries.append(dict(block))
+            block.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip().rstrip(",")
+        if line.startswith("{") or line.startswith("[{"):
+            close_block()
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"Skipping malformed plan line: {line[:200]}")
+                continue
+            # A whole plan on one line as a JSON array is accepted too
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, dict):
+                    entries.append(item)
+            continue
+
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key, value = key.strip().lower(), value.strip()
+        if key == "tool":
+            close_block()
+            block["tool"] = value
+        elif key in ("target", "description", "group") and block:
+            block[key] = value
+        elif key == "parameters" and block:
+            try:
+                block["parameters"] = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                logger.debug(f"Skipping unparseable parameters: {value[:200]}")
+    close_block()
+
+    tasks = []
+    for entry in entries:
+        task = _task(entry)
+        if task is None:
+            logger.debug(f"Skipping incomplete plan entry: {entry}")
+        else:
+            tasks.append(task)
+    return tasks
+
+def filter_in_scope(scope: ScopeDefinition,
+                    tasks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split tasks into (in scope, out of scope) with one bulk scope lookup"""
+    flags = scope.is_in_scope_many([task["parameters"]["target"] for task in tasks])
+    allowed = [task for task, ok in zip(tasks, flags) if ok]
+    rejected = [task for task, ok in zip(tasks, flags) if not ok]
+    return allowed, rejected
+
+def assign_groups(tasks: List[Dict[str, Any]],
+                  groups: List[str],
+                  tools: Iterable[str]) -> List[Dict[str, Any]]:
+    """Keep tasks for known tools whose group is one of `groups`"""
+    known = set(groups)
+    tools = set(tools)
+    assigned = []
+    for task in tasks:
+        if task["tool"] not in tools:
+            logger.warning(f"Skipping task for unknown tool: {task['tool']}")
+            continue
+        group = task.get("group")
+        if group not in known:
+            # A single-request batch needs no tagging
+            if len(groups) != 1:
+                logger.warning(f"Skipping task with unknown group {group}: {task['description']}")
+                continue
+            task["group"] = groups[0]
+        assigned.append(task)
+    return assigned
+
+class BatchPlanner:
+    """
+    Plans many requests (instructions or target groups) in a few LLM calls
+
+    Requests are keyed by a group id; the model tags every task with the
+    group it belongs to, so results map back to the request that asked
+    for them.
+
+    Args:
+        llm: Chat model (usually a CachedChatModel)
+        scope: Scope used to filter the planned tasks
+        batch_size: Requests sent per LLM call
+        tools: Tool names the plan may use
+    """
+
+    def __init__(self,
+                 llm: Any,
+                 scope: ScopeDefinition,
+                 batch_size: int = 20,
+                 tools: Iterable[str] = ("nmap", "gobuster", "ffuf")):
+        self.llm = llm
+        self.scope = scope
+        self.batch_size = max(1, batch_size)
+        self.tools = set(tools)
+        self.rejected: List[Dict[str, Any]] = []
+
+    def _prompt(self, batch: List[Tuple[str, str]]) -> ChatPromptTemplate:
+        requests = "\n".join(f"[{group}] {instruction}" for group, instruction in batch)
+        return ChatPromptTemplate.from_messages([
+            SystemMessage(content=(
+                "You are a cybersecurity expert. Break down each security request into "
+                f"specific steps using available tools: {', '.join(sorted(self.tools))}. "
+                "Requests are given one per line as [id] request.\n" + PLAN_FORMAT
+            )),
+            HumanMessage(content=requests)
+        ])
+
+    def plan(self, requests: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Plan every request and return the in-scope tasks per group
+
+        Args:
+            requests: Group id -> instruction (or description of a target group)
+        """
+        items = list(requests.items())
+        planned: Dict[str, List[Dict[str, Any]]] = {group: [] for group, _ in items}
+        self.rejected = []
+
+        batches = [items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+        # Batches are independent, so they are sent to the model together
+        responses = invoke_all(self.llm, [self._prompt(batch) for batch in batches])
+        for batch, response in zip(batches, responses):
+            tasks = assign_groups(parse_plan(response.content), [group for group, _ in batch], self.tools)
+            allowed, rejected = filter_in_scope(self.scope, tasks)
+            self.rejected.extend(rejected)
+            for task in allowed:
+                planned[task.pop("group")].append(task)
+
+        logger.info(
+            f"Planned {sum(len(t) for t in planned.values())} tasks for {len(items)} requests "
+            f"in {len(batches)} LLM calls "
+            f"({len(self.rejected)} out of scope)"
+        )
+        return planned
@@ -0,0 +1,207 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Set
+from urllib.parse import urlsplit
+from loguru import logger
+
+# Status codes that mean the target (or a WAF in front of it) wants us to slow down
+THROTTLE_STATUSES = {429, 503}
+# Thread ceilings of the tools when the caller does not ask for fewer
+TOOL_THREADS = {"ffuf": 40, "gobuster": 10}
+# Status code matcher parameter of each tool and its default, which leaves out 429/503
+TOOL_MATCHERS = {"ffuf": ("mc", "200-299,301,302,307,401,403,405,500"),
+                 "gobuster": ("status_codes", "200,204,301,302,307,401,403")}
+
+class Lease(NamedTuple):
+    """Share of a host's request budget granted to one tool invocation"""
+    host: str
+    rate: float
+    threads: int
+
+def host_of(target: str) -> str:
+    """Rate limiting key of a target: its lower-cased host name"""
+    if "://" not in target:
+        target = f"http://{target}"
+    return (urlsplit(target).hostname or target).lower()
+
+class _HostState:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.reserved = 0.0
+        self.active = 0
+        self.responses = 0
+        self.throttled = 0
+        self.failures = 0
+
+class HostRateLimiter:
+    """
+    Per-host request budget shared by every concurrent tool invocation
+
+    Each host has a token rate (requests/second). A lease reserves a share
+    of it for one invocation and returns it when the invocation ends;
+    when the host's budget or its `max_leases` slots are used up, further
+    leases wait. The rate adapts AIMD-style: it is cut by `decrease` when an
+    invocation fails or sees too many 429/503 responses, and raised by
+    `increase` after a healthy one. Running tools keep the rate they were
+    started with; changes apply to the next lease.
+
+    Args:
+        initial_rate: Starting budget per host in requests/second
+        min_rate: Lowest budget a host is cut down to
+        max_rate: Highest budget a host is ramped up to
+        max_leases: Concurrent invocations allowed per host
+        increase: Requests/second added after a healthy invocation
+        decrease: Factor applied to the budget after a throttled or failed one
+        throttle_threshold: Fraction of 429/503 responses that counts as throttled
+        per_thread_rate: Requests/second one tool thread is assumed to sustain
+    """
+
+    def __init__(self,
+                 initial_rate: float = 50.0,
+                 min_rate: float = 2.0,
+                 max_rate: float = 500.0,
+                 max_leases: int = 2,
+                 increase: float = 10.0,
+                 decrease: float = 0.5,
+                 throttle_threshold: float = 0.05,
+                 per_thread_rate: float = 5.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_leases = max(1, max_leases)
+        self.increase = increase
+        self.decrease = decrease
+        self.throttle_threshold = throttle_threshold
+        self.per_thread_rate = per_thread_rate
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.initial_rate)
+        return state
+
+    @contextmanager
+    def lease(self, host: str, max_threads: int, timeout: Optional[float] = None) -> Iterator[Lease]:
+        """
+        Reserve a fair share of the host's budget for the duration of the block
+
+        The share is the unreserved budget divided by the free slots, so one
+        invocation never starves the next. Raises TimeoutError when no share
+        frees up within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            state = self._state(host)
+            while True:
+                available = state.rate - state.reserved
+                if state.active < self.max_leases and available >= min(self.min_rate, state.rate):
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No request budget for {host} within {timeout}s")
+                self._cond.wait(remaining)
+            share = available / (self.max_leases - state.active)
+            state.reserved += share
+            state.active += 1
+
+        threads = max(1, min(max_threads, math.ceil(share / self.per_thread_rate)))
+        try:
+            yield Lease(host, share, threads)
+        finally:
+            with self._cond:
+                state.reserved = max(0.0, state.reserved - share)
+                state.active -= 1
+                self._cond.notify_all()
+
+    def observe(self, host: str, responses: int = 0, throttled: int = 0, failed: bool = False):
+        """Adapt the host's budget to the outcome of one invocation"""
+        with self._cond:
+            state = self._state(host)
+            state.responses += responses
+            state.throttled += throttled
+            state.failures += failed
+            previous = state.rate
+            if failed or (responses and throttled / responses > self.throttle_threshold):
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                logger.warning(f"Throttling {host}: {previous:.1f} -> {state.rate:.1f} req/s "
+                               f"({throttled}/{responses} throttled responses, failed={failed})")
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase)
+            self._cond.notify_all()
+
+    def rate(self, host: str) -> float:
+        with self._cond:
+            return self._state(host).rate
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {
+                host: {"rate": round(s.rate, 2), "active": s.active, "responses": s.responses,
+                       "throttled": s.throttled, "failures": s.failures}
+                for host, s in self._hosts.items()
+            }
+
+def tool_arguments(tool: str, parameters: Dict[str, Any], lease: Lease) -> Dict[str, Any]:
+    """
+    Parameters with the tool's thread and pacing arguments set from a lease
+
+    ffuf gets -t and -rate; gobuster has no rate flag, so its -t threads are
+    paced with --delay (per-thread pause between requests). A lower thread
+    count requested by the caller is kept. The status code matcher is
+    widened to 429/503 so throttling shows up in the results; see
+    unrequested_statuses().
+    """
+    if tool not in TOOL_THREADS:
+        return parameters
+    threads = min(int(parameters.get("threads") or TOOL_THREADS[tool]), lease.threads)
+    key, default = TOOL_MATCHERS[tool]
+    codes = parameters.get(key) or default
+    if codes != "all":
+        codes = ",".join([codes] + [str(status) for status in sorted(unrequested_statuses(tool, parameters))])
+    if tool == "ffuf":
+        return {**parameters, "threads": threads, "rate": max(1, int(lease.rate)), key: codes}
+    return {**parameters, "threads": threads, "delay": f"{max(1, int(threads / lease.rate * 1000))}ms", key: codes}
+
+def without_statuses(tool: str, result: Dict[str, Any], statuses: Set[int]) -> Dict[str, Any]:
+    """A gobuster/ffuf result without the records of the given status codes"""
+    if not statuses:
+        return result
+    if tool == "ffuf":
+        records = (result.get("results") or {}).get("results") or []
+        return {**result, "results": {**(result.get("results") or {}),
+                                      "results": [r for r in records if r.get("status") not in statuses]}}
+    if tool == "gobuster":
+        parsed = result.get("parsed_results") or {}
+        items = [i for i in parsed.get("discovered_items", []) if i.get("status_code") not in statuses]
+        codes = {code: count for code, count in parsed.get("summary", {}).get("response_codes", {}).items()
+                 if code not in statuses}
+        markers = tuple(f"Status: {status})" for status in statuses)
+        raw = "\n".join(line for line in result.get("raw_output", "").splitlines()
+                        if not any(marker in line for marker in markers))
+        return {**result, "raw_output": raw, "parsed_results": {
+            **parsed, "discovered_items": items,
+            "summary": {"total_discoveries": len(items), "response_codes": codes}
+        }}
+    return result
+
+def unrequested_statuses(tool: str, parameters: Dict[str, Any]) -> Set[int]:
+    """Throttling statuses tool_arguments() adds to the matcher; their results are not findings"""
+    if tool not in TOOL_MATCHERS:
+        return set()
+    key, default = TOOL_MATCHERS[tool]
+    codes = str(parameters.get(key) or default)
+    if codes == "all":
+        return set()
+    return {status for status in THROTTLE_STATUSES if not _matches(codes, status)}
+
+def _matches(codes: str, status: int) -> bool:
+    """Whether a matcher of comma-separated codes and a-b ranges covers a status"""
+    for part in codes.split(","):
+        low, _, high = part.strip().partition("-")
+        if low.isdigit() and int(low) <= status <= int(high if high.isdigit() else low):
+            return True
+    return False
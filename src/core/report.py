@@ -0,0 +1,302 @@
+import csv
+import json
+from functools import lru_cache
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, IO, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlsplit
+from loguru import logger
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Ports assumed to speak TLS when nothing else tells the scheme
+HTTPS_PORTS = {443, 8443}
+
+class Finding(NamedTuple):
+    """One open port or discovered path, the unit every report format is built from"""
+    kind: str
+    tool: str
+    host: Optional[str]
+    port: Optional[int]
+    protocol: Optional[str] = None
+    path: Optional[str] = None
+    status: Optional[int] = None
+    service: Optional[str] = None
+    detail: Optional[str] = None
+    size: Optional[int] = None
+    # URL scheme of path findings
+    scheme: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], Optional[int], Optional[str]]:
+        """Grouping key: the same host/port/path reported twice is one finding"""
+        return (self.kind, self.host, self.port, self.path)
+
+def describe(finding: Finding) -> str:
+    """Human-readable sentence for a finding"""
+    if finding.kind == "open_port":
+        port = f"{finding.port}/{finding.protocol}" if finding.protocol else str(finding.port)
+        service = " ".join(part for part in (finding.service, finding.detail) if part)
+        return f"Port {port} is open on {finding.host}" + (f" ({service})" if service else "")
+    location = f"{finding.host}:{finding.port}" if finding.port else str(finding.host)
+    status = f" (status {finding.status})" if finding.status is not None else ""
+    return f"Path {finding.path} found on {location}{status}"
+
+def web_scheme(port: Optional[int], service: Optional[str] = None) -> str:
+    """http or https for a web port, from the nmap service name when there is one"""
+    service = (service or "").lower()
+    return "https" if port in HTTPS_PORTS or "https" in service or "ssl" in service else "http"
+
+def netloc(host: Optional[str], port: Optional[int] = None) -> str:
+    """host[:port] for a URI, with IPv6 literals in brackets"""
+    host = str(host)
+    if ":" in host and not host.startswith("["):
+        host = f"[{host}]"
+    return host if port is None else f"{host}:{port}"
+
+# Compact encoder shared by the writers; json.dumps would rebuild one per call
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+@lru_cache(maxsize=4096)
+def _origin(origin: str) -> Tuple[Optional[str], Optional[int]]:
+    parts = urlsplit(origin)
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    return parts.hostname, port or DEFAULT_PORTS.get(parts.scheme)
+
+def url_parts(url: str) -> Tuple[Optional[str], Optional[int], str]:
+    """(host, port, path) of a URL; the scheme://netloc part is parsed once per origin"""
+    if "://" not in url:
+        url = f"http://{url}"
+    slash = url.find("/", url.index("://") + 3)
+    if slash == -1:
+        origin, path = url, "/"
+    else:
+        origin, path = url[:slash], url[slash:]
+    path = path.split("?", 1)[0].split("#", 1)[0] or "/"
+    host, port = _origin(origin)
+    return host, port, path
+
+def _url_scheme(url: str) -> str:
+    return url[:url.index("://")].lower() if "://" in url else "http"
+
+def _join_path(base: str, path: str) -> str:
+    if not path.startswith("/"):
+        path = "/" + path
+    return base.rstrip("/") + path if base not in ("", "/") else path
+
+def iter_findings(tool: str, target: Optional[str], result: Dict[str, Any]) -> Iterator[Finding]:
+    """Yield typed findings from one tool result without materializing a list"""
+    if tool == "nmap":
+        for port in result.get("open_ports", []):
+            if isinstance(port, dict):
+                detail = " ".join(port[k] for k in ("product", "version") if port.get(k))
+                yield Finding("open_port", tool, port.get("host") or target, port.get("port"),
+                              protocol=port.get("protocol"), service=port.get("service"),
+                              detail=detail or None)
+            else:
+                yield Finding("open_port", tool, target, int(port))
+
+    elif tool == "gobuster":
+        host, port, base = url_parts(target or "")
+        scheme = _url_scheme(target or "")
+        items = (result.get("parsed_results") or {}).get("discovered_items", [])
+        for item in items:
+            yield Finding("path", tool, host, port, protocol="tcp",
+                          path=_join_path(base, item["path"]), status=item.get("status_code"),
+                          detail=item.get("redirect"), size=item.get("size"), scheme=scheme)
+
+    elif tool == "ffuf":
+        records = (result.get("results") or {}).get("results") or result.get("discovered_paths") or []
+        for record in records:
+            url = record.get("url") or ""
+            host, port, path = url_parts(url)
+            yield Finding("path", tool, host, port, protocol="tcp", path=path,
+                          status=record.get("status"),
+                          detail=(record.get("redirectlocation") or record.get("redirect")
+                                  or record.get("content-type", record.get("content_type"))),
+                          size=record.get("length"), scheme=_url_scheme(url))
+
+def _compact(finding: Finding) -> str:
+    """JSON object of the finding's non-null fields"""
+    return _encode({k: v for k, v in zip(Finding._fields, finding) if v is not None})
+
+class NdjsonWriter:
+    """One JSON object per finding, null fields omitted"""
+
+    suffix = "ndjson"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file: IO[str] = open(self.path, "w", encoding="utf-8", buffering=1 << 20)
+
+    def write(self, finding: Finding):
+        self._file.write(_compact(finding) + "\n")
+
+    def close(self):
+        self._file.close()
+
+class CsvWriter:
+    """One row per finding with a header of the Finding fields"""
+
+    suffix = "csv"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file: IO[str] = open(self.path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(Finding._fields)
+
+    def write(self, finding: Finding):
+        self._writer.writerow(finding)
+
+    def close(self):
+        self._file.close()
+
+_SARIF_RULES = [
+    {"id": "open_port", "shortDescription": {"text": "Open network port"}},
+    {"id": "path", "shortDescription": {"text": "Discovered web path"}}
+]
+
+class SarifWriter:
+    """
+    SARIF 2.1.0 log written incrementally
+
+    The document prefix is written up front and each finding is appended
+    to the results array, so nothing is buffered until close().
+    """
+
+    suffix = "sarif"
+
+    def __init__(self, path: str, tool_name: str = "security-agent"):
+        self.path = Path(path)
+        self._file: IO[str] = open(self.path, "w", encoding="utf-8", buffering=1 << 20)
+        head = json.dumps({
+            "version": "2.1.0",
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "runs": [{"tool": {"driver": {"name": tool_name, "rules": _SARIF_RULES}}, "results": []}]
+        })
+        # Split the document at the empty results array and stream into it
+        self._tail = "]}]}"
+        self._file.write(head[:-len(self._tail)])
+        self._first = True
+
+    def write(self, finding: Finding):
+        if finding.kind == "open_port":
+            uri = f"{finding.protocol or 'tcp'}://{netloc(finding.host, finding.port)}"
+        else:
+            scheme = finding.scheme or web_scheme(finding.port, finding.service)
+            uri = f"{scheme}://{netloc(finding.host, finding.port)}{finding.path}"
+        # Static parts are spliced in as text instead of encoding a nested dict per result
+        self._file.write(
+            ('{"ruleId":"' if self._first else ',{"ruleId":"') + finding.kind
+            + '","level":"note","message":{"text":' + _encode(describe(finding))
+            + '},"locations":[{"physicalLocation":{"artifactLocation":{"uri":' + _encode(uri)
+            + '}}}],"properties":' + _compact(finding) + "}"
+        )
+        self._first = False
+
+    def close(self):
+        self._file.write(self._tail)
+        self._file.close()
+
+WRITERS = {writer.suffix: writer for writer in (NdjsonWriter, SarifWriter, CsvWriter)}
+
+def open_writers(directory: str, name: str, formats: Iterable[str] = ("ndjson", "sarif", "csv")) -> List[Any]:
+    """Open one writer per format as <directory>/<name>.<format>"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    return [WRITERS[fmt](str(Path(directory) / f"{name}.{fmt}")) for fmt in formats]
+
+class ReportBuilder:
+    """
+    Aggregates findings as they arrive and streams them to report writers
+
+    Only counters, the first `keep` findings and the grouping keys of the
+    `dedup_hosts` most recently reported hosts are held in memory; every
+    unique finding is passed straight to the writers. Add results grouped
+    by host so a host's repeated findings fall within the window.
+
+    Args:
+        writers: Writers receiving each unique finding (see open_writers)
+        keep: Number of findings retained for an inline preview
+        dedup_hosts: Hosts whose findings are remembered for deduplication
+    """
+
+    def __init__(self, writers: Optional[Iterable[Any]] = None, keep: int = 0, dedup_hosts: int = 16):
+        self.writers = list(writers or [])
+        self.keep = keep
+        self.kept: List[Finding] = []
+        self.total = 0
+        self.duplicates = 0
+        self.by_kind: Dict[str, int] = {}
+        self.by_tool: Dict[str, int] = {}
+        self.by_status: Dict[str, int] = {}
+        self.hosts: Dict[str, Dict[str, int]] = {}
+        self.dedup_hosts = dedup_hosts
+        self._seen: "OrderedDict[Optional[str], Set[Tuple]]" = OrderedDict()
+
+    def add(self, finding: Finding) -> bool:
+        """Record a finding; returns False when its host/port/path was already reported"""
+        seen = self._seen.get(finding.host)
+        if seen is None:
+            seen = self._seen[finding.host] = set()
+            if len(self._seen) > self.dedup_hosts:
+                self._seen.popitem(last=False)
+        else:
+            self._seen.move_to_end(finding.host)
+        key = finding.key
+        if key in seen:
+            self.duplicates += 1
+            return False
+        seen.add(key)
+
+        self.total += 1
+        self.by_kind[finding.kind] = self.by_kind.get(finding.kind, 0) + 1
+        self.by_tool[finding.tool] = self.by_tool.get(finding.tool, 0) + 1
+        if finding.status is not None:
+            status = str(finding.status)
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+        host = self.hosts.get(finding.host)
+        if host is None:
+            host = self.hosts[finding.host] = {"open_ports": 0, "paths": 0}
+        host["open_ports" if finding.kind == "open_port" else "paths"] += 1
+
+        if len(self.kept) < self.keep:
+            self.kept.append(finding)
+        for writer in self.writers:
+            writer.write(finding)
+        return True
+
+    def add_result(self, tool: str, target: Optional[str], result: Dict[str, Any]) -> int:
+        """Add every finding of one tool result; returns how many were new"""
+        added = 0
+        try:
+            for finding in iter_findings(tool, target, result):
+                added += self.add(finding)
+        except Exception as e:
+            logger.error(f"Error parsing {tool} findings for {target}: {str(e)}")
+        return added
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_findings": self.total,
+            "duplicates": self.duplicates,
+            "by_kind": dict(self.by_kind),
+            "by_tool": dict(self.by_tool),
+            "by_status": dict(self.by_status),
+            "hosts": {str(host): dict(counts) for host, counts in self.hosts.items()}
+        }
+
+    def files(self) -> Dict[str, str]:
+        return {writer.suffix: str(writer.path) for writer in self.writers}
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def __enter__(self) -> "ReportBuilder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
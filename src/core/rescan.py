@@ -0,0 +1,197 @@
+import ipaddress
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from src.core.report import Finding, iter_findings, url_parts
+from src.core.task_manager import Task, TaskStatus
+
+# Results older than this are scanned again even when nothing looks changed
+DEFAULT_MAX_AGE = 24 * 60 * 60
+WEB_TOOLS = ("gobuster", "ffuf")
+# Banner fields the change-detection pass compares; --version-light often misses versions
+BANNER_FIELDS = ("service", "product")
+# Fields that make the same host/port/path a changed item in the diff report
+DIFF_FIELDS = ("status", "service", "detail")
+
+PortKey = Tuple[str, int, str]
+
+def observed_at(task: Task) -> datetime:
+    """When a task's result was actually observed; carried-forward results keep their original time"""
+    stamp = (task.result or {}).get("observed_at")
+    return datetime.fromisoformat(stamp) if stamp else task.updated_at
+
+def port_key(record: Dict[str, Any]) -> PortKey:
+    return (record["host"], int(record["port"]), record.get("protocol") or "tcp")
+
+def port_spec(keys: Iterable[PortKey]) -> str:
+    """nmap -p value for a set of ports of one host"""
+    return ",".join(
+        f"U:{port}" if protocol == "udp" else str(port)
+        for _, port, protocol in sorted(keys, key=lambda k: (k[2], k[1]))
+    )
+
+def is_address(target: str) -> bool:
+    """Whether an nmap target is an address or CIDR rather than a host name"""
+    try:
+        ipaddress.ip_network(target, strict=False)
+        return True
+    except ValueError:
+        return False
+
+def covers(target: str, host: str, aliases: Dict[str, str], names: Optional[Dict[str, str]] = None) -> bool:
+    """Whether an nmap target (host name, address or CIDR) includes a scanned address"""
+    if target == host or aliases.get(target.lower()) == host or (names or {}).get(host) == target:
+        return True
+    try:
+        return ipaddress.ip_address(host) in ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return False
+
+class Baseline:
+    """
+    Structured results of a previous scan, indexed for change detection
+
+    Open ports are keyed by (address, port, protocol). `names` maps the
+    addresses of hosts that were scanned by name back to that name, so
+    follow-up scans keep targeting what the scope allows. `sweeps` are the
+    nmap invocations (target and port specification) the change-detection
+    pass repeats; for a scan that was itself a rescan these are its own
+    sweeps, so new ports keep being looked for across the original port range.
+
+    Args:
+        tasks: Tasks of the previous scan; only completed ones with results are used
+        max_age: Seconds after which a result is stale and is scanned again
+        now: Reference time for expiry (defaults to now)
+    """
+
+    def __init__(self, tasks: Iterable[Task], max_age: float = DEFAULT_MAX_AGE, now: Optional[datetime] = None):
+        self.cutoff = (now or datetime.now()) - timedelta(seconds=max_age)
+        self.ports: Dict[PortKey, Dict[str, Any]] = {}
+        self.observed: Dict[PortKey, datetime] = {}
+        self.aliases: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        self.web: List[Task] = []
+        self.findings: List[Finding] = []
+        sweeps: List[Dict[str, Any]] = []
+        scans: List[Dict[str, Any]] = []
+
+        for task in tasks:
+            if task.status != TaskStatus.COMPLETED or not task.result:
+                continue
+            result = task.result
+            if task.tool == "nmap":
+                invocation = {"target": task.parameters["target"], "ports": task.parameters.get("ports")}
+                if task.parameters.get("version_light"):
+                    sweeps.append(invocation)
+                elif "carried_from" not in result:
+                    scans.append(invocation)
+                self._index_hosts(task, result)
+            elif task.tool in WEB_TOOLS:
+                self.web.append(task)
+            if not task.parameters.get("version_light"):
+                self.findings.extend(iter_findings(task.tool, task.parameters.get("target"), result))
+
+        self.sweeps = [dict(s) for s in {tuple(s.items()): s for s in (sweeps or scans)}.values()]
+
+    def _index_hosts(self, task: Task, result: Dict[str, Any]):
+        target = task.parameters["target"]
+        by_name = not is_address(target)
+        for host in result.get("hosts", []):
+            address = host.get("address")
+            if not address:
+                continue
+            for name in host.get("hostnames", []):
+                if name:
+                    self.aliases[name.lower()] = address
+            if by_name:
+                self.names.setdefault(address, target)
+                self.aliases.setdefault(target.lower(), address)
+        if task.parameters.get("version_light"):
+            return
+        seen = observed_at(task)
+        for record in result.get("open_ports", []):
+            if not isinstance(record, dict):
+                continue
+            record = {**record, "host": record.get("host") or target}
+            key = port_key(record)
+            self.ports[key] = record
+            self.observed[key] = seen
+            if by_name and key[0] != target:
+                self.names.setdefault(key[0], target)
+                self.aliases.setdefault(target.lower(), key[0])
+
+    def target_for(self, address: str) -> str:
+        """What to scan to reach an address: the name it was scanned by, else the address"""
+        return self.names.get(address, address)
+
+    def expired(self, key: PortKey) -> bool:
+        return self.observed[key] < self.cutoff
+
+    def web_key(self, task: Task) -> PortKey:
+        """Port a web task ran against, by address when nmap resolved its host name"""
+        host, port, _ = url_parts(task.parameters["target"])
+        return (self.aliases.get(host, host), port, "tcp")
+
+class Changes(NamedTuple):
+    """Outcome of the change-detection pass, as sets of port keys"""
+    new: Set[PortKey]
+    closed: Set[PortKey]
+    changed: Set[PortKey]
+    unchanged: Set[PortKey]
+    # Ports whose sweep failed; their state is unknown, so they are scanned in full
+    unverified: Set[PortKey]
+
+def detect_changes(baseline: Baseline,
+                   current: Iterable[Dict[str, Any]],
+                   failed_sweeps: Iterable[str] = ()) -> Changes:
+    """
+    Compare the open ports of the change-detection sweeps with the baseline
+
+    A port is changed when a banner field the sweep reported differs from
+    the baseline; fields the light probes did not get are not compared.
+    """
+    now = {port_key(record): record for record in current}
+    failed = list(failed_sweeps)
+    unverified = {
+        key for key in baseline.ports
+        if key not in now and any(covers(target, key[0], baseline.aliases, baseline.names) for target in failed)
+    }
+    changed, unchanged = set(), set()
+    for key in baseline.ports.keys() & now.keys():
+        before, after = baseline.ports[key], now[key]
+        if any(after.get(f) and after.get(f) != before.get(f) for f in BANNER_FIELDS):
+            changed.add(key)
+        else:
+            unchanged.add(key)
+    return Changes(
+        new=now.keys() - baseline.ports.keys(),
+        closed=baseline.ports.keys() - now.keys() - unverified,
+        changed=changed,
+        unchanged=unchanged,
+        unverified=unverified
+    )
+
+def diff_findings(before: Iterable[Finding], after: Iterable[Finding]) -> Dict[str, Any]:
+    """New, closed and changed findings between two scans, matched by Finding.key"""
+    old = {finding.key: finding for finding in before}
+    new = {finding.key: finding for finding in after}
+    changed = []
+    for key in old.keys() & new.keys():
+        fields = [f for f in DIFF_FIELDS if getattr(old[key], f) != getattr(new[key], f)]
+        if fields:
+            changed.append({"before": old[key]._asdict(), "after": new[key]._asdict(), "fields": fields})
+
+    def ordered(findings: Iterable[Finding]) -> List[Dict[str, Any]]:
+        return [f._asdict() for f in sorted(findings, key=lambda f: tuple(str(part) for part in f.key))]
+
+    changed.sort(key=lambda item: tuple(str(item["after"][k]) for k in ("kind", "host", "port", "path")))
+    return {
+        "new": ordered(new[k] for k in new.keys() - old.keys()),
+        "closed": ordered(old[k] for k in old.keys() - new.keys()),
+        "changed": changed,
+        "summary": {
+            "new": len(new.keys() - old.keys()),
+            "closed": len(old.keys() - new.keys()),
+            "changed": len(changed),
+            "unchanged": len(old.keys() & new.keys()) - len(changed)
+        }
+    }
@@ -0,0 +1,222 @@
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+from pydantic import BaseModel
+from src.core.report import DEFAULT_PORTS, Finding, iter_findings, netloc, web_scheme
+
+WEB_PORTS = [80, 443, 8000, 8008, 8080, 8443, 8888]
+WEB_SERVICES = ["http", "https", "http-alt", "http-proxy", "ssl/http", "ssl/https"]
+REDIRECT_STATUSES = [301, 302, 307, 308]
+# Responses that say a path does not exist; settled only when asked for
+MISSING_STATUSES = [400, 404]
+
+class RuleAction(BaseModel):
+    """
+    Follow-up task produced by a rule
+
+    `target`, `description` and string parameters are str.format templates
+    over: host, port, scheme, base (scheme://host[:port]), path, dir (path
+    without its trailing slash), status, service and detail.
+    """
+    tool: str
+    target: str
+    parameters: Dict[str, Any] = {}
+    description: Optional[str] = None
+
+class Rule(BaseModel):
+    """
+    Matches findings of one kind and turns them into follow-up tasks
+
+    Empty condition lists match anything. Findings matched by a rule
+    without actions still go to the LLM, unless the rule `settles` them as
+    not worth a follow-up.
+    """
+    name: str
+    kind: str = "open_port"
+    tool: Optional[str] = None
+    ports: List[int] = []
+    services: List[str] = []
+    statuses: List[int] = []
+    detail_pattern: Optional[str] = None
+    max_depth: Optional[int] = None
+    # Only redirects to an absolute URL on another host
+    off_host: bool = False
+    actions: List[RuleAction] = []
+    settles: bool = False
+
+    def matches(self, finding: Finding) -> bool:
+        if finding.kind != self.kind or (self.tool and finding.tool != self.tool):
+            return False
+        if self.ports and finding.port not in self.ports:
+            return False
+        if self.services and (finding.service or "").lower() not in self.services:
+            return False
+        if self.statuses and finding.status not in self.statuses:
+            return False
+        if self.detail_pattern and not re.search(self.detail_pattern, finding.detail or ""):
+            return False
+        if self.max_depth is not None and _depth(finding.path) > self.max_depth:
+            return False
+        if self.off_host and not _off_host(finding):
+            return False
+        return True
+
+def _depth(path: Optional[str]) -> int:
+    return len([part for part in (path or "").split("/") if part])
+
+def _off_host(finding: Finding) -> bool:
+    location = finding.detail or ""
+    if "://" not in location:
+        return False
+    return (urlsplit(location).hostname or "") != (finding.host or "").lower()
+
+def default_rules(wordlist: Optional[str] = None, settle_uninteresting: bool = False) -> List[Rule]:
+    """
+    The built-in rules: web ports get gobuster and ffuf and redirects to a
+    directory get fuzzed inside it; everything else is left to the LLM
+
+    Args:
+        wordlist: Wordlist passed to generated gobuster/ffuf tasks (tool default when omitted)
+        settle_uninteresting: Also settle missing paths (400/404) and
+            redirects to other hosts, so they never reach the LLM
+    """
+    parameters = {"wordlist": wordlist} if wordlist else {}
+    web_actions = [
+        RuleAction(tool="gobuster", target="{base}/", parameters=parameters,
+                   description="Directory enumeration on {base}/"),
+        RuleAction(tool="ffuf", target="{base}/FUZZ", parameters=parameters,
+                   description="Content fuzzing on {base}/")
+    ]
+    rules = [
+        Rule(name="web-port", ports=WEB_PORTS, actions=web_actions),
+        Rule(name="web-service", services=WEB_SERVICES, actions=web_actions),
+        Rule(name="redirect-to-directory", kind="path", statuses=REDIRECT_STATUSES,
+             detail_pattern=r"/$", max_depth=3,
+             actions=[RuleAction(tool="ffuf", target="{base}{dir}/FUZZ", parameters=parameters,
+                                 description="Content fuzzing inside {base}{dir}/")])
+    ]
+    if settle_uninteresting:
+        rules += [
+            Rule(name="missing-path", kind="path", statuses=MISSING_STATUSES, settles=True),
+            Rule(name="off-host-redirect", kind="path", statuses=REDIRECT_STATUSES, off_host=True, settles=True)
+        ]
+    return rules
+
+class RuleOutcome(NamedTuple):
+    """What the rules made of one tool result"""
+    tasks: List[Dict[str, Any]]
+    findings: int
+    unmatched: int
+    matches: Dict[str, int]
+
+    @property
+    def handled(self) -> bool:
+        """True when the result has findings and all of them matched, so it needs no LLM analysis"""
+        return self.findings > 0 and self.unmatched == 0
+
+class RuleEngine:
+    """
+    Deterministic follow-up planning for structured tool results
+
+    Rules are indexed by (tool, kind) and then by port, service and status
+    code, so each finding is checked only against rules that can match it.
+    The first matching rule in list order wins.
+
+    Args:
+        rules: Rules in priority order (defaults to default_rules())
+    """
+
+    def __init__(self, rules: Optional[Iterable[Rule]] = None):
+        self.rules = list(rules) if rules is not None else default_rules()
+        self._index: Dict[Tuple[Optional[str], str], Dict[str, Dict[Any, List[int]]]] = \
+            defaultdict(lambda: {"port": defaultdict(list), "service": defaultdict(list),
+                                 "status": defaultdict(list), "any": defaultdict(list)})
+        for position, rule in enumerate(self.rules):
+            index = self._index[(rule.tool, rule.kind)]
+            # One field is enough to find a rule; matches() checks the rest
+            if rule.ports:
+                for port in rule.ports:
+                    index["port"][port].append(position)
+            elif rule.services:
+                for service in rule.services:
+                    index["service"][service].append(position)
+            elif rule.statuses:
+                for status in rule.statuses:
+                    index["status"][status].append(position)
+            else:
+                index["any"][None].append(position)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleEngine":
+        """Load rules from a JSON file holding a list of rule objects"""
+        return cls(Rule(**rule) for rule in json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def match(self, finding: Finding) -> Optional[Rule]:
+        """First rule matching the finding, if any"""
+        candidates = set()
+        for key in ((finding.tool, finding.kind), (None, finding.kind)):
+            index = self._index.get(key)
+            if index is None:
+                continue
+            candidates.update(index["port"].get(finding.port, ()))
+            candidates.update(index["service"].get((finding.service or "").lower(), ()))
+            candidates.update(index["status"].get(finding.status, ()))
+            candidates.update(index["any"].get(None, ()))
+        for position in sorted(candidates):
+            if self.rules[position].matches(finding):
+                return self.rules[position]
+        return None
+
+    def evaluate(self, tool: str, target: Optional[str], result: Dict[str, Any]) -> RuleOutcome:
+        """Follow-up tasks (in add_task() form) for one tool result"""
+        tasks: List[Dict[str, Any]] = []
+        matches: Dict[str, int] = defaultdict(int)
+        findings = unmatched = 0
+        for finding in iter_findings(tool, target, result):
+            findings += 1
+            rule = self.match(finding)
+            if rule is None:
+                unmatched += 1
+                continue
+            matches[rule.name] += 1
+            if rule.actions:
+                variables = _variables(finding)
+                tasks.extend(_task(action, variables) for action in rule.actions)
+            elif not rule.settles:
+                # Recognised but nothing planned for it: the LLM still gets to look
+                unmatched += 1
+        return RuleOutcome(tasks, findings, unmatched, dict(matches))
+
+def _variables(finding: Finding) -> Dict[str, Any]:
+    scheme = finding.scheme or web_scheme(finding.port, finding.service)
+    port = finding.port
+    address = netloc(finding.host, None if port == DEFAULT_PORTS.get(scheme) else port)
+    path = finding.path or "/"
+    return {
+        "host": finding.host,
+        "port": port,
+        "scheme": scheme,
+        "base": f"{scheme}://{address}",
+        "path": path,
+        "dir": path.rstrip("/"),
+        "status": finding.status,
+        "service": finding.service,
+        "detail": finding.detail
+    }
+
+def _task(action: RuleAction, variables: Dict[str, Any]) -> Dict[str, Any]:
+    target = action.target.format(**variables)
+    parameters = {
+        key: value.format(**variables) if isinstance(value, str) else value
+        for key, value in action.parameters.items()
+    }
+    parameters["target"] = target
+    return {
+        "tool": action.tool,
+        "parameters": parameters,
+        "description": (action.description or "{tool} on {target}").format(
+            **variables, tool=action.tool, target=target)
+    }
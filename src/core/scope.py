@@ -1,26 +1,151 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_right
+from urllib.parse import urlsplit
 import ipaddress
 from loguru import logger
 
+# Trie node markers; labels never contain a NUL byte so these cannot collide
+_DOMAIN = "\0domain"      # node and every name below it are in scope
+_WILDCARD = "\0wildcard"  # only names strictly below the node are in scope
+
+class _IntervalIndex:
+    """Sorted, merged integer intervals for one IP version"""
+
+    def __init__(self, networks: Iterable[ipaddress._BaseNetwork]):
+        intervals = sorted(
+            (int(net.network_address), int(net.broadcast_address))
+            for net in networks
+        )
+        merged: List[List[int]] = []
+        for start, end in intervals:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def contains(self, start: int, end: int) -> bool:
+        """Check that [start, end] lies entirely inside one interval"""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and end <= self.ends[i]
+
 class ScopeDefinition(BaseModel):
     domains: List[str]
     ip_ranges: List[str]
     wildcards: List[str]
 
-    def is_in_scope(self, target: str) -> bool:
-        """Check if a target is within the defined scope"""
+    _ip_index: Dict[int, _IntervalIndex] = PrivateAttr(default_factory=dict)
+    _domain_trie: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._compile()
+
+    def _compile(self):
+        """Build the IP interval index and the reversed-label domain trie"""
+        networks: Dict[int, List[ipaddress._BaseNetwork]] = {4: [], 6: []}
+        for entry in self.ip_ranges:
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                logger.warning(f"Ignoring invalid IP range in scope: {entry}")
+                continue
+            networks[network.version].append(network)
+        self._ip_index = {
+            version: _IntervalIndex(nets) for version, nets in networks.items()
+        }
+
+        self._domain_trie = {}
+        for entry in self.domains:
+            self._add_domain(entry, _DOMAIN)
+        for entry in self.wildcards:
+            entry = entry.strip()
+            if entry.startswith("*."):
+                self._add_domain(entry[2:], _WILDCARD)
+            else:
+                self._add_domain(entry, _DOMAIN)
+
+    def _add_domain(self, domain: str, marker: str):
+        labels = self._labels(domain)
+        if not labels:
+            return
+        node = self._domain_trie
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[marker] = True
+
+    @staticmethod
+    def _labels(name: str) -> List[str]:
+        name = name.strip().lower().rstrip(".")
+        return name.split(".") if name else []
+
+    def _ip_in_scope(self, start: ipaddress._BaseAddress, end: ipaddress._BaseAddress) -> bool:
+        index = self._ip_index.get(start.version)
+        return bool(index) and index.contains(int(start), int(end))
+
+    def _domain_in_scope(self, host: str) -> bool:
+        labels = self._labels(host)
+        node = self._domain_trie
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _DOMAIN in node:
+                return True
+            if _WILDCARD in node and depth < len(labels):
+                return True
+        return False
+
+    @staticmethod
+    def _parse_target(target: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Split a target into (ip address or network, hostname)"""
+        target = target.strip()
+        try:
+            return ipaddress.ip_address(target), None
+        except ValueError:
+            pass
+        if "/" in target and "://" not in target:
+            try:
+                return ipaddress.ip_network(target, strict=False), None
+            except ValueError:
+                pass
+
+        # URLs and host:port forms
         try:
-            # Check if target is an IP
-            ip = ipaddress.ip_address(target)
-            return any(
-                ip in ipaddress.ip_network(range)
-                for range in self.ip_ranges
-            )
+            host = urlsplit(target if "://" in target else f"//{target}").hostname
         except ValueError:
-            # Check if target is a domain
-            return any(
-                target.endswith(domain) for domain in self.domains
-            ) or any(
-                target.endswith(wild.lstrip('*.')) for wild in self.wildcards
-            )
\ No newline at end of file
+            return None, None
+        if not host:
+            return None, None
+        try:
+            return ipaddress.ip_address(host), None
+        except ValueError:
+            return None, host
+
+    def is_in_scope(self, target: str) -> bool:
+        """Check if a target (IP, CIDR, hostname or URL) is within the defined scope"""
+        if not target:
+            return False
+        address, host = self._parse_target(target)
+        if isinstance(address, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            return self._ip_in_scope(address.network_address, address.broadcast_address)
+        if address is not None:
+            return self._ip_in_scope(address, address)
+        if host is not None:
+            return self._domain_in_scope(host)
+        return False
+
+    def is_in_scope_many(self, targets: Iterable[str]) -> List[bool]:
+        """Check many targets at once, evaluating each distinct target only once"""
+        seen: Dict[str, bool] = {}
+        verdicts = []
+        for target in targets:
+            if target not in seen:
+                seen[target] = self.is_in_scope(target)
+            verdicts.append(seen[target])
+        return verdicts
@@ -0,0 +1,250 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from src.core.task_manager import Task, TaskStatus
+
+DEFAULT_STORE_PATH = ".cache/scans.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    instruction TEXT,
+    scope TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    scan_id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    fingerprint TEXT,
+    status TEXT NOT NULL,
+    retries INTEGER NOT NULL,
+    max_retries INTEGER NOT NULL,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_scan ON tasks (scan_id, status);
+CREATE TABLE IF NOT EXISTS transitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    scan_id TEXT PRIMARY KEY,
+    checkpoint TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+_INSERT_TASK = (
+    "INSERT OR REPLACE INTO tasks (task_id, scan_id, description, tool, parameters, priority, "
+    "fingerprint, status, retries, max_retries, result, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_UPDATE_STATUS = (
+    "UPDATE tasks SET status = ?, retries = ?, updated_at = ?, result = COALESCE(?, result) "
+    "WHERE task_id = ?"
+)
+_INSERT_TRANSITION = "INSERT INTO transitions (scan_id, task_id, status, at) VALUES (?, ?, ?, ?)"
+
+class ScanStore:
+    """
+    Durable record of scans, tasks, status transitions and results
+
+    Writes are queued and applied by a background thread in batched
+    transactions, so recording never blocks task execution. Reads use their
+    own connection; WAL mode lets them run alongside the writer.
+
+    Args:
+        path: SQLite database file
+        batch_size: Maximum operations applied per transaction
+        flush_interval: Seconds the writer waits for more work before committing
+    """
+
+    def __init__(self,
+                 path: str = DEFAULT_STORE_PATH,
+                 batch_size: int = 500,
+                 flush_interval: float = 0.2):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Tuple[str, tuple]]]" = queue.Queue()
+        self._read_lock = threading.Lock()
+
+        conn = self._open()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        self._reader = conn
+
+        self._writer = threading.Thread(target=self._write_loop, name="scan-store", daemon=True)
+        self._writer.start()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_loop(self):
+        conn = self._open()
+        running = True
+        while running:
+            op = self._queue.get()
+            batch = []
+            while op is not None:
+                batch.append(op)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    op = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+            else:
+                running = False
+
+            try:
+                if batch:
+                    self._apply(conn, batch)
+            finally:
+                for _ in range(len(batch) + (0 if running else 1)):
+                    self._queue.task_done()
+        conn.close()
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, batch: List[Tuple[str, tuple]]):
+        # Any failure only loses this batch; the writer keeps serving flush()
+        try:
+            with conn:
+                for sql, params in batch:
+                    conn.execute(sql, params)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} scan store writes: {str(e)}")
+
+    @staticmethod
+    def _encode(params: tuple) -> tuple:
+        return tuple(
+            json.dumps(p, default=str) if isinstance(p, (dict, list)) else p
+            for p in params
+        )
+
+    def _submit(self, sql: str, params: tuple):
+        # Payloads are serialized by the caller: tasks and results keep being mutated after they are queued
+        self._queue.put((sql, self._encode(params)))
+
+    def create_scan(self, scan_id: str, instruction: Optional[str], scope: Dict[str, Any]):
+        now = time.time()
+        self._submit(
+            "INSERT OR REPLACE INTO scans (scan_id, instruction, scope, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (scan_id, instruction, scope, "running", now, now)
+        )
+
+    def set_scan_status(self, scan_id: str, status: str):
+        self._submit(
+            "UPDATE scans SET status = ?, updated_at = ? WHERE scan_id = ?",
+            (status, time.time(), scan_id)
+        )
+
+    def record_task(self, scan_id: str, task: Task):
+        self._submit(_INSERT_TASK, (
+            task.id, scan_id, task.description, task.tool, task.parameters, task.priority,
+            task.fingerprint, task.status.value, task.retries, task.max_retries, task.result,
+            task.created_at.isoformat(), task.updated_at.isoformat()
+        ))
+
+    def record_status(self, scan_id: str, task: Task, result: Optional[Dict] = None):
+        at = task.updated_at.isoformat()
+        self._submit(_UPDATE_STATUS, (task.status.value, task.retries, at, result, task.id))
+        self._submit(_INSERT_TRANSITION, (scan_id, task.id, task.status.value, at))
+
+    def save_checkpoint(self, scan_id: str, checkpoint: Dict[str, Any]):
+        """Replace the workflow checkpoint of a scan (queued behind its task writes)"""
+        self._submit(
+            "INSERT OR REPLACE INTO checkpoints (scan_id, checkpoint, updated_at) VALUES (?, ?, ?)",
+            (scan_id, json.dumps(checkpoint, default=str), time.time())
+        )
+
+    def load_checkpoint(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT checkpoint FROM checkpoints WHERE scan_id = ?", (scan_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._reader.close()
+
+    def load_scan(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT scan_id, instruction, scope, status, created_at, updated_at "
+                "FROM scans WHERE scan_id = ?", (scan_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "scan_id": row[0],
+            "instruction": row[1],
+            "scope": json.loads(row[2]) if row[2] else None,
+            "status": row[3],
+            "created_at": row[4],
+            "updated_at": row[5]
+        }
+
+    def list_scans(self) -> List[Dict[str, Any]]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT scan_id, instruction, status, updated_at FROM scans ORDER BY updated_at DESC"
+            ).fetchall()
+        return [
+            {"scan_id": r[0], "instruction": r[1], "status": r[2], "updated_at": r[3]}
+            for r in rows
+        ]
+
+    def load_tasks(self, scan_id: str) -> List[Task]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT task_id, description, tool, parameters, priority, fingerprint, status, "
+                "retries, max_retries, result, created_at, updated_at "
+                "FROM tasks WHERE scan_id = ? ORDER BY rowid", (scan_id,)
+            ).fetchall()
+        return [
+            Task(
+                id=r[0],
+                description=r[1],
+                tool=r[2],
+                parameters=json.loads(r[3]),
+                priority=r[4],
+                fingerprint=r[5],
+                status=TaskStatus(r[6]),
+                retries=r[7],
+                max_retries=r[8],
+                result=json.loads(r[9]) if r[9] else None,
+                created_at=datetime.fromisoformat(r[10]),
+                updated_at=datetime.fromisoformat(r[11])
+            )
+            for r in rows
+        ]
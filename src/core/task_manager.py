@@ -1,8 +1,15 @@
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from typing import Any, Iterable, List, Dict, Optional, Tuple
+from pydantic import BaseModel, Field
 from enum import Enum
+import heapq
+import itertools
 import uuid
+import threading
 from datetime import datetime
+from src.core.fingerprint import task_fingerprint
+
+# Stale heap entries tolerated before the pending heap is compacted
+HEAP_SLACK = 64
 
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -11,39 +18,168 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 class Task(BaseModel):
-    id: str = str(uuid.uuid4())
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     description: str
     tool: str
     parameters: Dict
     status: TaskStatus = TaskStatus.PENDING
+    priority: int = 0
+    fingerprint: Optional[str] = None
     retries: int = 0
     max_retries: int = 3
-    created_at: datetime = datetime.now()
-    updated_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
     result: Optional[Dict] = None
 
 class TaskManager:
-    def __init__(self):
-        self.tasks: List[Task] = []
+    """
+    Task registry indexed by id and status
+
+    Pending tasks are ordered by a heap on (priority, insertion order); higher
+    priorities come first. Heap entries are invalidated lazily, so status
+    changes never search the heap; once stale entries outnumber live ones the
+    heap is rebuilt. Tasks are fingerprinted on insertion and duplicates of an
+    already known invocation are dropped.
+
+    Args:
+        store: Optional ScanStore that receives every task and status change
+        scan_id: Scan the recorded tasks belong to
+    """
+
+    def __init__(self, store: Optional[Any] = None, scan_id: Optional[str] = None):
+        self.store = store
+        self.scan_id = scan_id
+        self._tasks: Dict[str, Task] = {}
+        self._by_status: Dict[TaskStatus, Dict[str, Task]] = {status: {} for status in TaskStatus}
+        self._pending_heap: List[Tuple[int, int, str]] = []
+        self._heap_seq: Dict[str, int] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
 
-    def add_task(self, description: str, tool: str, parameters: Dict) -> Task:
+    @property
+    def tasks(self) -> List[Task]:
+        """All tasks in insertion order"""
+        with self._lock:
+            return list(self._tasks.values())
+
+    def add_task(self,
+                 description: str,
+                 tool: str,
+                 parameters: Dict,
+                 priority: int = 0,
+                 allow_duplicate: bool = False) -> Optional[Task]:
+        """Add a task, or return None if the same invocation was already added"""
+        fingerprint = task_fingerprint(tool, parameters)
         task = Task(
             description=description,
             tool=tool,
-            parameters=parameters
+            parameters=parameters,
+            priority=priority,
+            fingerprint=fingerprint
         )
-        self.tasks.append(task)
+        with self._lock:
+            if fingerprint in self._by_fingerprint and not allow_duplicate:
+                return None
+            self._by_fingerprint.setdefault(fingerprint, task.id)
+            self._tasks[task.id] = task
+            self._by_status[task.status][task.id] = task
+            self._push_pending(task)
+            if self.store is not None:
+                self.store.record_task(self.scan_id, task)
         return task
 
+    def restore(self, tasks: Iterable[Task]) -> List[Task]:
+        """
+        Re-register previously persisted tasks, e.g. when resuming a scan
+
+        Tasks that were RUNNING when the scan stopped are reset to PENDING and
+        completed tasks are ordered by when they completed. Returns the tasks
+        that still need to run.
+        """
+        pending = []
+        with self._lock:
+            for task in tasks:
+                if task.status == TaskStatus.RUNNING:
+                    task.status = TaskStatus.PENDING
+                    task.updated_at = datetime.now()
+                    if self.store is not None:
+                        self.store.record_status(self.scan_id, task)
+                if task.fingerprint:
+                    self._by_fingerprint.setdefault(task.fingerprint, task.id)
+                self._tasks[task.id] = task
+                self._by_status[task.status][task.id] = task
+                if task.status == TaskStatus.PENDING:
+                    self._push_pending(task)
+                    pending.append(task)
+            # Completed tasks stay in completion order, which the workflow's analyzed watermark relies on
+            completed = self._by_status[TaskStatus.COMPLETED]
+            self._by_status[TaskStatus.COMPLETED] = dict(sorted(completed.items(), key=lambda item: item[1].updated_at))
+        return pending
+
+    def _push_pending(self, task: Task):
+        seq = next(self._seq)
+        self._heap_seq[task.id] = seq
+        heapq.heappush(self._pending_heap, (-task.priority, seq, task.id))
+
+    def _compact(self):
+        """Drop heap entries of tasks that left PENDING once they make up most of the heap"""
+        if len(self._pending_heap) <= 2 * len(self._heap_seq) + HEAP_SLACK:
+            return
+        self._pending_heap = [entry for entry in self._pending_heap
+                              if self._heap_seq.get(entry[2]) == entry[1]]
+        heapq.heapify(self._pending_heap)
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def find_by_fingerprint(self, fingerprint: str) -> Optional[Task]:
+        task_id = self._by_fingerprint.get(fingerprint)
+        return self._tasks.get(task_id) if task_id else None
+
+    def get_tasks(self, status: TaskStatus) -> List[Task]:
+        """Tasks currently in the given status, in the order they entered it"""
+        with self._lock:
+            return list(self._by_status[status].values())
+
+    def count(self, status: Optional[TaskStatus] = None) -> int:
+        if status is None:
+            return len(self._tasks)
+        return len(self._by_status[status])
+
+    def summary(self) -> Dict[str, int]:
+        """Task counts per status plus the overall total"""
+        with self._lock:
+            counts = {status.value: len(bucket) for status, bucket in self._by_status.items()}
+            counts["total"] = len(self._tasks)
+        return counts
+
     def update_task_status(self, task_id: str, status: TaskStatus, result: Optional[Dict] = None):
-        for task in self.tasks:
-            if task.id == task_id:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return
+            if task.status != status:
+                del self._by_status[task.status][task_id]
+                self._by_status[status][task_id] = task
                 task.status = status
-                task.updated_at = datetime.now()
-                if result:
-                    task.result = result
-                break
+                if status == TaskStatus.PENDING:
+                    self._push_pending(task)
+                else:
+                    self._heap_seq.pop(task_id, None)
+                    self._compact()
+            task.updated_at = datetime.now()
+            if result:
+                task.result = result
+            if self.store is not None:
+                self.store.record_status(self.scan_id, task, result or None)
 
     def get_next_task(self) -> Optional[Task]:
-        pending_tasks = [t for t in self.tasks if t.status == TaskStatus.PENDING]
-        return pending_tasks[0] if pending_tasks else None
\ No newline at end of file
+        """Highest-priority pending task, without changing its status"""
+        with self._lock:
+            while self._pending_heap:
+                _, seq, task_id = self._pending_heap[0]
+                if self._heap_seq.get(task_id) == seq:
+                    return self._tasks[task_id]
+                heapq.heappop(self._pending_heap)
+            return None
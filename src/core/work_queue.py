@@ -0,0 +1,150 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+
+DEFAULT_QUEUE_PATH = ".cache/campaigns.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaign_targets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id TEXT NOT NULL,
+    target TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    scan_id TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (campaign_id, target)
+);
+CREATE INDEX IF NOT EXISTS campaign_targets_status ON campaign_targets (campaign_id, status, id);
+"""
+
+STATUSES = ("pending", "running", "completed", "failed")
+
+class WorkQueue:
+    """
+    Durable queue of campaign targets shared by worker processes
+
+    Every process opens its own connection to the same SQLite file; claim()
+    takes the oldest pending target inside an IMMEDIATE transaction, so two
+    workers never get the same target. Targets move pending -> running ->
+    completed/failed, and failed or abandoned ones can be queued again.
+
+    Args:
+        path: SQLite database file
+        timeout: Seconds to wait for another process's write lock
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly where they matter
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, campaign_id: str, targets: Iterable[str]) -> int:
+        """Queue targets that are not in the campaign yet; returns how many were added"""
+        now = time.time()
+        with self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO campaign_targets (campaign_id, target, status, updated_at) "
+                "VALUES (?, ?, 'pending', ?)",
+                ((campaign_id, target, now) for target in targets)
+            )
+            return self._conn.total_changes - before
+
+    def claim(self, campaign_id: str, worker: str) -> Optional[str]:
+        """Mark the oldest pending target as running for `worker` and return it"""
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT id, target FROM campaign_targets WHERE campaign_id = ? AND status = 'pending' "
+                "ORDER BY id LIMIT 1",
+                (campaign_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE campaign_targets SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "error = NULL, updated_at = ? WHERE id = ?",
+                (worker, time.time(), row[0])
+            )
+            return row[1]
+
+    def complete(self, campaign_id: str, target: str, scan_id: Optional[str] = None):
+        self._finish(campaign_id, target, "completed", scan_id=scan_id)
+
+    def fail(self, campaign_id: str, target: str, error: str, scan_id: Optional[str] = None):
+        self._finish(campaign_id, target, "failed", scan_id=scan_id, error=error)
+
+    def _finish(self, campaign_id: str, target: str, status: str,
+                scan_id: Optional[str] = None, error: Optional[str] = None):
+        self._conn.execute(
+            "UPDATE campaign_targets SET status = ?, scan_id = COALESCE(?, scan_id), error = ?, "
+            "updated_at = ? WHERE campaign_id = ? AND target = ?",
+            (status, scan_id, error, time.time(), campaign_id, target)
+        )
+
+    def requeue(self, campaign_id: str, statuses: Iterable[str] = ("failed",)) -> int:
+        """Move targets in the given states back to pending; returns how many moved"""
+        statuses = list(statuses)
+        cursor = self._conn.execute(
+            f"UPDATE campaign_targets SET status = 'pending', worker = NULL, updated_at = ? "
+            f"WHERE campaign_id = ? AND status IN ({', '.join('?' * len(statuses))})",
+            (time.time(), campaign_id, *statuses)
+        )
+        if cursor.rowcount:
+            logger.info(f"Requeued {cursor.rowcount} {'/'.join(statuses)} targets of campaign {campaign_id}")
+        return cursor.rowcount
+
+    def abandon(self, campaign_id: str, error: str) -> int:
+        """Fail targets still marked running, e.g. after their worker died"""
+        cursor = self._conn.execute(
+            "UPDATE campaign_targets SET status = 'failed', error = ?, updated_at = ? "
+            "WHERE campaign_id = ? AND status = 'running'",
+            (error, time.time(), campaign_id)
+        )
+        return cursor.rowcount
+
+    def counts(self, campaign_id: str) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._conn.execute(
+            "SELECT status, COUNT(*) FROM campaign_targets WHERE campaign_id = ? GROUP BY status",
+            (campaign_id,)
+        ).fetchall())
+        return counts
+
+    def targets(self, campaign_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = ("SELECT target, status, attempts, worker, scan_id, error FROM campaign_targets "
+               "WHERE campaign_id = ?")
+        params: tuple = (campaign_id,)
+        if status is not None:
+            sql += " AND status = ?"
+            params += (status,)
+        columns = ("target", "status", "attempts", "worker", "scan_id", "error")
+        return [dict(zip(columns, row)) for row in self._conn.execute(sql + " ORDER BY id", params)]
+
+    def _transaction(self):
+        return _Immediate(self._conn)
+
+    def close(self):
+        self._conn.close()
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK; takes the write lock up front so claims cannot race"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -1,85 +1,206 @@
 import subprocess
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from pathlib import Path
 from loguru import logger
+from src.tools.streaming import EarlyStop, ToolInterrupted, collect_chunks, deadline_after, stream_lines
+from src.tools.wordlist import PreparedWordlist, WordlistCache
 
 class FfufTool:
-    def __init__(self):
+    def __init__(self, wordlists: Optional[WordlistCache] = None, chunk_words: int = 5000):
+        """
+        Args:
+            wordlists: Cache of normalized wordlists (defaults to the shared one)
+            chunk_words: Words per ffuf process in run(); a resumed run skips
+                the chunks an interrupted one finished
+        """
         self.default_wordlist = "/usr/share/wordlists/dirb/common.txt"
+        self.wordlists = wordlists or WordlistCache()
+        self.chunk_words = chunk_words
+
+    def _prepare(self, wordlist: Optional[str]) -> PreparedWordlist:
+        wordlist = wordlist or self.default_wordlist
+        if not Path(wordlist).exists():
+            raise FileNotFoundError(f"Wordlist not found: {wordlist}")
+        # Send the normalized, deduplicated copy instead of the raw list
+        return self.wordlists.prepare(wordlist)
+
+    def _build_command(self,
+                       target: str,
+                       wordlist: PreparedWordlist,
+                       extensions: str,
+                       threads: int,
+                       rate: Optional[int],
+                       kwargs: Dict[str, Any]) -> List[str]:
+        cmd = [
+            "ffuf",
+            "-u", target,
+            "-w", str(wordlist.path),
+            "-e", extensions,
+            "-t", str(threads)
+        ]
+        if rate:
+            cmd.extend(["-rate", str(rate)])
+
+        # Add any additional parameters
+        for key, value in kwargs.items():
+            if isinstance(value, bool):
+                if value:
+                    cmd.extend([f"-{key}"])
+            else:
+                cmd.extend([f"-{key}", str(value)])
+
+        return cmd
 
     def run(self, 
             target: str, 
             wordlist: Optional[str] = None,
             extensions: str = "php,html,txt",
             threads: int = 40,
+            rate: Optional[int] = None,
+            timeout: Optional[float] = None,
+            resume: Optional[Dict[str, Any]] = None,
             **kwargs) -> Dict[str, Any]:
         """
         Run ffuf web fuzzer with specified parameters
+
+        The wordlist is worked through in chunks of `chunk_words` words. When
+        the run times out or fails, ToolInterrupted carries everything found so
+        far and the chunks already finished.
         
         Args:
             target: Target URL (e.g., http://example.com/FUZZ)
             wordlist: Path to wordlist file
             extensions: File extensions to test
             threads: Number of concurrent threads
+            rate: Maximum requests per second across all threads
+            timeout: Wall-clock budget in seconds for the whole run
+            resume: Partial result of an interrupted run to continue from
         """
         try:
-            wordlist = wordlist or self.default_wordlist
-            if not Path(wordlist).exists():
-                raise FileNotFoundError(f"Wordlist not found: {wordlist}")
-
-            cmd = [
-                "ffuf",
-                "-u", target,
-                "-w", wordlist,
-                "-e", extensions,
-                "-t", str(threads),
-                "-o", "ffuf_output.json",
-                "-of", "json"
-            ]
-
-            # Add any additional parameters
-            for key, value in kwargs.items():
-                if isinstance(value, bool):
-                    if value:
-                        cmd.extend([f"-{key}"])
-                else:
-                    cmd.extend([f"-{key}", str(value)])
-
-            logger.info(f"Running ffuf command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            # Read the JSON output file
-            with open("ffuf_output.json", "r") as f:
-                output_data = json.load(f)
-
-            # Clean up the output file
-            Path("ffuf_output.json").unlink()
-
-            return {
-                "command": " ".join(cmd),
-                "results": output_data,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "return_code": result.returncode
-            }
-
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Ffuf execution failed: {str(e)}")
-            raise
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse ffuf output: {str(e)}")
+            deadline = deadline_after(timeout)
+            prepared = self._prepare(wordlist)
+            cmd = self._build_command(target, prepared, extensions, threads, rate, kwargs)
+            # JSON lines on stdout: no shared output file, safe for parallel runs
+            cmd.extend(["-json", "-s"])
+            chunks = prepared.chunks(self.chunk_words)
+            # Every word is also tried with each extension
+            words = prepared.words * (1 + len([ext for ext in extensions.split(",") if ext]))
+            previous = resume or {}
+            done = set(previous.get("chunks_done", [])) if previous.get("chunks") == len(chunks) else set()
+            records = list((previous.get("results") or {}).get("results", []))
+
+            logger.info(f"Running ffuf command: {' '.join(cmd)} "
+                        f"({len(chunks) - len(done)} of {len(chunks)} wordlist chunks)")
+            lines: List[str] = []
+            try:
+                stderr = collect_chunks(cmd, chunks, lines, done, deadline, timeout)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                logger.error(f"Ffuf execution failed: {str(e)}")
+                partial = self._result(cmd, records, lines, e.stderr or "", len(chunks), done, words)
+                partial.update(partial=True, error=str(e), return_code=getattr(e, "returncode", None))
+                raise ToolInterrupted(
+                    f"Ffuf on {target} stopped after {len(done)}/{len(chunks)} chunks: {str(e)}", partial,
+                    timed_out=isinstance(e, subprocess.TimeoutExpired)
+                ) from e
+
+            return self._result(cmd, records, lines, stderr, len(chunks), done, words)
+
+        except ToolInterrupted:
             raise
         except Exception as e:
             logger.error(f"Unexpected error during ffuf execution: {str(e)}")
             raise
 
+    def _result(self,
+                cmd: List[str],
+                records: List[Dict[str, Any]],
+                lines: List[str],
+                stderr: str,
+                chunks: int,
+                done: set,
+                words: int) -> Dict[str, Any]:
+        # A resumed run repeats the interrupted chunk; its records are only kept once
+        unique = {record.get("url"): record for record in records}
+        for line in lines:
+            record = self._parse_record(line)
+            if record is not None:
+                unique.setdefault(record.get("url"), record)
+        return {
+            "command": " ".join(cmd),
+            # Same shape as ffuf's -of json document, as parse_results expects
+            "results": {"results": list(unique.values())},
+            "stderr": stderr,
+            "return_code": 0,
+            "chunks": chunks,
+            "chunks_done": sorted(done),
+            # Requests sent by the finished chunks (chunks are of equal size)
+            "requests": words * len(done) // chunks if chunks else 0
+        }
+
+    def stream(self,
+               target: str,
+               wordlist: Optional[str] = None,
+               extensions: str = "php,html,txt",
+               threads: int = 40,
+               rate: Optional[int] = None,
+               max_hits: Optional[int] = None,
+               max_soft404_rate: Optional[float] = None,
+               **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Run ffuf in JSON-lines mode and yield each discovery as it arrives
+
+        Args:
+            target: Target URL (e.g., http://example.com/FUZZ)
+            wordlist: Path to wordlist file
+            extensions: File extensions to test
+            threads: Number of concurrent threads
+            rate: Maximum requests per second across all threads
+            max_hits: Stop the scan after this many discoveries
+            max_soft404_rate: Stop the scan once this fraction of discoveries
+                share a repeated (status, length, words) signature
+        """
+        cmd = self._build_command(target, self._prepare(wordlist), extensions, threads, rate, kwargs)
+        cmd.extend(["-json", "-s"])
+        stop = EarlyStop(max_hits=max_hits, max_soft404_rate=max_soft404_rate)
+
+        logger.info(f"Streaming ffuf command: {' '.join(cmd)}")
+        try:
+            for line in stream_lines(cmd):
+                record = self._parse_record(line)
+                if record is None:
+                    continue
+                item = self._to_discovery(record)
+                yield item
+                if stop.observe((item["status"], item["length"], record.get("words"))):
+                    logger.info(f"Ffuf stopped early: {stop.reason}")
+                    break
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Ffuf execution failed: {str(e)}")
+            raise
+
+    @staticmethod
+    def _parse_record(line: str) -> Optional[Dict[str, Any]]:
+        """Decode one ffuf JSON-lines record, ignoring anything else on stdout"""
+        line = line.strip()
+        if not line.startswith("{"):
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping malformed ffuf line: {line[:200]}")
+            return None
+
+    @staticmethod
+    def _to_discovery(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "url": result.get("url"),
+            "status": result.get("status"),
+            "content_type": result.get("content-type"),
+            "length": result.get("length"),
+            "redirect": result.get("redirectlocation") or None
+        }
+
     def parse_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Parse and structure ffuf results"""
         try:
@@ -91,12 +212,7 @@ class FfufTool:
             }
 
             for result in results.get("results", []):
-                parsed_results["discovered_paths"].append({
-                    "url": result.get("url"),
-                    "status": result.get("status"),
-                    "content_type": result.get("content-type"),
-                    "length": result.get("length")
-                })
+                parsed_results["discovered_paths"].append(self._to_discovery(result))
 
                 # Count response codes
                 status = result.get("status")
@@ -1,11 +1,62 @@
+import re
 import subprocess
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from pathlib import Path
 from loguru import logger
+from src.tools.streaming import EarlyStop, ToolInterrupted, collect_chunks, deadline_after, stream_lines
+from src.tools.wordlist import PreparedWordlist, WordlistCache
+
+_STATUS_RE = re.compile(r"Status:\s*(\d+)")
+_SIZE_RE = re.compile(r"Size:\s*(\d+)")
+_REDIRECT_RE = re.compile(r"-->\s*([^\]\s]+)")
 
 class GobusterTool:
-    def __init__(self):
+    def __init__(self, wordlists: Optional[WordlistCache] = None, chunk_words: int = 5000):
+        """
+        Args:
+            wordlists: Cache of normalized wordlists (defaults to the shared one)
+            chunk_words: Words per gobuster process in run(); a resumed run
+                skips the chunks an interrupted one finished
+        """
         self.default_wordlist = "/usr/share/wordlists/dirb/common.txt"
+        self.wordlists = wordlists or WordlistCache()
+        self.chunk_words = chunk_words
+
+    def _prepare(self, wordlist: Optional[str]) -> PreparedWordlist:
+        wordlist = wordlist or self.default_wordlist
+        if not Path(wordlist).exists():
+            raise FileNotFoundError(f"Wordlist not found: {wordlist}")
+        # Send the normalized, deduplicated copy instead of the raw list
+        return self.wordlists.prepare(wordlist)
+
+    def _build_command(self,
+                       target: str,
+                       wordlist: PreparedWordlist,
+                       mode: str,
+                       threads: int,
+                       status_codes: str,
+                       delay: Optional[str],
+                       kwargs: Dict[str, Any]) -> List[str]:
+        cmd = [
+            "gobuster",
+            mode,
+            "-u", target,
+            "-w", str(wordlist.path),
+            "-t", str(threads),
+            "-s", status_codes
+        ]
+        if delay:
+            cmd.extend(["--delay", delay])
+
+        # Add any additional parameters
+        for key, value in kwargs.items():
+            if isinstance(value, bool):
+                if value:
+                    cmd.extend([f"-{key}"])
+            else:
+                cmd.extend([f"-{key}", str(value)])
+
+        return cmd
 
     def run(self,
             target: str,
@@ -13,72 +64,125 @@ class GobusterTool:
             mode: str = "dir",
             threads: int = 10,
             status_codes: str = "200,204,301,302,307,401,403",
+            delay: Optional[str] = None,
+            timeout: Optional[float] = None,
+            resume: Optional[Dict[str, Any]] = None,
             **kwargs) -> Dict[str, Any]:
         """
         Run gobuster with specified parameters
-        
+
+        The wordlist is worked through in chunks of `chunk_words` words. When
+        the run times out or fails, ToolInterrupted carries everything found so
+        far and the chunks already finished.
+
         Args:
             target: Target URL
             wordlist: Path to wordlist file
             mode: Gobuster mode (dir, dns, vhost)
             threads: Number of concurrent threads
             status_codes: Status codes to look for
+            delay: Pause each thread takes between requests, e.g. "200ms"
+            timeout: Wall-clock budget in seconds for the whole run
+            resume: Partial result of an interrupted run to continue from
         """
         try:
-            wordlist = wordlist or self.default_wordlist
-            if not Path(wordlist).exists():
-                raise FileNotFoundError(f"Wordlist not found: {wordlist}")
-
-            cmd = [
-                "gobuster",
-                mode,
-                "-u", target,
-                "-w", wordlist,
-                "-t", str(threads),
-                "-s", status_codes,
-                "-o", "gobuster_output.txt"
-            ]
-
-            # Add any additional parameters
-            for key, value in kwargs.items():
-                if isinstance(value, bool):
-                    if value:
-                        cmd.extend([f"-{key}"])
-                else:
-                    cmd.extend([f"-{key}", str(value)])
-
-            logger.info(f"Running gobuster command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-
-            # Read the output file
-            with open("gobuster_output.txt", "r") as f:
-                output_data = f.read()
-
-            # Clean up the output file
-            Path("gobuster_output.txt").unlink()
-
-            return {
-                "command": " ".join(cmd),
-                "raw_output": output_data,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "return_code": result.returncode,
-                "parsed_results": self.parse_results(output_data)
-            }
-
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Gobuster execution failed: {str(e)}")
+            deadline = deadline_after(timeout)
+            prepared = self._prepare(wordlist)
+            cmd = self._build_command(target, prepared, mode, threads, status_codes, delay, kwargs)
+            # Results are read from stdout: no shared output file, safe for parallel runs
+            cmd.extend(["-q", "-z"])
+            chunks = prepared.chunks(self.chunk_words)
+            previous = resume or {}
+            done = set(previous.get("chunks_done", [])) if previous.get("chunks") == len(chunks) else set()
+            lines = previous.get("raw_output", "").splitlines()
+
+            logger.info(f"Running gobuster command: {' '.join(cmd)} "
+                        f"({len(chunks) - len(done)} of {len(chunks)} wordlist chunks)")
+            try:
+                stderr = collect_chunks(cmd, chunks, lines, done, deadline, timeout)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                logger.error(f"Gobuster execution failed: {str(e)}")
+                partial = self._result(cmd, lines, e.stderr or "", len(chunks), done, prepared.words)
+                partial.update(partial=True, error=str(e), return_code=getattr(e, "returncode", None))
+                raise ToolInterrupted(
+                    f"Gobuster on {target} stopped after {len(done)}/{len(chunks)} chunks: {str(e)}", partial,
+                    timed_out=isinstance(e, subprocess.TimeoutExpired)
+                ) from e
+
+            return self._result(cmd, lines, stderr, len(chunks), done, prepared.words)
+
+        except ToolInterrupted:
             raise
         except Exception as e:
             logger.error(f"Unexpected error during gobuster execution: {str(e)}")
             raise
 
+    def _result(self,
+                cmd: List[str],
+                lines: List[str],
+                stderr: str,
+                chunks: int,
+                done: set,
+                words: int) -> Dict[str, Any]:
+        # A resumed run repeats the interrupted chunk; its lines are only kept once
+        output = "\n".join(dict.fromkeys(line for line in lines if line))
+        return {
+            "command": " ".join(cmd),
+            "raw_output": output,
+            "stderr": stderr,
+            "return_code": 0,
+            "parsed_results": self.parse_results(output),
+            "chunks": chunks,
+            "chunks_done": sorted(done),
+            # Requests sent by the finished chunks (chunks are of equal size)
+            "requests": words * len(done) // chunks if chunks else 0
+        }
+
+    def stream(self,
+               target: str,
+               wordlist: Optional[str] = None,
+               mode: str = "dir",
+               threads: int = 10,
+               status_codes: str = "200,204,301,302,307,401,403",
+               delay: Optional[str] = None,
+               max_hits: Optional[int] = None,
+               max_soft404_rate: Optional[float] = None,
+               **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Run gobuster and yield each discovery as soon as it is printed
+
+        Args:
+            target: Target URL
+            wordlist: Path to wordlist file
+            mode: Gobuster mode (dir, dns, vhost)
+            threads: Number of concurrent threads
+            status_codes: Status codes to look for
+            delay: Pause each thread takes between requests, e.g. "200ms"
+            max_hits: Stop the scan after this many discoveries
+            max_soft404_rate: Stop the scan once this fraction of discoveries
+                share a repeated (status, size) signature
+        """
+        cmd = self._build_command(target, self._prepare(wordlist), mode, threads, status_codes, delay, kwargs)
+        # Quiet mode without the progress bar leaves only result lines on stdout
+        cmd.extend(["-q", "-z"])
+        stop = EarlyStop(max_hits=max_hits, max_soft404_rate=max_soft404_rate)
+
+        logger.info(f"Streaming gobuster command: {' '.join(cmd)}")
+        try:
+            for line in stream_lines(cmd):
+                if not (line.startswith("Found: ") or line.startswith("/")):
+                    continue
+                item = self._parse_line(line)
+                if not item:
+                    continue
+                yield item
+                if stop.observe((item.get("status_code"), item.get("size"))):
+                    logger.info(f"Gobuster stopped early: {stop.reason}")
+                    break
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Gobuster execution failed: {str(e)}")
+            raise
+
     def parse_results(self, output: str) -> Dict[str, Any]:
         """Parse gobuster output into structured format"""
         try:
@@ -95,7 +199,7 @@ class GobusterTool:
                     item = self._parse_line(line)
                     if item:
                         parsed_results["discovered_items"].append(item)
-                        
+
                         # Update summary
                         parsed_results["summary"]["total_discoveries"] += 1
                         status = item.get("status_code")
@@ -114,7 +218,7 @@ class GobusterTool:
         try:
             # Remove "Found: " prefix if present
             line = line.replace("Found: ", "").strip()
-            
+
             # Split the line into parts
             parts = line.split()
             if not parts:
@@ -124,14 +228,18 @@ class GobusterTool:
                 "path": parts[0]
             }
 
-            # Parse status code if present
-            for part in parts:
-                if part.startswith("Status:"):
-                    result["status_code"] = int(part.split(":")[1])
-                elif part.startswith("Size:"):
-                    result["size"] = int(part.split(":")[1])
+            # Status and size appear as "(Status: 200) [Size: 123]"
+            status = _STATUS_RE.search(line)
+            if status:
+                result["status_code"] = int(status.group(1))
+            size = _SIZE_RE.search(line)
+            if size:
+                result["size"] = int(size.group(1))
+            redirect = _REDIRECT_RE.search(line)
+            if redirect:
+                result["redirect"] = redirect.group(1)
 
             return result
 
         except Exception:
-            return None
\ No newline at end of file
+            return None
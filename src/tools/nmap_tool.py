@@ -1,27 +1,300 @@
+import ipaddress
+import os
 import subprocess
-from typing import Dict
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 from loguru import logger
+from src.tools.streaming import ToolInterrupted, deadline_after, remaining, spawn
 
 class NmapTool:
-    def run(self, target: str, ports: str = None, **kwargs) -> Dict:
+    def __init__(self,
+                 shard_size: int = 256,
+                 workers: Optional[int] = None,
+                 shard_retries: int = 2):
+        """
+        Args:
+            shard_size: Maximum hosts per nmap process when a CIDR target is split
+                (rounded down to a power of two)
+            workers: Number of nmap processes run in parallel (defaults to the CPU count)
+            shard_retries: Extra attempts for a shard whose nmap process fails
+        """
+        self.shard_size = shard_size
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_retries = shard_retries
+
+    def _build_command(self,
+                       target: str,
+                       ports: Optional[str],
+                       version_light: bool = False,
+                       exclude: Optional[List[str]] = None) -> List[str]:
+        # XML goes to stdout so it can be parsed while the scan is still running
+        cmd = ["nmap", "-sV"]
+        if version_light:
+            cmd.append("--version-light")
+        cmd.extend(["-oX", "-"])
+        if ports:
+            cmd.extend(["-p", ports])
+        if exclude:
+            cmd.extend(["--exclude", ",".join(exclude)])
+        cmd.append(target)
+        return cmd
+
+    def run(self,
+            target: str,
+            ports: str = None,
+            progress: Optional[Callable[[int, int], None]] = None,
+            version_light: bool = False,
+            timeout: Optional[float] = None,
+            resume: Optional[Dict[str, Any]] = None,
+            **kwargs) -> Dict:
+        """
+        Run an nmap service scan and return structured host/port records
+
+        CIDR targets larger than `shard_size` are split into shards that are
+        scanned by parallel nmap processes and merged into one result. When
+        the scan times out or fails, ToolInterrupted carries the hosts finished
+        so far; resuming from it excludes them from the next scan.
+
+        Args:
+            target: Host, IP address or CIDR range
+            ports: Port specification passed to -p
+            progress: Called with (completed_shards, total_shards) as shards finish
+            version_light: Only try the most likely service probes (--version-light);
+                much faster, enough to notice a changed banner but may miss versions
+            timeout: Wall-clock budget in seconds for the whole scan
+            resume: Partial result of an interrupted scan to continue from
+        """
+        shards = self.shard_target(target)
+        if len(shards) > 1:
+            return self.run_sharded(target, shards, ports, progress, version_light, timeout, resume)
+
+        previous = resume or {}
+        hosts = list(previous.get("hosts", []))
+        scanned = list(previous.get("scanned", []))
+        cmd = self._build_command(target, ports, version_light, scanned)
         try:
-            cmd = ["nmap", "-sV"]
-            if ports:
-                cmd.extend(["-p", ports])
-            cmd.append(target)
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
+            logger.info(f"Running nmap command: {' '.join(cmd)}")
+            stats = self._scan(cmd, hosts, scanned, deadline_after(timeout), timeout)
+
             return {
-                "output": result.stdout,
-                "error": result.stderr,
-                "return_code": result.returncode
+                "command": " ".join(cmd),
+                "hosts": hosts,
+                "open_ports": self.open_ports(hosts),
+                "stats": stats,
+                "return_code": 0
             }
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ET.ParseError) as e:
+            # Malformed XML (e.g. nmap crashing mid-document) keeps the hosts parsed before it
             logger.error(f"Nmap scan failed: {str(e)}")
-            raise
\ No newline at end of file
+            raise ToolInterrupted(f"Nmap scan of {target} stopped after {len(scanned)} hosts: {str(e)}", {
+                "command": " ".join(cmd),
+                "hosts": hosts,
+                "open_ports": self.open_ports(hosts),
+                "scanned": scanned,
+                "partial": True,
+                "error": str(e),
+                "return_code": getattr(e, "returncode", None)
+            }, timed_out=isinstance(e, subprocess.TimeoutExpired)) from e
+
+    def _scan(self,
+              cmd: List[str],
+              hosts: List[Dict[str, Any]],
+              scanned: List[str],
+              deadline: Optional[float] = None,
+              timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run one nmap process, appending hosts as they finish so they survive a timeout"""
+        stats: Dict[str, Any] = {}
+        with spawn(cmd, text=False, timeout=remaining(cmd, deadline, timeout)) as process:
+            for host in self.iter_hosts(process.stdout, stats, scanned):
+                hosts.append(host)
+        return stats
+
+    def shard_target(self, target: str) -> List[str]:
+        """Split a CIDR target into subnets of at most `shard_size` addresses"""
+        try:
+            network = ipaddress.ip_network(target.strip(), strict=False)
+        except ValueError:
+            return [target]
+        if network.num_addresses <= self.shard_size:
+            return [target]
+        shard_bits = max(self.shard_size.bit_length() - 1, 0)
+        new_prefix = network.max_prefixlen - shard_bits
+        return [str(subnet) for subnet in network.subnets(new_prefix=new_prefix)]
+
+    def run_sharded(self,
+                    target: str,
+                    shards: List[str],
+                    ports: Optional[str] = None,
+                    progress: Optional[Callable[[int, int], None]] = None,
+                    version_light: bool = False,
+                    timeout: Optional[float] = None,
+                    resume: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Scan shards with parallel nmap processes and merge them in shard order
+
+        Shards share one wall-clock budget. If any shard runs out of it, the
+        merged partial result lists the finished shards and hosts, and
+        resuming from it skips them.
+        """
+        started = time.monotonic()
+        deadline = deadline_after(timeout)
+        previous = resume or {}
+        shards_done = [shard for shard in previous.get("shards_done", []) if shard in shards]
+        scanned = list(previous.get("scanned", []))
+        shard_hosts: Dict[int, List[Dict[str, Any]]] = {-1: list(previous.get("hosts", []))}
+        merged_stats = {"hosts_up": 0, "hosts_down": 0, "hosts_total": 0}
+        failed_shards, interrupted = [], []
+        todo = [index for index, shard in enumerate(shards) if shard not in shards_done]
+        logger.info(f"Scanning {target} as {len(todo)} of {len(shards)} shards with {self.workers} nmap workers")
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nmap") as pool:
+            futures = {
+                pool.submit(self._scan_shard, shards[index], ports, version_light,
+                            _within(shards[index], scanned), deadline, timeout): index
+                for index in todo
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    hosts, stats, finished = future.result()
+                    shard_hosts[index] = hosts
+                    scanned.extend(finished)
+                    shards_done.append(shards[index])
+                    for key in merged_stats:
+                        merged_stats[key] += stats.get(key, 0)
+                except ToolInterrupted as e:
+                    logger.error(f"Nmap shard {shards[index]} ran out of time: {str(e)}")
+                    shard_hosts[index] = e.partial["hosts"]
+                    scanned.extend(e.partial["scanned"])
+                    interrupted.append(shards[index])
+                except Exception as e:
+                    logger.error(f"Nmap shard {shards[index]} failed: {str(e)}")
+                    failed_shards.append(shards[index])
+                logger.info(f"Nmap progress for {target}: {done}/{len(todo)} shards")
+                if progress:
+                    progress(done, len(todo))
+
+        if todo and not interrupted and len(failed_shards) == len(todo):
+            raise RuntimeError(f"All {len(todo)} nmap shards failed for {target}")
+
+        hosts = [host for index in sorted(shard_hosts) for host in shard_hosts[index]]
+        merged_stats["elapsed"] = round(time.monotonic() - started, 3)
+        result = {
+            "command": " ".join(self._build_command(target, ports, version_light)),
+            "hosts": hosts,
+            "open_ports": self.open_ports(hosts),
+            "stats": merged_stats,
+            "shards": len(shards),
+            "failed_shards": sorted(failed_shards),
+            "return_code": 0
+        }
+        if interrupted:
+            error = f"{len(interrupted)} of {len(shards)} shards ran out of their {timeout}s budget"
+            result.update(partial=True, error=error, shards_done=shards_done, scanned=scanned, return_code=None)
+            raise ToolInterrupted(f"Nmap scan of {target} stopped: {error}", result, timed_out=True)
+        return result
+
+    def _scan_shard(self,
+                    shard: str,
+                    ports: Optional[str],
+                    version_light: bool = False,
+                    exclude: Optional[List[str]] = None,
+                    deadline: Optional[float] = None,
+                    timeout: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any], List[str]]:
+        cmd = self._build_command(shard, ports, version_light, exclude)
+        for attempt in range(self.shard_retries + 1):
+            hosts: List[Dict[str, Any]] = []
+            scanned: List[str] = []
+            try:
+                return hosts, self._scan(cmd, hosts, scanned, deadline, timeout), scanned
+            except subprocess.TimeoutExpired as e:
+                # No time left for a retry; hand back what the shard finished
+                raise ToolInterrupted(f"Nmap shard {shard} timed out: {str(e)}",
+                                      {"hosts": hosts, "scanned": scanned}, timed_out=True) from e
+            except (subprocess.CalledProcessError, ET.ParseError) as e:
+                if attempt >= self.shard_retries:
+                    raise
+                logger.warning(f"Retrying nmap shard {shard} (attempt {attempt + 2}): {str(e)}")
+
+    def iter_hosts(self,
+                   source: BinaryIO,
+                   stats: Optional[Dict[str, Any]] = None,
+                   scanned: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Incrementally parse nmap XML, yielding one compact record per host
+
+        Each <host> element is discarded as soon as it has been converted,
+        so memory stays flat regardless of how many hosts the scan covers.
+        Run statistics are written into `stats` when provided, and the
+        address of every finished host, up or down, is appended to `scanned`.
+        """
+        root = None
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag == "host":
+                record = self._host_record(elem)
+                root.clear()
+                if scanned is not None and record["address"]:
+                    scanned.append(record["address"])
+                if record["status"] == "up":
+                    yield record
+            elif elem.tag == "finished" and stats is not None:
+                stats["elapsed"] = float(elem.get("elapsed", 0))
+                stats["summary"] = elem.get("summary")
+            elif elem.tag == "hosts" and stats is not None:
+                stats.update({
+                    "hosts_up": int(elem.get("up", 0)),
+                    "hosts_down": int(elem.get("down", 0)),
+                    "hosts_total": int(elem.get("total", 0))
+                })
+
+    @staticmethod
+    def _host_record(host: ET.Element) -> Dict[str, Any]:
+        address = None
+        for addr in host.findall("address"):
+            if addr.get("addrtype") in ("ipv4", "ipv6"):
+                address = addr.get("addr")
+                break
+        status = host.find("status")
+
+        ports = []
+        for port in host.findall("ports/port"):
+            state = port.find("state")
+            record = {
+                "port": int(port.get("portid")),
+                "protocol": port.get("protocol"),
+                "state": state.get("state") if state is not None else None
+            }
+            service = port.find("service")
+            if service is not None:
+                for key in ("name", "product", "version", "extrainfo"):
+                    if service.get(key):
+                        record["service" if key == "name" else key] = service.get(key)
+            ports.append(record)
+
+        return {
+            "address": address,
+            "hostnames": [h.get("name") for h in host.findall("hostnames/hostname")],
+            "status": status.get("state") if status is not None else "unknown",
+            "ports": ports
+        }
+
+    @staticmethod
+    def open_ports(hosts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flatten host records into one entry per open port"""
+        return [
+            {"host": host["address"], **port}
+            for host in hosts
+            for port in host["ports"]
+            if port.get("state") == "open"
+        ]
+
+def _within(shard: str, addresses: List[str]) -> List[str]:
+    """Addresses that belong to a CIDR shard"""
+    network = ipaddress.ip_network(shard, strict=False)
+    return [a for a in addresses if ipaddress.ip_address(a) in network]
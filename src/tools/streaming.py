@@ -0,0 +1,246 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Hashable, Iterator, List, Optional, Set
+from loguru import logger
+
+# Seconds a tool gets to exit after SIGTERM before its process group is killed
+TERMINATE_GRACE = 5.0
+
+class ToolInterrupted(RuntimeError):
+    """
+    A tool run stopped by its time budget or a failure, with what it found until then
+
+    `partial` has the shape of the tool's normal result plus "partial": True
+    and "error"; passing it back as the tool's `resume` argument continues
+    the work instead of repeating it. `timed_out` tells a run stopped by its
+    own time budget from one the tool or the target failed.
+    """
+
+    def __init__(self, message: str, partial: Dict[str, Any], timed_out: bool = False):
+        super().__init__(message)
+        self.partial = partial
+        self.timed_out = timed_out
+
+class EarlyStop:
+    """
+    Stop conditions for streamed discoveries
+
+    Args:
+        max_hits: Stop after this many discoveries
+        max_soft404_rate: Stop once this fraction of discoveries look like
+            soft-404s, i.e. share a response signature (status, size, ...)
+            that has already been seen more than `soft404_repeat` times
+        min_samples: Discoveries required before the soft-404 rate is checked
+        soft404_repeat: Repetitions after which a signature counts as a soft-404
+    """
+
+    def __init__(self,
+                 max_hits: Optional[int] = None,
+                 max_soft404_rate: Optional[float] = None,
+                 min_samples: int = 20,
+                 soft404_repeat: int = 3):
+        self.max_hits = max_hits
+        self.max_soft404_rate = max_soft404_rate
+        self.min_samples = min_samples
+        self.soft404_repeat = soft404_repeat
+        self.hits = 0
+        self.soft404_hits = 0
+        self.signatures: Dict[Hashable, int] = {}
+        self.reason: Optional[str] = None
+
+    def observe(self, signature: Hashable) -> bool:
+        """Record one discovery; return True when the stream should stop"""
+        self.hits += 1
+        seen = self.signatures.get(signature, 0) + 1
+        self.signatures[signature] = seen
+        if seen > self.soft404_repeat:
+            self.soft404_hits += 1
+
+        if self.max_hits is not None and self.hits >= self.max_hits:
+            self.reason = f"reached {self.max_hits} hits"
+        elif (self.max_soft404_rate is not None
+              and self.hits >= self.min_samples
+              and self.soft404_hits / self.hits > self.max_soft404_rate):
+            self.reason = (f"soft-404 rate {self.soft404_hits / self.hits:.2f} "
+                           f"exceeded {self.max_soft404_rate}")
+        return self.reason is not None
+
+    @property
+    def soft404_rate(self) -> float:
+        return self.soft404_hits / self.hits if self.hits else 0.0
+
+def deadline_after(timeout: Optional[float]) -> Optional[float]:
+    """time.monotonic() deadline of a wall-clock budget (None means no budget)"""
+    return None if timeout is None else time.monotonic() + timeout
+
+def remaining(cmd: List[str], deadline: Optional[float], timeout: Optional[float] = None) -> Optional[float]:
+    """Seconds left until `deadline`; raises TimeoutExpired once it has passed"""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise subprocess.TimeoutExpired(cmd, timeout or 0)
+    return left
+
+def terminate(process: subprocess.Popen, grace: float = TERMINATE_GRACE):
+    """
+    Stop a process started by spawn() together with everything it started
+
+    The process group gets SIGTERM, then SIGKILL after `grace` seconds, so
+    helpers a tool forked (nmap scripts, shells) do not outlive it.
+    """
+    if not hasattr(os, "killpg"):
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        return
+
+    def signal_group(sig: int):
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    if process.poll() is None:
+        signal_group(signal.SIGTERM)
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+    signal_group(signal.SIGKILL)
+
+@contextmanager
+def spawn(cmd: List[str],
+          text: bool = True,
+          stderr_lines: int = 50,
+          timeout: Optional[float] = None,
+          grace: float = TERMINATE_GRACE) -> Iterator[subprocess.Popen]:
+    """
+    Start a command whose stdout the caller consumes incrementally
+
+    The command runs in its own process group. stderr is drained in the
+    background (keeping its last `stderr_lines` lines, also available as
+    `process.stderr_tail`) so a chatty tool never blocks on a full pipe. If
+    the caller leaves the block early the group is terminated. A run that
+    exceeds `timeout` seconds is terminated the same way and raises
+    TimeoutExpired once the caller has consumed what it printed; otherwise
+    a non-zero exit raises CalledProcessError with the stderr tail attached.
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=text,
+        bufsize=1 if text else -1,
+        start_new_session=True
+    )
+    stderr_tail: Deque = deque(maxlen=stderr_lines)
+    process.stderr_tail = stderr_tail
+    drain = threading.Thread(
+        target=lambda: stderr_tail.extend(process.stderr),
+        daemon=True
+    )
+    drain.start()
+
+    expired = threading.Event()
+
+    def expire():
+        if process.poll() is None:
+            expired.set()
+            logger.warning(f"{cmd[0]} exceeded its {timeout:.1f}s budget; stopping process group {process.pid}")
+            terminate(process, grace)
+
+    timer = threading.Timer(timeout, expire) if timeout is not None else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+
+    try:
+        yield process
+    except Exception:
+        if not expired.is_set():
+            if process.poll() is None:
+                logger.info(f"Stopping {cmd[0]} early (pid {process.pid})")
+                terminate(process, grace)
+            raise
+        # Output cut off by the budget (e.g. truncated XML) is reported as the timeout
+    except BaseException:
+        if process.poll() is None:
+            logger.info(f"Stopping {cmd[0]} early (pid {process.pid})")
+        terminate(process, grace)
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+        process.wait()
+        process.stdout.close()
+        drain.join(timeout=1)
+
+    stderr = (b"" if not text else "").join(stderr_tail)
+    stderr = stderr if text else stderr.decode("utf-8", "replace")
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, stderr=stderr)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+
+def collect(cmd: List[str],
+            lines: List[str],
+            deadline: Optional[float] = None,
+            timeout: Optional[float] = None) -> str:
+    """
+    Run a command to completion, appending its stdout lines to `lines`
+
+    Lines printed before a timeout or a failure stay in `lines` when
+    TimeoutExpired or CalledProcessError is raised. Returns the stderr tail.
+
+    Args:
+        cmd: Command to run
+        lines: List receiving stdout lines as they are printed
+        deadline: time.monotonic() deadline of the whole invocation
+        timeout: The budget the deadline was derived from, for error messages
+    """
+    with spawn(cmd, timeout=remaining(cmd, deadline, timeout)) as process:
+        for line in process.stdout:
+            lines.append(line.rstrip("\n"))
+    return "".join(process.stderr_tail)
+
+def collect_chunks(cmd: List[str],
+                   chunks: List[Any],
+                   lines: List[str],
+                   done: Set[int],
+                   deadline: Optional[float] = None,
+                   timeout: Optional[float] = None) -> str:
+    """
+    Run a wordlist tool once per wordlist chunk, in order, collecting its stdout lines
+
+    The -w argument of `cmd` is replaced by each chunk. Chunks whose index is
+    in `done` are skipped and finished ones are added to it, so after a
+    timeout or failure `done` and `lines` describe exactly what is left.
+    Returns the stderr tails of the runs.
+    """
+    stderr = []
+    wordlist = cmd.index("-w") + 1
+    for index, chunk in enumerate(chunks):
+        if index in done:
+            continue
+        stderr.append(collect(cmd[:wordlist] + [str(chunk)] + cmd[wordlist + 1:], lines, deadline, timeout))
+        done.add(index)
+    return "".join(stderr)
+
+def stream_lines(cmd: List[str], stderr_lines: int = 50) -> Iterator[str]:
+    """
+    Run a command and yield its stdout line by line as it is produced
+
+    The process is terminated if the consumer stops iterating early.
+    """
+    with spawn(cmd, stderr_lines=stderr_lines) as process:
+        for line in process.stdout:
+            yield line.rstrip("\n")
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+DEFAULT_WORDLIST_CACHE = ".cache/wordlists"
+
+class PreparedWordlist:
+    """
+    A normalized, deduplicated wordlist stored in the cache directory
+
+    The compact file is memory-mapped on demand, so sharding copies byte
+    ranges instead of decoding and re-joining words.
+    """
+
+    def __init__(self, path: Path, digest: str, stats: Dict[str, int]):
+        self.path = path
+        self.digest = digest
+        self.stats = stats
+        self._offsets: Optional[List[int]] = None
+
+    @property
+    def words(self) -> int:
+        return self.stats["unique_words"]
+
+    @property
+    def requests_saved(self) -> int:
+        """Requests avoided per scan by dropping duplicates, blanks and comments"""
+        return self.stats["raw_lines"] - self.stats["unique_words"]
+
+    def __len__(self) -> int:
+        return self.words
+
+    def __iter__(self) -> Iterator[str]:
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield line.rstrip(b"\n").decode("utf-8", "replace")
+
+    def _line_offsets(self, data: mmap.mmap) -> List[int]:
+        if self._offsets is None:
+            offsets = [0]
+            pos = data.find(b"\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = data.find(b"\n", pos + 1)
+            self._offsets = offsets
+        return self._offsets
+
+    def chunks(self, size: int) -> List[Path]:
+        """Shard files of at most `size` words each, in wordlist order"""
+        return self.shards(-(-self.words // size) if size > 0 else 1)
+
+    def shards(self, count: int) -> List[Path]:
+        """Split the list into `count` disjoint, contiguous shard files (cached)"""
+        if count <= 1 or self.words == 0:
+            return [self.path]
+        count = min(count, self.words)
+        paths = [
+            self.path.with_name(f"{self.digest}.shard-{i + 1}of{count}.txt")
+            for i in range(count)
+        ]
+        if all(p.exists() for p in paths):
+            return paths
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = self._line_offsets(data)
+            for i, shard_path in enumerate(paths):
+                first = self.words * i // count
+                last = self.words * (i + 1) // count
+                start = offsets[first]
+                end = offsets[last] if last < len(offsets) else len(data)
+                _atomic_write(shard_path, data[start:end])
+        return paths
+
+class WordlistCache:
+    """
+    Normalizes wordlists once and reuses the result by content hash
+
+    Lines are stripped, blank lines and '#' comments removed and duplicates
+    dropped (first occurrence wins). The compact list is written to
+    `cache_dir/<sha256>.txt` next to a small JSON file with its statistics.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_WORDLIST_CACHE):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        # (path, size, mtime) -> digest, so unchanged files are not re-hashed
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    def _digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self._digests[key] = digest
+        return digest
+
+    def prepare(self, wordlist: str) -> PreparedWordlist:
+        """Return the cached compact form of wordlist, building it on first use"""
+        source = Path(wordlist)
+        if not source.exists():
+            raise FileNotFoundError(f"Wordlist not found: {wordlist}")
+
+        with self._lock:
+            digest = self._digest(source)
+            target = self.cache_dir / f"{digest}.txt"
+            meta = self.cache_dir / f"{digest}.json"
+            if target.exists() and meta.exists():
+                return PreparedWordlist(target, digest, json.loads(meta.read_text()))
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            stats = self._normalize(source, target)
+            _atomic_write(meta, json.dumps(stats).encode())
+
+        prepared = PreparedWordlist(target, digest, stats)
+        logger.info(
+            f"Prepared wordlist {source.name}: {stats['unique_words']} unique of "
+            f"{stats['raw_lines']} lines ({prepared.requests_saved} requests saved per scan)"
+        )
+        return prepared
+
+    @staticmethod
+    def _normalize(source: Path, target: Path) -> Dict[str, int]:
+        seen = set()
+        raw_lines = skipped = duplicates = 0
+        tmp = target.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+        with open(source, "rb") as src, open(tmp, "wb") as out:
+            for line in src:
+                raw_lines += 1
+                word = line.strip()
+                if not word or word.startswith(b"#"):
+                    skipped += 1
+                    continue
+                if word in seen:
+                    duplicates += 1
+                    continue
+                seen.add(word)
+                out.write(word + b"\n")
+        os.replace(tmp, target)
+        return {
+            "raw_lines": raw_lines,
+            "unique_words": len(seen),
+            "duplicates": duplicates,
+            "skipped": skipped
+        }
+
+def _atomic_write(path: Path, data: bytes):
+    tmp = path.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
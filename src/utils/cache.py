@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from loguru import logger
+
+class DiskCache:
+    """
+    SQLite-backed key/value cache with size and age based eviction
+
+    The database may be shared by several processes. When another one keeps
+    it locked for longer than `busy_timeout`, a lookup counts as a miss and a
+    write is skipped rather than failing the caller.
+
+    Args:
+        path: Database file; parent directories are created on demand
+        max_entries: Evict least recently used entries beyond this count
+        max_bytes: Evict least recently used entries beyond this total value size
+        max_age: Entries older than this many seconds are treated as misses
+        enabled: When False every lookup misses and nothing is stored
+        busy_timeout: Seconds to wait for another connection's write lock
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = 10000,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 max_age: Optional[float] = 7 * 24 * 3600,
+                 enabled: bool = True,
+                 busy_timeout: float = 30.0):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.busy_timeout = busy_timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def _rollback(self):
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self.max_age is not None and now - row[1] > self.max_age:
+                    row = None
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    conn.commit()
+                    self.evictions += 1
+            except sqlite3.OperationalError as e:
+                self._rollback()
+                logger.warning(f"Cache {self.path.name} is busy, treating lookup as a miss: {str(e)}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            try:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                # Only the LRU order suffers
+                self._rollback()
+                logger.debug(f"Cache {self.path.name} is busy, access time not updated: {str(e)}")
+            return row[0]
+
+    def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                self._rollback()
+                logger.warning(f"Cache {self.path.name} is busy, entry not stored: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.max_age is not None:
+            self.evictions += conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (now - self.max_age,)
+            ).rowcount
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk from the least recently used entry until both limits hold
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            self.evictions += 1
+        logger.debug(f"Cache {self.path.name} evicted down to {count} entries / {total} bytes")
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "enabled": self.enabled
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
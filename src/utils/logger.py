@@ -1,59 +1,233 @@
+import gzip
+import hashlib
+import json
+import queue
+import reprlib
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 from loguru import logger
 from datetime import datetime
 
+# Bounded repr for payloads embedded in messages: cost does not grow with
+# the size of the dict being logged
+_preview = reprlib.Repr()
+_preview.maxlevel = 3
+_preview.maxdict = 20
+_preview.maxlist = 20
+_preview.maxstring = 200
+_preview.maxother = 200
+
+def _without_payload(record: Dict[str, Any]) -> bool:
+    """Keep full payloads out of text sinks so they are never copied into their queue"""
+    return "payload" not in record["extra"]
+
+class JsonLinesSink:
+    """
+    Background JSON-lines sink for loguru
+
+    The calling thread only snapshots bound payloads as JSON, since results
+    keep being mutated after they are logged, and puts the record on a
+    queue. Formatting, payload truncation, file writes, rotation and gzip
+    compression all happen on the writer thread. Payloads (bound as
+    `payload`) whose JSON exceeds `max_payload_chars` are written to
+    `blob_dir` and replaced by a reference with a short preview.
+
+    Args:
+        path: JSON-lines file to write
+        max_payload_chars: Largest payload kept inline
+        blob_dir: Directory for offloaded payloads (defaults to <path dir>/blobs)
+        rotation_bytes: Rotate the file once it grows past this size
+        retention_days: Delete rotated files older than this
+        queue_size: Records buffered before callers block
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_payload_chars: int = 4096,
+                 blob_dir: Optional[str] = None,
+                 rotation_bytes: int = 500 * 1024 * 1024,
+                 retention_days: float = 7,
+                 queue_size: int = 10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.blob_dir = Path(blob_dir) if blob_dir else self.path.parent / "blobs"
+        self.max_payload_chars = max_payload_chars
+        self.rotation_bytes = rotation_bytes
+        self.retention_days = retention_days
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        record = message.record
+        if "payload" in record["extra"]:
+            # Serialized here: the writer thread would see later mutations of the payload
+            extra = dict(record["extra"], payload=json.dumps(record["extra"]["payload"], default=str))
+            record = dict(record, extra=extra)
+        self._queue.put(record)
+
+    def stop(self):
+        """Write everything still queued and close the file (called by logger.remove)"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stopping = True
+                batch = [record for record in batch if record is not None]
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(json.dumps(self._entry(record), default=str))
+                except Exception as e:
+                    lines.append(json.dumps({"message": record.get("message"), "error": f"unserializable record: {e}"}))
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                if self._file.tell() >= self.rotation_bytes:
+                    self._rotate()
+        self._file.close()
+
+    def _entry(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        extra = dict(record["extra"])
+        entry = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "scan_id": extra.pop("scan_id", None),
+            "name": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": record["message"]
+        }
+        if "payload" in extra:
+            entry["payload"] = self._payload(extra.pop("payload"))
+        if extra:
+            entry["extra"] = extra
+        if record["exception"] is not None:
+            entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+        return entry
+
+    def _payload(self, text: str) -> Any:
+        if len(text) <= self.max_payload_chars:
+            return json.loads(text)
+        digest = hashlib.sha256(text.encode()).hexdigest()[:16]
+        blob = self.blob_dir / f"{digest}.json.gz"
+        if not blob.exists():
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            with gzip.open(blob, "wt", encoding="utf-8") as f:
+                f.write(text)
+        return {
+            "truncated": True,
+            "size": len(text),
+            "blob": str(blob),
+            "preview": text[:min(self.max_payload_chars, 512)]
+        }
+
+    def _rotate(self):
+        self._file.close()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}.gz")
+        with open(self.path, "rb") as src, gzip.open(rotated, "wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                dst.write(chunk)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+        cutoff = time.time() - self.retention_days * 86400
+        for old in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.gz"):
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+
 class LoggerSetup:
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(self, log_dir: str = "logs", max_payload_chars: int = 4096):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
-        
+        self.max_payload_chars = max_payload_chars
+
         # Generate log filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.log_file = self.log_dir / f"security_scan_{timestamp}.log"
-        
+        self.json_file = self.log_dir / f"security_scan_{timestamp}.jsonl"
+        self.handler_ids: List[int] = []
+
         self.setup_logger()
 
     def setup_logger(self):
         # Remove any existing handlers
         logger.remove()
 
-        # Add console handler with color
-        logger.add(
+        # Every sink is enqueued: formatting happens in the caller, but writes,
+        # rotation and compression run on a background thread
+        self.handler_ids.append(logger.add(
             sys.stdout,
             colorize=True,
             format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
                    "<level>{level: <8}</level> | "
                    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
                    "<level>{message}</level>",
-            level="INFO"
-        )
+            level="INFO",
+            filter=_without_payload,
+            enqueue=True
+        ))
 
         # Add file handler
-        logger.add(
+        self.handler_ids.append(logger.add(
             self.log_file,
             rotation="500 MB",  # Rotate when file reaches 500MB
             retention="1 week",  # Keep logs for 1 week
             compression="zip",   # Compress rotated logs
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
                    "{name}:{function}:{line} - {message}",
+            level="DEBUG",
+            filter=_without_payload,
+            enqueue=True
+        ))
+
+        # Structured audit trail, including full tool payloads
+        self.handler_ids.append(logger.add(
+            JsonLinesSink(self.json_file, max_payload_chars=self.max_payload_chars),
+            format="{message}",
             level="DEBUG"
-        )
+        ))
 
     def get_logger(self):
         return logger
 
+    def shutdown(self):
+        """Drain the background writers and detach the sinks"""
+        logger.complete()
+        for handler_id in self.handler_ids:
+            logger.remove(handler_id)
+        self.handler_ids = []
+
 class SecurityAuditLogger:
     def __init__(self, scan_id: str):
         self.scan_id = scan_id
         self.logger = logger.bind(scan_id=scan_id)
 
+    # Messages use lazy arguments: nothing is rendered unless a sink accepts the level
+
     def tool_start(self, tool_name: str, parameters: dict):
-        self.logger.info(f"Starting {tool_name} scan with parameters: {parameters}")
+        self.logger.opt(lazy=True).info(
+            "Starting {} scan with parameters: {}", lambda: tool_name, lambda: _preview.repr(parameters))
 
     def tool_complete(self, tool_name: str, result: dict):
-        self.logger.info(f"Completed {tool_name} scan successfully")
-        self.logger.debug(f"Scan results: {result}")
+        self.logger.info("Completed {} scan successfully", tool_name)
+        # The result travels as a bound payload; only the JSON-lines sink serializes it
+        self.logger.bind(payload=result).debug("Scan results for {}", tool_name)
 
     def tool_error(self, tool_name: str, error: Exception):
         self.logger.error(f"Error in {tool_name} scan: {str(error)}")
@@ -66,11 +240,12 @@ class SecurityAuditLogger:
         self.logger.info(f"Task {task_id} status updated to: {status}")
 
     def vulnerability_found(self, details: dict):
-        self.logger.warning(f"Potential vulnerability discovered: {details}")
+        self.logger.opt(lazy=True).warning(
+            "Potential vulnerability discovered: {}", lambda: _preview.repr(details))
 
     def scan_summary(self, summary: dict):
-        self.logger.info(f"Scan summary: {summary}")
+        self.logger.opt(lazy=True).info("Scan summary: {}", lambda: _preview.repr(summary))
 
 def get_audit_logger(scan_id: str) -> SecurityAuditLogger:
     """Factory function to create a new SecurityAuditLogger instance"""
-    return SecurityAuditLogger(scan_id)
\ No newline at end of file
+    return SecurityAuditLogger(scan_id)
@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from fast parsing up to long scans
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(bounds)
+
+    def observe(self, value: float, bounds: Tuple[float, ...]):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                self.buckets[i] += 1
+
+class Metrics:
+    """
+    Timing spans and counters for one scan
+
+    Every span and counter carries the scan_id label in addition to its own
+    labels (tool, target, ...). Export with to_prometheus() or summary().
+
+    Args:
+        scan_id: Scan the measurements belong to
+        namespace: Prefix for exported metric names
+        buckets: Histogram bucket upper bounds in seconds
+    """
+
+    def __init__(self,
+                 scan_id: Optional[str] = None,
+                 namespace: str = "security_agent",
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.scan_id = scan_id
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._spans: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: Dict[str, Any]) -> Labels:
+        if self.scan_id is not None:
+            labels = {"scan_id": self.scan_id, **labels}
+        return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """Time the enclosed block; failures are recorded with status="error\""""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, status=status, **labels)
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._spans.get(key)
+            if histogram is None:
+                histogram = self._spans[key] = _Histogram(self.buckets)
+            histogram.observe(seconds, self.buckets)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name: str, **labels) -> float:
+        """Total of a counter across all label sets matching `labels`"""
+        wanted = set(self._labels(labels))
+        with self._lock:
+            return sum(v for (n, l), v in self._counters.items() if n == name and wanted <= set(l))
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        for name in sorted({n for (n, _), _ in spans}):
+            metric = f"{self.namespace}_{name}_seconds"
+            lines.append(f"# HELP {metric} Duration of {name} spans")
+            lines.append(f"# TYPE {metric} histogram")
+            for (n, labels), histogram in spans:
+                if n != name:
+                    continue
+                for bound, count in zip(self.buckets, histogram.buckets):
+                    lines.append(f"{metric}_bucket{self._format_labels(labels, ('le', repr(bound)))} {count}")
+                lines.append(f"{metric}_bucket{self._format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram.total:.6f}")
+                lines.append(f"{metric}_count{self._format_labels(labels)} {histogram.count}")
+
+        for name in sorted({n for (n, _), _ in counters}):
+            metric = f"{self.namespace}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (n, labels), value in counters:
+                if n == name:
+                    lines.append(f"{metric}{self._format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-friendly totals per span name plus every individual span and counter"""
+        with self._lock:
+            spans = list(self._spans.items())
+            counters = list(self._counters.items())
+
+        stages: Dict[str, Dict[str, float]] = {}
+        for (name, _), histogram in spans:
+            stage = stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stage["count"] += histogram.count
+            stage["total_s"] = round(stage["total_s"] + histogram.total, 6)
+            stage["max_s"] = round(max(stage["max_s"], histogram.max), 6)
+
+        totals: Dict[str, float] = {}
+        for (name, _), value in counters:
+            totals[name] = totals.get(name, 0) + value
+
+        return {
+            "scan_id": self.scan_id,
+            "stages": stages,
+            "counters": totals,
+            "spans": [
+                {"name": name, "labels": dict(labels), "count": h.count,
+                 "total_s": round(h.total, 6), "max_s": round(h.max, 6)}
+                for (name, labels), h in spans
+            ]
+        }
+
+    def write(self, prometheus_path: Optional[str] = None, json_path: Optional[str] = None):
+        """Write exports to disk, e.g. for a node_exporter textfile collector"""
+        if prometheus_path:
+            Path(prometheus_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(prometheus_path).write_text(self.to_prometheus())
+        if json_path:
+            Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(json_path).write_text(json.dumps(self.summary(), indent=2))
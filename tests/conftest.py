@@ -0,0 +1,46 @@
+import os
+import stat
+import textwrap
+import pytest
+from langchain.schema import AIMessage
+
+def install_stub(bin_dir, name, body):
+    """Write an executable python script standing in for a tool"""
+    path = bin_dir / name
+    path.write_text("#!/usr/bin/env python3\n" + textwrap.dedent(body))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+@pytest.fixture
+def stub_path(tmp_path, monkeypatch):
+    """Directory put first on PATH for install_stub() tools"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
+
+class SilentLLM:
+    """Plans and suggests nothing"""
+
+    def invoke(self, prompt):
+        return AIMessage(content="")
+
+class PlanningLLM:
+    """Answers the first prompt with `plan` and every later one with nothing"""
+
+    def __init__(self, plan="Tool: nmap\nTarget: 10.0.0.1\nDescription: scan host"):
+        self.plan = plan
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=self.plan if self.calls == 1 else "")
+
+class RecordingTool:
+    """Records the targets it is run against"""
+
+    def __init__(self):
+        self.targets = []
+
+    def run(self, target, **kwargs):
+        self.targets.append(target)
+        return {"open_ports": [], "target": target}
@@ -0,0 +1,48 @@
+from src.core.analysis_context import AnalysisContext
+
+def _result(i, noise=20000):
+    return {
+        "command": f"gobuster dir -u http://host{i}/",
+        "stdout": "x" * noise,
+        "parsed_results": {"discovered_items": [{"path": f"/p{j}"} for j in range(300)]},
+        "return_code": 0
+    }
+
+def test_only_new_results_are_rendered():
+    context = AnalysisContext(token_budget=2000)
+    first = context.build([_result(1)])
+    second = context.build([_result(2)])
+
+    assert "http://host1/" in first
+    assert "New results:\n" in second
+    new_section = second.split("New results:\n", 1)[1]
+    assert "host1" not in new_section
+    assert "host2" in new_section
+    # Earlier results survive as one-line digests
+    assert "- gobuster dir -u http://host1/: parsed_results.discovered_items=300, rc=0" in second
+
+def test_prompt_size_stays_flat_over_many_iterations():
+    context = AnalysisContext(token_budget=1000)
+    sizes = [len(context.build([_result(i), _result(i + 1000)])) for i in range(200)]
+
+    assert max(sizes) <= context.char_budget * 1.2
+    assert context.dropped_summary > 0
+    assert "earlier results omitted" in context.build([_result(999)])
+
+def test_build_many_renders_independent_chunks_against_one_summary():
+    context = AnalysisContext(token_budget=2000)
+    context.build([_result(1)])
+    prompts = context.build_many([[_result(2)], [_result(3)]])
+
+    assert len(prompts) == 2
+    assert "host3" not in prompts[0].split("New results:\n", 1)[1]
+    assert "host2" not in prompts[1]
+    assert all("http://host1/" in prompt for prompt in prompts)
+    assert len(context.summary) == 3
+
+def test_render_keeps_one_result_under_its_budget():
+    context = AnalysisContext(token_budget=2000)
+    rendered = context.render(_result(1), 1000)
+
+    assert len(rendered) <= 1000 and "http://host1/" in rendered
+    assert context.summary == []
@@ -0,0 +1,27 @@
+import json
+import os
+from benchmarks.run_benchmark import compare, main
+
+def test_benchmark_smoke_run(tmp_path):
+    path = os.environ["PATH"]
+    output = tmp_path / "bench.json"
+    assert main(["--targets", "2", "--tool-latency", "0", "--tool-hits", "3",
+                 "--output", str(output)]) == 0
+
+    [run] = json.loads(output.read_text())
+    # One nmap per target, then gobuster + ffuf for each of the two web ports
+    assert run["completed_tasks"] == 10
+    assert run["failed_tasks"] == 0
+    assert run["stages"]["execute"]["count"] == 10
+    # Rules plan the web follow-ups, so no nmap result reaches the LLM
+    assert run["llm_calls_avoided"] >= 1
+    assert run["tasks_per_s"] > 0
+    # Stub tools do not leak into later tests
+    assert os.environ["PATH"] == path and "FAKE_TOOL_HITS" not in os.environ
+
+def test_compare_flags_throughput_regressions():
+    baseline = [{"targets": 4, "tasks_per_s": 10.0}, {"targets": 16, "tasks_per_s": 20.0}]
+    current = [{"targets": 4, "tasks_per_s": 9.0}, {"targets": 16, "tasks_per_s": 12.0}]
+
+    [message] = compare(current, baseline, tolerance=0.2)
+    assert message.startswith("16 targets")
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from langchain.schema import AIMessage
+from src.agents.campaign import CampaignRunner, read_targets, target_scope
+from src.agents.security_agent import SecurityAgent
+from src.core.work_queue import WorkQueue
+
+class TargetLLM:
+    """Plans one nmap task for the target named in the instruction"""
+
+    def invoke(self, messages):
+        request = messages[-1].content
+        target = request.split("Assess ", 1)[1].split(":", 1)[0]
+        return AIMessage(content=json.dumps({"tool": "nmap", "target": target, "parameters": {"ports": "22"}}))
+
+class SshOnlyTool:
+    def run(self, target, **kwargs):
+        if os.environ.get("CAMPAIGN_SLOW"):
+            time.sleep(0.3)
+        return {"open_ports": [{"port": 22, "service": "ssh"}]}
+
+def fake_agent(scope, scan_id):
+    """Module-level so spawned workers can unpickle it"""
+    if os.environ.get("CAMPAIGN_FAIL") and scope.domains == ["broken.example.com"]:
+        raise RuntimeError("planner unavailable")
+    return SecurityAgent(scope, scan_id=scan_id, use_llm_cache=False, use_result_cache=False,
+                         llm=TargetLLM(), tools={"nmap": SshOnlyTool()})
+
+def _records(output_dir, campaign_id):
+    return [json.loads(line) for path in sorted(Path(output_dir, campaign_id).glob("*.ndjson"))
+            for line in path.read_text().splitlines()]
+
+def test_work_queue_claims_each_target_once(tmp_path):
+    path = str(tmp_path / "queue.db")
+    first, second = WorkQueue(path), WorkQueue(path)
+
+    assert first.add("c", ["a", "b", "a"]) == 2
+    assert first.add("c", ["b", "c"]) == 1
+    assert [first.claim("c", "w1"), second.claim("c", "w2"), first.claim("c", "w1")] == ["a", "b", "c"]
+    assert second.claim("c", "w2") is None
+
+    first.complete("c", "a", "scan-a")
+    second.fail("c", "b", "boom")
+    assert first.counts("c") == {"pending": 0, "running": 1, "completed": 1, "failed": 1}
+    assert first.requeue("c", ["failed"]) == 1
+    assert first.abandon("c", "worker died") == 1
+    assert [(t["target"], t["status"], t["attempts"]) for t in first.targets("c")] == [
+        ("a", "completed", 1), ("b", "pending", 1), ("c", "failed", 1)
+    ]
+    first.close()
+    second.close()
+
+def test_targets_and_scope(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text("10.0.0.1\n# lab\n\nhttps://app.example.com:8443/login  # web\n10.0.0.1\n10.0.1.0/24\n")
+
+    assert read_targets(str(path)) == ["10.0.0.1", "https://app.example.com:8443/login", "10.0.1.0/24"]
+    assert target_scope("10.0.1.0/24").is_in_scope("10.0.1.7")
+    assert target_scope("https://app.example.com:8443/login").is_in_scope("api.app.example.com")
+    assert not target_scope("10.0.0.1").is_in_scope("10.0.0.2")
+
+def test_campaign_runs_targets_across_workers_and_reruns_failures(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAMPAIGN_FAIL", "1")
+    output_dir = str(tmp_path / "out")
+    runner = CampaignRunner(str(tmp_path / "queue.db"), workers=2, output_dir=output_dir,
+                            agent_factory=fake_agent, instruction="Assess {target}: ports",
+                            progress_interval=0.5)
+    targets = [f"10.0.0.{i}" for i in range(1, 6)] + ["broken.example.com"]
+    runner.add_targets("lab", targets)
+
+    result = runner.run("lab")
+
+    assert result["counts"] == {"pending": 0, "running": 0, "completed": 5, "failed": 1}
+    assert len(result["outputs"]) == 2
+    records = _records(output_dir, "lab")
+    assert sorted(r["target"] for r in records) == sorted(targets)
+    assert {r["worker"] for r in records} <= {"worker-0", "worker-1"}
+    completed = next(r for r in records if r["target"] == "10.0.0.3")
+    assert completed["summary"]["completed_tasks"] == 1
+    assert completed["findings"][0]["port"] == 22
+
+    monkeypatch.delenv("CAMPAIGN_FAIL")
+    assert runner.run("lab")["counts"]["failed"] == 1
+    rerun = runner.run("lab", rerun_failed=True)
+    runner.close()
+
+    assert rerun["workers"] == 1
+    assert rerun["counts"] == {"pending": 0, "running": 0, "completed": 6, "failed": 0}
+    assert sorted(r["status"] for r in _records(output_dir, "lab") if r["target"] == "broken.example.com") == \
+        ["completed", "failed"]
+
+def test_stop_drains_after_current_targets(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAMPAIGN_SLOW", "1")
+    output_dir = str(tmp_path / "out")
+    runner = CampaignRunner(str(tmp_path / "queue.db"), workers=1, output_dir=output_dir,
+                            agent_factory=fake_agent, instruction="Assess {target}: ports",
+                            progress_interval=0.2)
+    runner.add_targets("slow", [f"10.0.0.{i}" for i in range(1, 21)])
+
+    def stop_after_first_result():
+        output = Path(output_dir, "slow", "worker-0.ndjson")
+        while not (output.exists() and output.read_text()):
+            time.sleep(0.05)
+        runner.stop()
+
+    threading.Thread(target=stop_after_first_result, daemon=True).start()
+    result = runner.run("slow")
+    runner.close()
+
+    counts = result["counts"]
+    assert result["drained"]
+    assert counts["running"] == 0 and counts["failed"] == 0
+    assert 1 <= counts["completed"] < 20
+    assert counts["pending"] == 20 - counts["completed"]
+    assert len(_records(output_dir, "slow")) == counts["completed"]
@@ -0,0 +1,95 @@
+import threading
+import time
+import pytest
+from src.core.executor import TaskExecutor
+from src.core.task_manager import TaskManager, TaskStatus
+
+@pytest.fixture
+def task_manager():
+    return TaskManager()
+
+def test_independent_tasks_run_concurrently(task_manager):
+    tasks = [
+        task_manager.add_task(description=f"scan {i}", tool="nmap", parameters={"target": f"10.0.0.{i}"})
+        for i in range(4)
+    ]
+
+    def execute(task):
+        time.sleep(0.2)
+        task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result={"id": task.id})
+        return {"id": task.id}
+
+    start = time.monotonic()
+    results = TaskExecutor(max_workers=4).run_all(tasks, execute)
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 4
+    assert elapsed < 0.6
+    assert all(t.status == TaskStatus.COMPLETED for t in task_manager.tasks)
+
+def test_per_tool_limit_is_respected(task_manager):
+    tasks = [
+        task_manager.add_task(description=f"scan {i}", tool="nmap", parameters={"target": f"10.0.0.{i}"})
+        for i in range(3)
+    ] + [
+        task_manager.add_task(description=f"dirs {i}", tool="gobuster", parameters={"target": f"http://10.0.0.{i}"})
+        for i in range(3)
+    ]
+    lock = threading.Lock()
+    active = {"nmap": 0, "gobuster": 0}
+    peak = {"nmap": 0, "gobuster": 0}
+
+    def execute(task):
+        with lock:
+            active[task.tool] += 1
+            peak[task.tool] = max(peak[task.tool], active[task.tool])
+        time.sleep(0.05)
+        with lock:
+            active[task.tool] -= 1
+        return {"tool": task.tool}
+
+    results = TaskExecutor(max_workers=4, tool_limits={"nmap": 1}).run_all(tasks, execute)
+
+    assert len(results) == 6
+    assert peak["nmap"] == 1
+    assert peak["gobuster"] > 1
+
+def test_pending_tasks_are_retried(task_manager):
+    task = task_manager.add_task(description="flaky", tool="nmap", parameters={"target": "10.0.0.1"})
+    attempts = []
+
+    def execute(task):
+        attempts.append(task.retries)
+        if len(attempts) < 3:
+            task.retries += 1
+            task_manager.update_task_status(task.id, TaskStatus.PENDING)
+            return None
+        task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result={"ok": True})
+        return {"ok": True}
+
+    results = TaskExecutor(max_workers=2, retry_delay=0.01).run_all([task], execute)
+
+    assert results == [{"ok": True}]
+    assert attempts == [0, 1, 2]
+    assert task.status == TaskStatus.COMPLETED
+
+def test_retries_back_off_while_other_tasks_run(task_manager):
+    flaky = task_manager.add_task(description="flaky", tool="nmap", parameters={"target": "10.0.0.1"})
+    other = task_manager.add_task(description="other", tool="nmap", parameters={"target": "10.0.0.2"})
+    started = {}
+
+    def execute(task):
+        started.setdefault(task.id, []).append(time.monotonic())
+        if task is flaky and task.retries < 2:
+            task.retries += 1
+            task_manager.update_task_status(task.id, TaskStatus.PENDING)
+            return None
+        return {"id": task.id}
+
+    results = TaskExecutor(max_workers=1, retry_delay=0.2).run_all([flaky, other], execute)
+
+    assert len(results) == 2
+    first, second, third = started[flaky.id]
+    # 0.2s then 0.4s between attempts; the other task ran during the first wait
+    assert second - first >= 0.2 and third - second >= 0.4
+    assert first < started[other.id][0] < second
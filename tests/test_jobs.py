@@ -0,0 +1,72 @@
+import threading
+from conftest import PlanningLLM
+from src.agents.security_agent import SecurityAgent
+from src.core.jobs import JobManager
+from src.core.scope import ScopeDefinition
+
+class GatedTool:
+    def __init__(self, gate: threading.Event):
+        self.gate = gate
+
+    def run(self, target, **kwargs):
+        self.gate.wait(timeout=5)
+        return {"open_ports": [{"host": target, "port": 80, "protocol": "tcp", "service": "http"}]}
+
+def test_jobs_run_in_background_and_expose_progress():
+    gate = threading.Event()
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    tools = {"nmap": GatedTool(gate)}
+
+    def build_agent(scope, scan_id):
+        agent = SecurityAgent(scope, scan_id=scan_id, tools=tools,
+                              use_llm_cache=False, use_result_cache=False)
+        agent.llm = PlanningLLM()
+        return agent
+
+    manager = JobManager(build_agent, max_concurrent_scans=2)
+    first = manager.submit(scope, "scan the lab")
+    second = manager.submit(scope, "scan the lab again")
+
+    # Both scans are in flight at once and submit() returned without waiting
+    assert {manager.status(first)["status"], manager.status(second)["status"]} <= {"queued", "running"}
+    gate.set()
+
+    for job_id in (first, second):
+        snapshot = manager.wait(job_id, timeout=10)
+        assert snapshot["status"] == "completed"
+        assert snapshot["summary"]["completed"] == 1
+        assert snapshot["findings"] == ["Port 80/tcp is open on 10.0.0.1 (http)"]
+        assert snapshot["report"]["summary"]["total_findings"] == 1
+    assert [job["job_id"] for job in manager.list_jobs()] == [second, first]
+    manager.shutdown()
+
+def test_failed_job_reports_error():
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+    class BrokenAgent:
+        task_manager = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False).task_manager
+
+        def run(self, instruction):
+            raise RuntimeError("ollama unreachable")
+
+    manager = JobManager(lambda scope, scan_id: BrokenAgent())
+    snapshot = manager.wait(manager.submit(scope, "scan"), timeout=5)
+    assert snapshot["status"] == "failed"
+    assert snapshot["error"] == "ollama unreachable"
+    manager.shutdown()
+
+def test_only_the_newest_finished_jobs_are_kept():
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+    class QuickAgent:
+        task_manager = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False).task_manager
+
+        def run(self, instruction):
+            return {"summary": {}}
+
+    manager = JobManager(lambda scope, scan_id: QuickAgent(), max_concurrent_scans=1, max_finished_jobs=2)
+    jobs = [manager.submit(scope, f"scan {i}") for i in range(4)]
+    manager.shutdown()
+
+    assert [job["job_id"] for job in manager.list_jobs()] == [jobs[3], jobs[2]]
+    assert manager.status(jobs[0]) is None
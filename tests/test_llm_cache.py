@@ -0,0 +1,90 @@
+import sqlite3
+import time
+import pytest
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from src.core.llm_cache import CachedChatModel
+from src.utils.cache import DiskCache
+
+class FakeChatModel:
+    model = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"response {self.calls} to {messages[-1].content}")
+
+def _prompt(text):
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content="You are a cybersecurity expert."),
+        HumanMessage(content=text)
+    ])
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "llm.db"))
+
+def test_identical_prompts_hit_the_cache(cache):
+    llm = FakeChatModel()
+    model = CachedChatModel(llm, cache=cache)
+
+    first = model.invoke(_prompt("scan example.com"))
+    second = model.invoke(_prompt("scan example.com"))
+    model.invoke(_prompt("scan other.com"))
+
+    assert second.content == first.content
+    assert llm.calls == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_bypass_and_disabled_cache(cache):
+    llm = FakeChatModel()
+    model = CachedChatModel(llm, cache=cache)
+    model.invoke(_prompt("scan"))
+    model.invoke(_prompt("scan"), bypass=True)
+    assert llm.calls == 2
+
+    uncached = CachedChatModel(llm, cache=None)
+    uncached.invoke(_prompt("scan"))
+    assert llm.calls == 3
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "llm.db")
+    CachedChatModel(FakeChatModel(), cache=DiskCache(path)).invoke(_prompt("scan"))
+
+    llm = FakeChatModel()
+    CachedChatModel(llm, cache=DiskCache(path)).invoke(_prompt("scan"))
+    assert llm.calls == 0
+
+def test_eviction_by_count_and_age(tmp_path):
+    cache = DiskCache(str(tmp_path / "c.db"), max_entries=2, max_age=None)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+    aging = DiskCache(str(tmp_path / "d.db"), max_age=0.05)
+    aging.set("k", "v")
+    time.sleep(0.1)
+    assert aging.get("k") is None
+
+def test_busy_database_degrades_to_misses_and_skipped_writes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    cache = DiskCache(path, busy_timeout=0.1)
+    cache.set("a", "1")
+
+    # Another worker process holds the write lock
+    other = sqlite3.connect(path)
+    other.execute("BEGIN IMMEDIATE")
+    assert cache.get("a") == "1"
+    cache.set("b", "2")
+    other.rollback()
+    other.close()
+
+    assert cache.get("b") is None
+    cache.set("b", "2")
+    assert cache.get("b") == "2"
@@ -0,0 +1,93 @@
+import gzip
+import json
+import sys
+import threading
+import pytest
+from loguru import logger
+from src.utils.logger import JsonLinesSink, LoggerSetup, get_audit_logger
+
+class _CountingRepr:
+    calls = 0
+
+    def __repr__(self):
+        _CountingRepr.calls += 1
+        return "counted"
+
+def _read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_payloads_are_inline_or_offloaded(tmp_path):
+    sink = JsonLinesSink(tmp_path / "audit.jsonl", max_payload_chars=100)
+    handler_id = logger.add(sink, format="{message}", level="DEBUG")
+    audit = get_audit_logger("scan-1")
+    try:
+        result = {"results": [{"url": "/a"}]}
+        audit.tool_complete("ffuf", result)
+        # The line records the result as it was when it was logged
+        result["results"].append({"url": "/later"})
+        audit.tool_complete("ffuf", {"results": [{"url": f"/path-{i}"} for i in range(100)]})
+    finally:
+        logger.remove(handler_id)
+
+    entries = [e for e in _read_lines(tmp_path / "audit.jsonl") if "payload" in e]
+    assert len(entries) == 2
+    assert all(e["scan_id"] == "scan-1" for e in entries)
+    assert entries[0]["payload"] == {"results": [{"url": "/a"}]}
+
+    offloaded = entries[1]["payload"]
+    assert offloaded["truncated"] is True
+    assert len(offloaded["preview"]) <= 100
+    with gzip.open(offloaded["blob"], "rt") as f:
+        assert len(json.load(f)["results"]) == 100
+
+@pytest.fixture
+def no_default_handler():
+    logger.remove()
+    yield
+    logger.add(sys.stderr)
+
+def test_messages_are_not_rendered_when_level_is_filtered(no_default_handler):
+    handler_id = logger.add(lambda message: None, level="ERROR")
+    _CountingRepr.calls = 0
+    try:
+        get_audit_logger("scan-1").tool_start("nmap", {"target": _CountingRepr()})
+    finally:
+        logger.remove(handler_id)
+    assert _CountingRepr.calls == 0
+
+def test_rotation_compresses_on_writer_thread(tmp_path):
+    sink = JsonLinesSink(tmp_path / "audit.jsonl", rotation_bytes=200)
+    rotating_threads = set()
+    rotate = sink._rotate
+
+    def recording_rotate():
+        rotating_threads.add(threading.current_thread())
+        rotate()
+
+    sink._rotate = recording_rotate
+    handler_id = logger.add(sink, format="{message}", level="DEBUG")
+    try:
+        for i in range(20):
+            logger.info(f"line {i}")
+    finally:
+        logger.remove(handler_id)
+
+    rotated = list(tmp_path.glob("audit.*.jsonl.gz"))
+    assert rotated
+    assert rotating_threads == {sink._thread}
+    lines = sum(len(gzip.open(p, "rt").read().splitlines()) for p in rotated)
+    lines += len((tmp_path / "audit.jsonl").read_text().splitlines())
+    assert lines == 20
+
+def test_text_sinks_skip_payload_records(tmp_path, no_default_handler):
+    setup = LoggerSetup(log_dir=str(tmp_path))
+    try:
+        get_audit_logger("scan-2").tool_complete("gobuster", {"secret_blob": "x" * 10000})
+    finally:
+        setup.shutdown()
+
+    text = setup.log_file.read_text()
+    assert "Completed gobuster scan successfully" in text
+    assert "secret_blob" not in text
+    entries = _read_lines(setup.json_file)
+    assert any(e.get("payload", {}).get("truncated") for e in entries)
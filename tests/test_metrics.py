@@ -0,0 +1,63 @@
+import pytest
+from conftest import PlanningLLM
+from src.agents.security_agent import SecurityAgent
+from src.core.scope import ScopeDefinition
+from src.utils.metrics import Metrics
+
+def test_spans_and_counters_export_to_prometheus():
+    metrics = Metrics(scan_id="s1")
+    with metrics.span("tool_run", tool="nmap", target="10.0.0.1"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.span("tool_run", tool="nmap", target="10.0.0.1"):
+            raise RuntimeError("boom")
+    metrics.inc("retries", tool="nmap")
+    metrics.inc("retries", tool="nmap")
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE security_agent_tool_run_seconds histogram" in text
+    assert ('security_agent_tool_run_seconds_count{scan_id="s1",status="ok",'
+            'target="10.0.0.1",tool="nmap"} 1') in text
+    assert 'status="error"' in text
+    assert 'le="+Inf"' in text
+    assert 'security_agent_retries_total{scan_id="s1",tool="nmap"} 2' in text
+    assert metrics.counter("retries", tool="nmap") == 2
+
+def test_summary_totals_by_stage():
+    metrics = Metrics(scan_id="s1")
+    metrics.observe("plan", 0.5)
+    metrics.observe("plan", 1.5)
+    metrics.inc("scope_violations")
+
+    summary = metrics.summary()
+
+    assert summary["stages"]["plan"] == {"count": 2, "total_s": 2.0, "max_s": 1.5}
+    assert summary["counters"] == {"scope_violations": 1}
+
+class FlakyTool:
+    calls = 0
+
+    def run(self, **parameters):
+        FlakyTool.calls += 1
+        if FlakyTool.calls == 1:
+            raise RuntimeError("transient")
+        return {"open_ports": []}
+
+def test_agent_run_reports_stage_metrics(tmp_path):
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    agent = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False,
+                          metrics_dir=str(tmp_path / "metrics"))
+    agent.llm = PlanningLLM(
+        "Tool: nmap\nTarget: 10.0.0.1\nDescription: scan\n\n"
+        "Tool: nmap\nTarget: 8.8.8.8\nDescription: out of scope"
+    )
+    agent.tools["nmap"] = FlakyTool()
+
+    report = agent.run("scan the lab")
+
+    metrics = report["metrics"]
+    assert set(metrics["stages"]) >= {"plan", "execute", "tool_run", "analyze", "report"}
+    assert metrics["counters"]["retries"] == 1
+    assert metrics["counters"]["scope_violations"] == 1
+    assert (tmp_path / "metrics" / f"{agent.scan_id}.prom").exists()
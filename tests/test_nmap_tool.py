@@ -0,0 +1,106 @@
+import io
+from src.tools.nmap_tool import NmapTool
+
+HOST = """
+<host><status state="{state}"/>
+<address addr="10.0.{i}.{j}" addrtype="ipv4"/>
+<hostnames><hostname name="h{i}-{j}.lab"/></hostnames>
+<ports>
+<port protocol="tcp" portid="22"><state state="open"/><service name="ssh" product="OpenSSH" version="8.9"/></port>
+<port protocol="tcp" portid="80"><state state="closed"/><service name="http"/></port>
+</ports></host>
+"""
+
+def _xml(count, state="up"):
+    hosts = "".join(HOST.format(i=n // 256, j=n % 256, state=state) for n in range(count))
+    return (
+        '<?xml version="1.0"?><nmaprun scanner="nmap">' + hosts +
+        '<runstats><finished elapsed="12.5" summary="done"/>'
+        f'<hosts up="{count}" down="0" total="{count}"/></runstats></nmaprun>'
+    ).encode()
+
+def test_iter_hosts_builds_compact_records():
+    stats = {}
+    [host] = list(NmapTool().iter_hosts(io.BytesIO(_xml(1)), stats))
+
+    assert host == {
+        "address": "10.0.0.0",
+        "hostnames": ["h0-0.lab"],
+        "status": "up",
+        "ports": [
+            {"port": 22, "protocol": "tcp", "state": "open",
+             "service": "ssh", "product": "OpenSSH", "version": "8.9"},
+            {"port": 80, "protocol": "tcp", "state": "closed", "service": "http"},
+        ]
+    }
+    assert stats["hosts_up"] == 1
+    assert stats["elapsed"] == 12.5
+    assert NmapTool.open_ports([host]) == [
+        {"host": "10.0.0.0", "port": 22, "protocol": "tcp", "state": "open",
+         "service": "ssh", "product": "OpenSSH", "version": "8.9"}
+    ]
+
+def test_down_hosts_are_skipped():
+    assert list(NmapTool().iter_hosts(io.BytesIO(_xml(3, state="down")))) == []
+
+def test_iter_hosts_is_incremental():
+    tool = NmapTool()
+    hosts = tool.iter_hosts(io.BytesIO(_xml(2000)))
+    first = next(hosts)
+    assert first["address"] == "10.0.0.0"
+    assert sum(1 for _ in hosts) == 1999
+
+def test_run_parses_xml_from_stdout(tmp_path, monkeypatch):
+    import os
+    import stat
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    xml_file = tmp_path / "scan.xml"
+    xml_file.write_bytes(_xml(2))
+    stub = bin_dir / "nmap"
+    stub.write_text(f"#!/bin/sh\ncat {xml_file}\n")
+    stub.chmod(stub.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    result = NmapTool().run("10.0.0.0/30", ports="22,80")
+
+    assert result["command"] == "nmap -sV -oX - -p 22,80 10.0.0.0/30"
+    assert [h["address"] for h in result["hosts"]] == ["10.0.0.0", "10.0.0.1"]
+    assert len(result["open_ports"]) == 2
+
+def test_large_ranges_are_sharded_and_merged(tmp_path, monkeypatch):
+    import os
+    import stat
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    marker = tmp_path / "failed_once"
+    stub = bin_dir / "nmap"
+    stub.write_text(f"""#!/usr/bin/env python3
+import ipaddress, os, sys
+target = sys.argv[-1]
+if target == "10.0.1.0/24" and not os.path.exists({str(marker)!r}):
+    open({str(marker)!r}, "w").close()
+    sys.exit(1)
+addr = ipaddress.ip_network(target).network_address
+print('<?xml version="1.0"?><nmaprun><host><status state="up"/>'
+      f'<address addr="{{addr}}" addrtype="ipv4"/><ports><port protocol="tcp" portid="80">'
+      '<state state="open"/><service name="http"/></port></ports></host>'
+      '<runstats><hosts up="1" down="255" total="256"/></runstats></nmaprun>')
+""")
+    stub.chmod(stub.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    progress = []
+
+    tool = NmapTool(shard_size=256, workers=4, shard_retries=1)
+    assert tool.shard_target("10.0.0.0/22") == [
+        "10.0.0.0/24", "10.0.1.0/24", "10.0.2.0/24", "10.0.3.0/24"
+    ]
+    assert tool.shard_target("10.0.0.0/24") == ["10.0.0.0/24"]
+
+    result = tool.run("10.0.0.0/22", progress=lambda done, total: progress.append((done, total)))
+
+    assert [h["address"] for h in result["hosts"]] == ["10.0.0.0", "10.0.1.0", "10.0.2.0", "10.0.3.0"]
+    assert result["stats"]["hosts_total"] == 1024
+    assert result["failed_shards"] == []
+    assert progress[-1] == (4, 4)
+    assert marker.exists()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from langchain.schema import HumanMessage, SystemMessage
+from src.agents.security_agent import SecurityAgent
+from src.core.llm_cache import CachedChatModel
+from src.core.ollama_client import AsyncOllamaChat, OllamaError
+from src.core.scope import ScopeDefinition
+from src.utils.cache import DiskCache
+
+class StubOllama:
+    """Threaded stand-in for the Ollama /api/chat endpoint"""
+
+    def __init__(self, delay: float = 0.0, failures: int = 0, status: int = 503):
+        self.delay = delay
+        self.failures = failures
+        self.status = status
+        self.requests = []
+        self.peers = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append(body)
+                    stub.peers.add(self.client_address)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    fail = stub.failures > 0
+                    stub.failures -= fail
+                try:
+                    time.sleep(stub.delay)
+                    if fail:
+                        status, reply = stub.status, {"error": "model is loading"}
+                    else:
+                        content = f"echo: {body['messages'][-1]['content']}"
+                        status, reply = 200, {"model": body["model"], "done": True,
+                                              "message": {"role": "assistant", "content": content}}
+                    data = json.dumps(reply).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(StubOllama(**kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+def test_ainvoke_sends_chat_request(stub):
+    server = stub()
+    client = AsyncOllamaChat(model="mistral", base_url=server.url, options={"temperature": 0})
+
+    async def main():
+        try:
+            return await client.ainvoke([SystemMessage(content="Be brief"), HumanMessage(content="hello")])
+        finally:
+            await client.aclose()
+
+    response = asyncio.run(main())
+
+    assert response.content == "echo: hello"
+    assert server.requests[0]["messages"] == [{"role": "system", "content": "Be brief"},
+                                              {"role": "user", "content": "hello"}]
+    assert server.requests[0]["stream"] is False
+    assert server.requests[0]["options"] == {"temperature": 0}
+
+def test_batch_runs_concurrently_within_limit_over_pooled_connections(stub):
+    server = stub(delay=0.2)
+    client = AsyncOllamaChat(base_url=server.url, max_concurrency=3)
+    try:
+        start = time.monotonic()
+        responses = client.batch([f"prompt {i}" for i in range(9)])
+        elapsed = time.monotonic() - start
+        client.batch([f"again {i}" for i in range(3)])
+    finally:
+        client.close()
+
+    assert [r.content for r in responses] == [f"echo: prompt {i}" for i in range(9)]
+    assert server.max_in_flight == 3
+    # Three waves of 0.2s rather than nine sequential calls
+    assert elapsed < 1.5
+    # Keep-alive: twelve requests over at most three connections
+    assert len(server.peers) <= 3
+
+def test_retries_transient_errors_with_backoff(stub):
+    server = stub(failures=2, status=503)
+    client = AsyncOllamaChat(base_url=server.url, retries=3, backoff=0.01)
+    try:
+        assert client.invoke("hi").content == "echo: hi"
+    finally:
+        client.close()
+
+    assert len(server.requests) == 3
+
+def test_gives_up_after_retries_and_on_client_errors(stub):
+    failing = stub(failures=10, status=429)
+    rejecting = stub(failures=10, status=404)
+    client = AsyncOllamaChat(base_url=failing.url, retries=2, backoff=0.01)
+    wrong_model = AsyncOllamaChat(base_url=rejecting.url, retries=2, backoff=0.01)
+    try:
+        with pytest.raises(OllamaError, match="after 3 attempts"):
+            client.invoke("hi")
+        with pytest.raises(OllamaError, match="404"):
+            wrong_model.invoke("hi")
+    finally:
+        client.close()
+        wrong_model.close()
+
+    assert len(failing.requests) == 3
+    assert len(rejecting.requests) == 1
+
+def test_per_call_timeout(stub):
+    server = stub(delay=0.5)
+    client = AsyncOllamaChat(base_url=server.url, timeout=5, retries=1, backoff=0.01)
+    try:
+        with pytest.raises(OllamaError, match="timed out"):
+            client.invoke("slow", timeout=0.1)
+    finally:
+        client.close()
+
+    assert len(server.requests) == 2
+
+def test_cached_batch_only_sends_misses(stub, tmp_path):
+    server = stub()
+    client = AsyncOllamaChat(base_url=server.url)
+    llm = CachedChatModel(client, cache=DiskCache(str(tmp_path / "llm.db")))
+    try:
+        llm.invoke("a")
+        responses = llm.batch(["a", "b", "c"])
+    finally:
+        client.close()
+
+    assert [r.content for r in responses] == ["echo: a", "echo: b", "echo: c"]
+    assert sorted(r["messages"][-1]["content"] for r in server.requests) == ["a", "b", "c"]
+
+def test_agent_analyzes_result_chunks_in_one_batch(stub):
+    server = stub(delay=0.1)
+    client = AsyncOllamaChat(base_url=server.url, max_concurrency=4)
+    agent = SecurityAgent(ScopeDefinition(domains=["example.com"], ip_ranges=[], wildcards=[]),
+                          llm=client, use_llm_cache=False, use_result_cache=False)
+    try:
+        agent._analyze_results([{"command": f"nmap host{i}", "open_ports": [80]} for i in range(4)])
+    finally:
+        client.close()
+
+    assert len(server.requests) == 4
+    assert server.max_in_flight == 4
+
+def test_clients_are_closed_with_their_event_loop(stub):
+    server = stub()
+    client = AsyncOllamaChat(base_url=server.url)
+    clients = []
+
+    async def main():
+        clients.append((await client._pool())[0])
+        return await client.ainvoke("hello")
+
+    for _ in range(2):
+        assert asyncio.run(main()).content == "echo: hello"
+
+    assert client._pools == {}
+    assert len(clients) == 2 and all(c.is_closed for c in clients)
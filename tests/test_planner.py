@@ -0,0 +1,99 @@
+import json
+import re
+from langchain.schema import AIMessage
+from src.agents.security_agent import SecurityAgent
+from src.agents.tool_agent import ToolAgent
+from src.core.planner import BatchPlanner, parse_plan
+from src.core.scope import ScopeDefinition
+
+SCOPE = ScopeDefinition(domains=["example.com"], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+class BatchLLM:
+    """Answers each "[id] ..." request line with one nmap task for the IP it names"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        lines = []
+        for group, ip in re.findall(r"^\[([^\]]+)\] .*?((?:\d+\.){3}\d+)", prompt.format_messages()[-1].content, re.M):
+            lines.append(json.dumps({"group": group, "tool": "nmap", "target": ip,
+                                     "parameters": {"ports": "80"}, "description": f"scan {ip}"}))
+        return AIMessage(content="Here is the plan:\n" + "\n".join(lines))
+
+def test_parse_plan_reads_json_lines_and_legacy_blocks():
+    text = "\n".join([
+        "```json",
+        '{"group": "a", "tool": "nmap", "target": "10.0.0.1", "parameters": {"ports": "22"}}',
+        "{not json",
+        "```",
+        "Tool: gobuster",
+        "Target: http://example.com:8080/",
+        "Parameters: {'wordlist': 'common.txt'}",
+        "Description: dirs",
+        "Tool: ffuf",
+        "Parameters: __import__('os').system('true')"
+    ])
+
+    tasks = parse_plan(text)
+
+    assert tasks == [
+        {"tool": "nmap", "parameters": {"ports": "22", "target": "10.0.0.1"},
+         "description": "nmap on 10.0.0.1", "group": "a"},
+        {"tool": "gobuster", "parameters": {"wordlist": "common.txt", "target": "http://example.com:8080/"},
+         "description": "dirs"}
+    ]
+
+def test_batch_planner_maps_tasks_back_to_requests():
+    llm = BatchLLM()
+    planner = BatchPlanner(llm, SCOPE, batch_size=20)
+    requests = {f"host-{i}": f"Scan 10.0.0.{i} for open ports" for i in range(1, 46)}
+    requests["outside"] = "Scan 192.168.9.9 for open ports"
+
+    planned = planner.plan(requests)
+
+    assert llm.calls == 3
+    assert planned["host-7"][0]["parameters"]["target"] == "10.0.0.7"
+    assert all(len(planned[f"host-{i}"]) == 1 for i in range(1, 46))
+    assert planned["outside"] == []
+    assert [t["parameters"]["target"] for t in planner.rejected] == ["192.168.9.9"]
+
+def test_agent_plan_batch_adds_tasks_per_request():
+    agent = SecurityAgent(SCOPE, use_llm_cache=False, use_result_cache=False)
+    agent.llm = BatchLLM()
+
+    planned = agent.plan_batch({"a": "Scan 10.0.0.1", "b": "Scan 10.0.0.2", "c": "Scan 8.8.8.8"})
+
+    assert agent.llm.calls == 1
+    assert [t.parameters["target"] for t in planned["a"]] == ["10.0.0.1"]
+    assert planned["c"] == []
+    assert agent.task_manager.count() == 2
+    assert agent.metrics.counter("scope_violations") == 1
+
+def test_tool_agent_analyzes_outputs_in_one_call():
+    class SuggestingLLM:
+        calls = 0
+        prompt_chars = 0
+
+        def invoke(self, prompt):
+            SuggestingLLM.calls += 1
+            SuggestingLLM.prompt_chars = len(prompt.format_messages()[-1].content)
+            return AIMessage(content="\n".join([
+                '{"group": "0", "tool": "gobuster", "target": "http://10.0.0.1/", "parameters": {"wordlist": "w.txt"}}',
+                '{"group": "1", "tool": "nmap", "target": "10.0.0.2"}',
+                '{"group": "1", "tool": "nmap", "target": "evil.org"}'
+            ]))
+
+    agent = ToolAgent(SCOPE, use_llm_cache=False, analysis_token_budget=500)
+    agent.llm = SuggestingLLM()
+
+    suggestions = agent.analyze_outputs([("nmap", {"open_ports": [80], "raw_output": "x" * 50000}),
+                                         ("nmap", {"open_ports": []})])
+
+    assert SuggestingLLM.calls == 1
+    # The raw output was cut down to the analysis budget
+    assert SuggestingLLM.prompt_chars < 2500
+    assert suggestions[0] == [{"tool": "gobuster", "target": "http://10.0.0.1/",
+                               "parameters": {"wordlist": "w.txt", "target": "http://10.0.0.1/"}}]
+    assert [s["target"] for s in suggestions[1]] == ["10.0.0.2"]
@@ -0,0 +1,143 @@
+import threading
+import time
+import pytest
+from src.agents.security_agent import SecurityAgent
+from src.core.rate_limit import HostRateLimiter, Lease, host_of, tool_arguments, unrequested_statuses
+from src.core.scope import ScopeDefinition
+from src.tools.ffuf_tool import FfufTool
+from src.tools.gobuster_tool import GobusterTool
+from src.tools.streaming import ToolInterrupted
+from src.tools.wordlist import WordlistCache
+
+def test_leases_split_the_host_budget_and_wait_for_a_free_share():
+    limiter = HostRateLimiter(initial_rate=40, max_leases=2, per_thread_rate=5)
+    granted = []
+
+    with limiter.lease("a.example.com", max_threads=40) as first:
+        with limiter.lease("a.example.com", max_threads=40) as second:
+            waiter = threading.Thread(
+                target=lambda: granted.append(limiter.lease("a.example.com", 40).__enter__()))
+            waiter.start()
+            time.sleep(0.2)
+            assert granted == []
+            # Other hosts have their own budget
+            with limiter.lease("b.example.com", max_threads=3) as other:
+                assert other == Lease("b.example.com", 20.0, 3)
+        waiter.join(timeout=2)
+
+    assert (first.rate, first.threads) == (20.0, 4)
+    assert second.rate == 20.0
+    assert granted[0].rate == 20.0
+
+def test_lease_times_out_without_budget():
+    limiter = HostRateLimiter(max_leases=1)
+    with limiter.lease("a", max_threads=10):
+        with pytest.raises(TimeoutError):
+            with limiter.lease("a", max_threads=10, timeout=0.1):
+                pass
+
+def test_rate_backs_off_on_throttling_and_ramps_up_when_healthy():
+    limiter = HostRateLimiter(initial_rate=40, min_rate=5, max_rate=60, increase=10, decrease=0.5)
+
+    limiter.observe("a", responses=100, throttled=20)
+    assert limiter.rate("a") == 20
+    limiter.observe("a", failed=True)
+    limiter.observe("a", failed=True)
+    assert limiter.rate("a") == 5
+    for _ in range(10):
+        limiter.observe("a", responses=100, throttled=1)
+    assert limiter.rate("a") == 60
+    assert limiter.stats()["a"] == {"rate": 60, "active": 0, "responses": 1100,
+                                    "throttled": 30, "failures": 2}
+
+def test_tool_arguments_and_commands(tmp_path):
+    lease = Lease("a", rate=25.0, threads=5)
+    assert tool_arguments("ffuf", {"target": "http://a/FUZZ"}, lease) == \
+        {"target": "http://a/FUZZ", "threads": 5, "rate": 25, "mc": "200-299,301,302,307,401,403,405,500,429,503"}
+    assert tool_arguments("gobuster", {"target": "http://a/", "threads": 2, "status_codes": "200,429"}, lease) == \
+        {"target": "http://a/", "threads": 2, "delay": "80ms", "status_codes": "200,429,503"}
+    assert unrequested_statuses("gobuster", {"status_codes": "200,429"}) == {503}
+    assert unrequested_statuses("ffuf", {"mc": "all"}) == set()
+    # Requested through a range, so 429/503 results are findings
+    assert unrequested_statuses("ffuf", {"mc": "200,400-599"}) == set()
+    assert unrequested_statuses("ffuf", {"mc": "200-299, 500-503"}) == {429}
+    assert tool_arguments("nmap", {"target": "a"}, lease) == {"target": "a"}
+    assert host_of("https://App.Example.com:8443/x") == "app.example.com"
+
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("admin\n")
+    wordlists = WordlistCache(str(tmp_path / "cache"))
+    prepared = wordlists.prepare(str(wordlist))
+    gobuster = GobusterTool(wordlists)._build_command("http://a/", prepared, "dir", 2, "200", "80ms", {})
+    ffuf = FfufTool(wordlists)._build_command("http://a/FUZZ", prepared, "php", 5, 25, {})
+    assert gobuster[-2:] == ["--delay", "80ms"]
+    assert ffuf[-2:] == ["-rate", "25"]
+
+def test_agent_paces_fuzzers_and_adapts_to_429s():
+    class RecordingFfuf:
+        calls = []
+
+        def run(self, target, **kwargs):
+            self.calls.append(kwargs)
+            statuses = [429] * 5 + [200] * 5
+            return {"requests": 20, "results": {"results": [
+                {"url": target.replace("FUZZ", f"p{i}"), "status": s} for i, s in enumerate(statuses)
+            ]}}
+
+    limiter = HostRateLimiter(initial_rate=40, max_leases=1, decrease=0.5)
+    agent = SecurityAgent(ScopeDefinition(domains=["example.com"], ip_ranges=[], wildcards=[]),
+                          use_llm_cache=False, use_result_cache=False, rate_limiter=limiter, task_timeout=None,
+                          tools={"ffuf": RecordingFfuf()})
+    for path in ("a", "b"):
+        task = agent.task_manager.add_task(description=path, tool="ffuf",
+                                           parameters={"target": f"http://example.com/{path}/FUZZ"})
+        agent._execute_task(task)
+
+    assert [(c["threads"], c["rate"]) for c in RecordingFfuf.calls] == [(8, 40), (4, 20)]
+    assert RecordingFfuf.calls[0]["mc"].endswith(",429,503")
+    assert limiter.rate("example.com") == 10
+    assert limiter.stats()["example.com"]["responses"] == 40
+    assert agent.metrics.counter("throttled_responses", host="example.com") == 10
+    # The 429s were only matched to measure throttling and are not findings
+    assert [r["status"] for r in task.result["results"]["results"]] == [200] * 5
+    # Pacing arguments do not change the task's identity
+    assert "rate" not in task.parameters
+
+def test_budget_timeouts_do_not_count_as_host_failures():
+    class SlowGobuster:
+        def run(self, target, **kwargs):
+            raise ToolInterrupted("budget exceeded", {"requests": 50, "partial": True, "parsed_results": {
+                "discovered_items": [{"path": "/a", "status_code": 200}, {"path": "/b", "status_code": 503}]
+            }}, timed_out=True)
+
+    limiter = HostRateLimiter(initial_rate=40)
+    agent = SecurityAgent(ScopeDefinition(domains=["example.com"], ip_ranges=[], wildcards=[]),
+                          use_llm_cache=False, use_result_cache=False, rate_limiter=limiter,
+                          tools={"gobuster": SlowGobuster()})
+    task = agent.task_manager.add_task(description="dirs", tool="gobuster",
+                                       parameters={"target": "http://example.com/"})
+    task.max_retries = 0
+    agent._execute_task(task)
+
+    assert limiter.stats()["example.com"]["failures"] == 0
+    assert limiter.rate("example.com") == 50
+    assert [i["path"] for i in task.result["parsed_results"]["discovered_items"]] == ["/a"]
+
+def test_waiting_for_a_lease_uses_the_task_budget():
+    class UnusedFfuf:
+        def run(self, target, **kwargs):
+            raise AssertionError("ran without a lease")
+
+    limiter = HostRateLimiter(max_leases=1)
+    agent = SecurityAgent(ScopeDefinition(domains=["example.com"], ip_ranges=[], wildcards=[]),
+                          use_llm_cache=False, use_result_cache=False, rate_limiter=limiter,
+                          task_timeout=0.2, tools={"ffuf": UnusedFfuf()})
+    task = agent.task_manager.add_task(description="fuzz", tool="ffuf",
+                                       parameters={"target": "http://example.com/FUZZ"})
+    task.max_retries = 0
+    with limiter.lease("example.com", max_threads=10):
+        started = time.monotonic()
+        agent._execute_task(task)
+
+    assert time.monotonic() - started < 2
+    assert task.result == {"partial": True}
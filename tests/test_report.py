@@ -0,0 +1,103 @@
+import csv
+import json
+import time
+from src.core.report import Finding, ReportBuilder, describe, iter_findings, open_writers
+
+NMAP_RESULT = {"open_ports": [
+    {"host": "10.0.0.1", "port": 22, "protocol": "tcp", "state": "open", "service": "ssh",
+     "product": "OpenSSH", "version": "8.9"},
+    {"host": "10.0.0.1", "port": 80, "protocol": "tcp", "state": "open", "service": "http"}
+]}
+GOBUSTER_RESULT = {"parsed_results": {"discovered_items": [
+    {"path": "/admin", "status_code": 301, "size": 0, "redirect": "/admin/"},
+    {"path": "/login", "status_code": 200, "size": 512}
+]}}
+FFUF_RESULT = {"results": {"results": [
+    {"url": "http://10.0.0.1/login", "status": 200, "length": 512, "content-type": "text/html"},
+    {"url": "http://10.0.0.1/backup.zip", "status": 200, "length": 9000, "content-type": "application/zip"}
+]}}
+
+def test_tool_results_become_typed_findings():
+    ports = list(iter_findings("nmap", "10.0.0.1", NMAP_RESULT))
+    assert ports[0] == Finding("open_port", "nmap", "10.0.0.1", 22, protocol="tcp",
+                               service="ssh", detail="OpenSSH 8.9")
+    assert describe(ports[0]) == "Port 22/tcp is open on 10.0.0.1 (ssh OpenSSH 8.9)"
+
+    paths = list(iter_findings("gobuster", "http://10.0.0.1", GOBUSTER_RESULT))
+    assert [(f.host, f.port, f.path, f.status) for f in paths] == [
+        ("10.0.0.1", 80, "/admin", 301), ("10.0.0.1", 80, "/login", 200)
+    ]
+    fuzzed = list(iter_findings("ffuf", "http://10.0.0.1/FUZZ", FFUF_RESULT))
+    assert fuzzed[1].path == "/backup.zip"
+    assert fuzzed[1].detail == "application/zip"
+
+def test_builder_groups_and_streams_all_formats(tmp_path):
+    with ReportBuilder(open_writers(str(tmp_path), "scan"), keep=2) as builder:
+        builder.add_result("nmap", "10.0.0.1", NMAP_RESULT)
+        builder.add_result("gobuster", "http://10.0.0.1", GOBUSTER_RESULT)
+        builder.add_result("ffuf", "http://10.0.0.1/FUZZ", FFUF_RESULT)
+
+    summary = builder.summary()
+    # /login was reported by both fuzzers
+    assert summary["total_findings"] == 5
+    assert summary["duplicates"] == 1
+    assert summary["hosts"] == {"10.0.0.1": {"open_ports": 2, "paths": 3}}
+    assert summary["by_status"] == {"301": 1, "200": 2}
+    assert len(builder.kept) == 2
+
+    records = [json.loads(line) for line in (tmp_path / "scan.ndjson").read_text().splitlines()]
+    assert len(records) == 5 and records[0]["service"] == "ssh"
+    sarif = json.loads((tmp_path / "scan.sarif").read_text())
+    assert sarif["version"] == "2.1.0"
+    assert len(sarif["runs"][0]["results"]) == 5
+    with open(tmp_path / "scan.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[-1]["path"] == "/backup.zip"
+
+def test_empty_sarif_is_valid(tmp_path):
+    with ReportBuilder(open_writers(str(tmp_path), "empty", formats=["sarif"])):
+        pass
+    assert json.loads((tmp_path / "empty.sarif").read_text())["runs"][0]["results"] == []
+
+def test_large_report_builds_quickly(tmp_path):
+    result = {"results": {"results": [
+        {"url": f"http://10.0.0.1/path-{i}", "status": 200, "length": i, "content-type": "text/html"}
+        for i in range(100000)
+    ]}}
+    started = time.perf_counter()
+    with ReportBuilder(open_writers(str(tmp_path), "large"), keep=100) as builder:
+        builder.add_result("ffuf", "http://10.0.0.1/FUZZ", result)
+    elapsed = time.perf_counter() - started
+
+    assert builder.total == 100000
+    assert len(builder.kept) == 100
+    assert elapsed < 15
+
+def test_sarif_uris_keep_the_scanned_scheme(tmp_path):
+    with ReportBuilder(open_writers(str(tmp_path), "tls", formats=["sarif"])) as builder:
+        builder.add_result("gobuster", "https://10.0.0.1:9443/", GOBUSTER_RESULT)
+        builder.add_result("ffuf", "http://10.0.0.1:8443/FUZZ",
+                           {"results": {"results": [{"url": "http://10.0.0.1:8443/a", "status": 200}]}})
+
+    results = json.loads((tmp_path / "tls.sarif").read_text())["runs"][0]["results"]
+    uris = [r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for r in results]
+    assert uris == ["https://10.0.0.1:9443/admin", "https://10.0.0.1:9443/login", "http://10.0.0.1:8443/a"]
+
+def test_ipv6_hosts_are_bracketed_in_sarif_uris(tmp_path):
+    with ReportBuilder(open_writers(str(tmp_path), "v6", formats=["sarif"])) as builder:
+        builder.add_result("nmap", "2001:db8::1", {"open_ports": [{"port": 22, "protocol": "tcp"}]})
+        builder.add_result("ffuf", "http://[2001:db8::1]:8080/FUZZ",
+                           {"results": {"results": [{"url": "http://[2001:db8::1]:8080/a", "status": 200}]}})
+
+    results = json.loads((tmp_path / "v6.sarif").read_text())["runs"][0]["results"]
+    uris = [r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for r in results]
+    assert uris == ["tcp://[2001:db8::1]:22", "http://[2001:db8::1]:8080/a"]
+
+def test_deduplication_only_remembers_recent_hosts():
+    builder = ReportBuilder(dedup_hosts=2)
+    for host in ("10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.3", "10.0.0.2"):
+        builder.add(Finding("open_port", "nmap", host, 22))
+
+    # 10.0.0.2 had been evicted by the time it was reported again
+    assert (builder.total, builder.duplicates) == (4, 1)
+    assert len(builder._seen) == 2
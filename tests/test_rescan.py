@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from conftest import SilentLLM
+from src.agents.security_agent import SecurityAgent
+from src.core.report import Finding
+from src.core.rescan import Baseline, detect_changes, diff_findings, port_spec
+from src.core.scope import ScopeDefinition
+from src.core.store import ScanStore
+from src.core.task_manager import TaskManager, TaskStatus
+from src.tools.nmap_tool import NmapTool
+
+SCOPE = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+YESTERDAY = {
+    ("10.0.0.1", 22): {"service": "ssh", "product": "OpenSSH", "version": "8.9"},
+    ("10.0.0.1", 80): {"service": "http", "product": "nginx", "version": "1.24"},
+    ("10.0.0.2", 443): {"service": "https", "product": "nginx", "version": "1.24"},
+}
+TODAY = {
+    ("10.0.0.1", 22): {"service": "ssh", "product": "Dropbear", "version": "2022.83"},
+    ("10.0.0.1", 80): {"service": "http", "product": "nginx", "version": "1.24"},
+    ("10.0.0.2", 8080): {"service": "http", "product": "Jetty", "version": "9.4"},
+}
+
+def _open_ports(state, keys=None):
+    return [{"host": host, "port": port, "protocol": "tcp", "state": "open", **banner}
+            for (host, port), banner in sorted(state.items()) if keys is None or (host, port) in keys]
+
+class FakeNmap:
+    """Today's network; light sweeps get no versions"""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, target, ports=None, version_light=False, **kwargs):
+        self.calls.append((target, ports, version_light))
+        if version_light:
+            return {"hosts": [], "open_ports": [{k: v for k, v in p.items() if k != "version"}
+                                                for p in _open_ports(TODAY)]}
+        wanted = {(target, int(port)) for port in ports.split(",")}
+        return {"hosts": [], "open_ports": _open_ports(TODAY, wanted)}
+
+class FakeGobuster:
+    def __init__(self):
+        self.targets = []
+
+    def run(self, target, **kwargs):
+        self.targets.append(target)
+        return {"parsed_results": {"discovered_items": [{"path": "/admin", "status_code": 200}]}}
+
+class EmptyFfuf:
+    def run(self, target, **kwargs):
+        return {"results": {"results": []}}
+
+def _previous_scan(store, age=timedelta(hours=2)):
+    store.create_scan("yesterday", "scan the lab", SCOPE.model_dump())
+    manager = TaskManager(store=store, scan_id="yesterday")
+    nmap = manager.add_task(description="nmap", tool="nmap", parameters={"target": "10.0.0.0/30", "ports": "1-1024,8080"})
+    gobuster = manager.add_task(description="gobuster", tool="gobuster", parameters={"target": "http://10.0.0.1/"})
+    observed = (datetime.now() - age).isoformat()
+    manager.update_task_status(nmap.id, TaskStatus.COMPLETED,
+                               result={"open_ports": _open_ports(YESTERDAY), "observed_at": observed})
+    manager.update_task_status(gobuster.id, TaskStatus.COMPLETED, result={
+        "parsed_results": {"discovered_items": [{"path": "/login", "status_code": 200}]},
+        "observed_at": observed
+    })
+    store.flush()
+    return [nmap, gobuster]
+
+def _agent(store, tmp_path):
+    tools = {"nmap": FakeNmap(), "gobuster": FakeGobuster(), "ffuf": EmptyFfuf()}
+    agent = SecurityAgent(SCOPE, store=store, use_llm_cache=False, use_result_cache=False,
+                          llm=SilentLLM(), tools=tools, report_dir=str(tmp_path))
+    return agent, tools
+
+def test_detect_changes_and_diff(tmp_path):
+    store = ScanStore(str(tmp_path / "scans.db"))
+    baseline = Baseline(_previous_scan(store), max_age=3600)
+    store.close()
+
+    assert baseline.sweeps == [{"target": "10.0.0.0/30", "ports": "1-1024,8080"}]
+    assert all(baseline.expired(key) for key in baseline.ports)
+    changes = detect_changes(baseline, FakeNmap().run("10.0.0.0/30", version_light=True)["open_ports"])
+    assert changes.new == {("10.0.0.2", 8080, "tcp")}
+    assert changes.closed == {("10.0.0.2", 443, "tcp")}
+    assert changes.changed == {("10.0.0.1", 22, "tcp")}
+    # The light probes missed the version, which is not a change
+    assert changes.unchanged == {("10.0.0.1", 80, "tcp")}
+    assert detect_changes(baseline, [], failed_sweeps=["10.0.0.0/30"]).unverified == set(baseline.ports)
+    assert port_spec([("h", 80, "tcp"), ("h", 53, "udp"), ("h", 22, "tcp")]) == "22,80,U:53"
+    assert NmapTool()._build_command("h", "22", version_light=True)[:3] == ["nmap", "-sV", "--version-light"]
+
+    diff = diff_findings(
+        [Finding("open_port", "nmap", "a", 22, service="ssh"), Finding("open_port", "nmap", "a", 23)],
+        [Finding("open_port", "nmap", "a", 22, service="dropbear"), Finding("open_port", "nmap", "a", 80)]
+    )
+    assert diff["summary"] == {"new": 1, "closed": 1, "changed": 1, "unchanged": 0}
+    assert diff["changed"][0]["fields"] == ["service"]
+
+def test_rescan_only_scans_what_changed(tmp_path):
+    store = ScanStore(str(tmp_path / "scans.db"))
+    _previous_scan(store)
+    agent, tools = _agent(store, tmp_path)
+    # Not consulted during the rescan, but still the agent's cache afterwards
+    agent.result_cache = result_cache = object()
+
+    report = agent.rescan("yesterday")
+
+    assert agent.result_cache is result_cache
+    full_scans = [call for call in tools["nmap"].calls if not call[2]]
+    assert sorted(full_scans) == [("10.0.0.1", "22", False), ("10.0.0.2", "8080", False)]
+    # Port 80 is unchanged, so its gobuster result is carried instead of fuzzed again
+    assert tools["gobuster"].targets == ["http://10.0.0.2:8080/"]
+
+    diff = report["diff"]
+    assert diff["previous_scan_id"] == "yesterday"
+    assert [(f["host"], f["port"], f["path"]) for f in diff["new"]] == [
+        ("10.0.0.2", 8080, None), ("10.0.0.2", 8080, "/admin")
+    ]
+    assert [(f["host"], f["port"]) for f in diff["closed"]] == [("10.0.0.2", 443)]
+    assert [c["after"]["detail"] for c in diff["changed"]] == ["Dropbear 2022.83"]
+    assert diff["summary"]["unchanged"] == 2
+    assert report["files"]["diff"].endswith(f"{agent.scan_id}.diff.json")
+    assert agent.metrics.counter("rescan_tasks", outcome="carried") == 2
+
+    carried = [t for t in store.load_tasks(agent.scan_id) if t.result and "carried_from" in t.result]
+    assert {t.tool for t in carried} == {"nmap", "gobuster"}
+    store.close()
+
+def test_expired_results_are_scanned_again(tmp_path):
+    store = ScanStore(str(tmp_path / "scans.db"))
+    _previous_scan(store, age=timedelta(days=2))
+    agent, tools = _agent(store, tmp_path)
+
+    report = agent.rescan("yesterday", max_age=24 * 60 * 60)
+
+    full_scans = [call for call in tools["nmap"].calls if not call[2]]
+    assert sorted(full_scans) == [("10.0.0.1", "22,80", False), ("10.0.0.2", "8080", False)]
+    assert sorted(tools["gobuster"].targets) == ["http://10.0.0.1/", "http://10.0.0.2:8080/"]
+    # /login was not found again on the rescanned port
+    assert [f["path"] for f in report["diff"]["closed"] if f["kind"] == "path"] == ["/login"]
+    store.close()
+
+class DomainNmap:
+    """lab.example.com at 10.0.0.1: ssh changed its banner, http is unchanged"""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, target, ports=None, version_light=False, **kwargs):
+        self.calls.append((target, ports, version_light))
+        records = [{k: v for k, v in p.items() if not (version_light and k == "version")}
+                   for p in _open_ports({key: TODAY[key] for key in TODAY if key[0] == "10.0.0.1"})]
+        if ports and not version_light:
+            records = [r for r in records if str(r["port"]) in ports.split(",")]
+        return {"hosts": [{"address": "10.0.0.1", "hostnames": ["lab.example.com"]}], "open_ports": records}
+
+def test_domain_scoped_rescan_targets_host_names(tmp_path):
+    scope = ScopeDefinition(domains=["example.com"], ip_ranges=[], wildcards=[])
+    store = ScanStore(str(tmp_path / "scans.db"))
+    store.create_scan("yesterday", "scan the lab", scope.model_dump())
+    manager = TaskManager(store=store, scan_id="yesterday")
+    nmap = manager.add_task(description="nmap", tool="nmap", parameters={"target": "lab.example.com"})
+    gobuster = manager.add_task(description="gobuster", tool="gobuster",
+                                parameters={"target": "http://lab.example.com/"})
+    observed = (datetime.now() - timedelta(hours=2)).isoformat()
+    manager.update_task_status(nmap.id, TaskStatus.COMPLETED, result={
+        "hosts": [{"address": "10.0.0.1", "hostnames": ["lab.example.com"]}],
+        "open_ports": _open_ports({key: YESTERDAY[key] for key in YESTERDAY if key[0] == "10.0.0.1"}),
+        "observed_at": observed
+    })
+    manager.update_task_status(gobuster.id, TaskStatus.COMPLETED, result={
+        "parsed_results": {"discovered_items": [{"path": "/login", "status_code": 200}]},
+        "observed_at": observed
+    })
+    store.flush()
+    tools = {"nmap": DomainNmap(), "gobuster": FakeGobuster(), "ffuf": EmptyFfuf()}
+    agent = SecurityAgent(scope, store=store, use_llm_cache=False, use_result_cache=False,
+                          llm=SilentLLM(), tools=tools, report_dir=str(tmp_path))
+
+    report = agent.rescan("yesterday")
+
+    # The changed port is rescanned by name, which the scope allows, not by address
+    assert [call for call in tools["nmap"].calls if not call[2]] == [("lab.example.com", "22", False)]
+    assert agent.metrics.counter("scope_violations") == 0
+    assert agent.metrics.counter("rescan_tasks", outcome="carried") == 2
+    assert report["diff"]["closed"] == []
+    assert [c["after"]["detail"] for c in report["diff"]["changed"]] == ["Dropbear 2022.83"]
+    store.close()
@@ -0,0 +1,111 @@
+import json
+from langchain.schema import AIMessage
+from src.agents.security_agent import SecurityAgent
+from src.core.rules import Rule, RuleAction, RuleEngine, default_rules
+from src.core.scope import ScopeDefinition
+from src.core.task_manager import TaskStatus
+
+SCOPE = ScopeDefinition(domains=["example.com"], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+NMAP_RESULT = {"open_ports": [
+    {"port": 22, "protocol": "tcp", "service": "ssh"},
+    {"port": 443, "protocol": "tcp", "service": "https"},
+    {"port": 9000, "protocol": "tcp", "service": "http"}
+]}
+
+def test_web_ports_get_directory_and_content_fuzzing():
+    outcome = RuleEngine(default_rules(wordlist="w.txt")).evaluate("nmap", "10.0.0.1", NMAP_RESULT)
+
+    # ssh has no rule, so the result still goes to the LLM
+    assert (outcome.unmatched, outcome.handled) == (1, False)
+    assert outcome.matches == {"web-port": 1, "web-service": 1}
+    assert [(t["tool"], t["parameters"]["target"]) for t in outcome.tasks] == [
+        ("gobuster", "https://10.0.0.1/"), ("ffuf", "https://10.0.0.1/FUZZ"),
+        ("gobuster", "http://10.0.0.1:9000/"), ("ffuf", "http://10.0.0.1:9000/FUZZ")
+    ]
+    assert outcome.tasks[0]["parameters"]["wordlist"] == "w.txt"
+    assert outcome.tasks[0]["description"] == "Directory enumeration on https://10.0.0.1/"
+
+    ipv6 = RuleEngine().evaluate("nmap", "2001:db8::1", {"open_ports": [{"port": 8080, "service": "http"}]})
+    assert ipv6.tasks[0]["parameters"]["target"] == "http://[2001:db8::1]:8080/"
+
+def test_directory_redirects_are_fuzzed_inside_up_to_max_depth():
+    result = {"parsed_results": {"discovered_items": [
+        {"path": "/admin", "status_code": 301, "redirect": "https://example.com:8443/admin/"},
+        {"path": "/a/b/c/d", "status_code": 301, "redirect": "https://example.com:8443/a/b/c/d/"},
+        {"path": "/login", "status_code": 302, "redirect": "https://sso.example.com/auth"},
+        {"path": "/old", "status_code": 404}
+    ]}}
+
+    outcome = RuleEngine().evaluate("gobuster", "https://example.com:8443/", result)
+
+    assert [t["parameters"]["target"] for t in outcome.tasks] == ["https://example.com:8443/admin/FUZZ"]
+    assert outcome.matches == {"redirect-to-directory": 1}
+    assert outcome.unmatched == 3
+
+    # Opt-in settling covers the off-host redirect and the 404, not the deep redirect
+    settled = RuleEngine(default_rules(settle_uninteresting=True)).evaluate(
+        "gobuster", "https://example.com:8443/", result)
+    assert settled.matches == {"redirect-to-directory": 1, "off-host-redirect": 1, "missing-path": 1}
+    assert (settled.unmatched, settled.handled) == (1, False)
+
+def test_unmatched_findings_and_empty_results_are_left_for_the_llm():
+    engine = RuleEngine()
+
+    unusual = engine.evaluate("nmap", "10.0.0.1", {"open_ports": [{"port": 5900, "service": "vnc"}]})
+    empty = engine.evaluate("nmap", "10.0.0.1", {"open_ports": []})
+
+    assert (unusual.unmatched, unusual.handled) == (1, False)
+    assert not empty.handled
+
+def test_first_matching_rule_wins_and_rules_load_from_json(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([
+        {"name": "ignore-dev", "ports": [8080]},
+        {"name": "tool-specific", "tool": "nmap", "services": ["http"],
+         "actions": [{"tool": "gobuster", "target": "{scheme}://{host}:{port}/admin/"}]}
+    ]))
+
+    engine = RuleEngine.from_file(str(path))
+    outcome = engine.evaluate("nmap", "10.0.0.1", {"open_ports": [
+        {"port": 8080, "service": "http"}, {"port": 8000, "service": "http"}
+    ]})
+
+    assert outcome.matches == {"ignore-dev": 1, "tool-specific": 1}
+    # A rule without actions does not keep its finding from the LLM
+    assert outcome.unmatched == 1
+    assert [t["parameters"]["target"] for t in outcome.tasks] == ["http://10.0.0.1:8000/admin/"]
+    assert outcome.tasks[0]["description"] == "gobuster on http://10.0.0.1:8000/admin/"
+
+def test_agent_sends_only_unmatched_results_to_the_llm():
+    class CountingLLM:
+        prompts = []
+
+        def invoke(self, prompt):
+            self.prompts.append(prompt.format_messages()[-1].content)
+            return AIMessage(content='{"tool": "nmap", "target": "10.0.0.5", "parameters": {"ports": "5900"}}')
+
+    agent = SecurityAgent(SCOPE, use_llm_cache=False, use_result_cache=False, analysis_chunk_size=1,
+                          rules=RuleEngine(default_rules() + [
+                              Rule(name="evil", ports=[7777], actions=[RuleAction(tool="nmap", target="evil.org")])
+                          ]))
+    agent.llm = CountingLLM()
+    tasks = [
+        agent.task_manager.add_task(description=f"scan {i}", tool="nmap", parameters={"target": f"10.0.0.{i}"}) for i in range(1, 5)
+    ]
+    web = {"open_ports": NMAP_RESULT["open_ports"][1:]}
+    results = [web, web, {"open_ports": [{"port": 7777}]},
+               {"open_ports": [{"port": 5900, "service": "vnc"}]}]
+    for task, result in zip(tasks, results):
+        agent.task_manager.update_task_status(task.id, TaskStatus.COMPLETED, result)
+
+    added = agent._analyze_tasks(agent.task_manager.get_tasks(TaskStatus.COMPLETED))
+
+    assert len(agent.llm.prompts) == 1
+    assert "vnc" in agent.llm.prompts[0].split("New results:", 1)[1]
+    assert agent.metrics.counter("llm_calls_avoided") == 3
+    assert agent.metrics.counter("rule_matches", rule="web-port") == 2
+    assert agent.metrics.counter("scope_violations") == 1
+    # gobuster and ffuf on two web ports of two hosts, plus the LLM's suggestion
+    assert sorted(t.parameters["target"] for t in added if t.tool == "nmap") == ["10.0.0.5"]
+    assert len([t for t in added if t.tool != "nmap"]) == 8
@@ -0,0 +1,53 @@
+import pytest
+from src.core.scope import ScopeDefinition
+
+@pytest.fixture
+def scope():
+    return ScopeDefinition(
+        domains=["example.com"],
+        ip_ranges=["192.168.1.0/24", "10.10.0.0/16", "10.11.0.0/16", "2001:db8::/32"],
+        wildcards=["*.corp.test"]
+    )
+
+def test_domain_matching_respects_label_boundaries(scope):
+    assert scope.is_in_scope("example.com")
+    assert scope.is_in_scope("www.example.com")
+    assert scope.is_in_scope("EXAMPLE.COM.")
+    assert not scope.is_in_scope("notexample.com")
+    assert not scope.is_in_scope("example.com.evil.net")
+
+def test_wildcards_match_subdomains_only(scope):
+    assert scope.is_in_scope("api.corp.test")
+    assert scope.is_in_scope("a.b.corp.test")
+    assert not scope.is_in_scope("corp.test")
+    assert not scope.is_in_scope("mycorp.test")
+
+def test_urls_and_ports_use_the_host(scope):
+    assert scope.is_in_scope("http://www.example.com/FUZZ")
+    assert scope.is_in_scope("https://192.168.1.10:8443/admin")
+    assert scope.is_in_scope("example.com:8080")
+    assert not scope.is_in_scope("http://evil.com/?q=example.com")
+
+def test_ip_addresses_and_ranges(scope):
+    assert scope.is_in_scope("192.168.1.255")
+    assert not scope.is_in_scope("192.168.2.1")
+    assert scope.is_in_scope("2001:db8::1")
+    # Adjacent /16s are merged, so a range spanning both is covered
+    assert scope.is_in_scope("10.10.0.0/15")
+    assert not scope.is_in_scope("10.8.0.0/14")
+
+def test_blank_and_invalid_entries_are_ignored():
+    scope = ScopeDefinition(domains=["", "example.com"], ip_ranges=["", "not-a-cidr"], wildcards=[""])
+    assert not scope.is_in_scope("evil.com")
+    assert not scope.is_in_scope("10.0.0.1")
+    assert not scope.is_in_scope("")
+
+def test_is_in_scope_many(scope):
+    targets = ["example.com", "evil.com", "192.168.1.1", "example.com"]
+    assert scope.is_in_scope_many(targets) == [True, False, True, True]
+
+def test_large_scope_lookup():
+    ranges = [f"10.{i // 256}.{i % 256}.0/28" for i in range(5000)]
+    scope = ScopeDefinition(domains=[], ip_ranges=ranges, wildcards=[])
+    assert scope.is_in_scope("10.19.135.5")
+    assert not scope.is_in_scope("10.19.135.17")
@@ -100,4 +100,35 @@ def test_report_generation(security_agent):
     
     assert isinstance(report, dict)
     assert "findings" in report
-    assert "summary" in report
\ No newline at end of file
+    assert "summary" in report
+
+
+def test_result_memoization_across_runs(scope, tmp_path):
+    from src.core.fingerprint import ResultCache
+    from src.utils.cache import DiskCache
+
+    class CountingTool:
+        calls = 0
+
+        def run(self, **parameters):
+            CountingTool.calls += 1
+            return {"open_ports": [80]}
+
+    def make_agent():
+        agent = SecurityAgent(
+            scope,
+            llm_cache=DiskCache(str(tmp_path / "llm.db")),
+            result_cache=ResultCache(DiskCache(str(tmp_path / "results.db"), max_age=60))
+        )
+        agent.tools["nmap"] = CountingTool()
+        return agent
+
+    for _ in range(2):
+        agent = make_agent()
+        task = agent.task_manager.add_task(
+            description="Port scan", tool="nmap", parameters={"target": "example.com"}
+        )
+        assert agent._execute_task(task) == {"open_ports": [80]}
+        assert task.status == TaskStatus.COMPLETED
+
+    assert CountingTool.calls == 1
@@ -0,0 +1,68 @@
+import pytest
+from conftest import RecordingTool, SilentLLM
+from src.agents.security_agent import SecurityAgent
+from src.core.scope import ScopeDefinition
+from src.core.store import ScanStore
+from src.core.task_manager import TaskManager, TaskStatus
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "scans.db")
+
+def test_tasks_and_transitions_are_persisted(store_path):
+    store = ScanStore(store_path)
+    manager = TaskManager(store=store, scan_id="scan-1")
+    task = manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.1"})
+    manager.update_task_status(task.id, TaskStatus.RUNNING)
+    manager.update_task_status(task.id, TaskStatus.COMPLETED, result={"open_ports": [22]})
+    store.close()
+
+    reopened = ScanStore(store_path)
+    [loaded] = reopened.load_tasks("scan-1")
+    assert loaded.id == task.id
+    assert loaded.status == TaskStatus.COMPLETED
+    assert loaded.result == {"open_ports": [22]}
+    assert loaded.fingerprint == task.fingerprint
+    reopened.close()
+
+def test_resume_skips_completed_tasks(store_path, tmp_path):
+    scope = ScopeDefinition(domains=["example.com"], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    store = ScanStore(store_path)
+    store.create_scan("scan-2", "scan the lab", scope.model_dump())
+    manager = TaskManager(store=store, scan_id="scan-2")
+    done = manager.add_task(description="done", tool="nmap", parameters={"target": "10.0.0.1"})
+    interrupted = manager.add_task(description="interrupted", tool="nmap", parameters={"target": "10.0.0.2"})
+    pending = manager.add_task(description="pending", tool="nmap", parameters={"target": "10.0.0.3"})
+    manager.update_task_status(done.id, TaskStatus.COMPLETED, result={"open_ports": [22]})
+    manager.update_task_status(interrupted.id, TaskStatus.RUNNING)
+    store.close()
+
+    store = ScanStore(store_path)
+    agent = SecurityAgent(scope, store=store, use_llm_cache=False, use_result_cache=False, use_rules=False)
+    agent.llm = SilentLLM()
+    tool = RecordingTool()
+    agent.tools["nmap"] = tool
+
+    report = agent.resume("scan-2")
+
+    assert sorted(tool.targets) == ["10.0.0.2", "10.0.0.3"]
+    assert report["summary"]["completed_tasks"] == 3
+    assert store.load_scan("scan-2")["status"] == "completed"
+    assert all(t.status == TaskStatus.COMPLETED for t in store.load_tasks("scan-2"))
+    store.close()
+
+def test_bad_write_does_not_stop_the_writer(store_path):
+    store = ScanStore(store_path, flush_interval=0.01)
+    store._submit("UPDATE scans SET status = ? WHERE scan_id = ?", (object(), "x"))
+    store.flush()
+
+    manager = TaskManager(store=store, scan_id="scan-3")
+    result = {"open_ports": [22]}
+    task = manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.1"})
+    manager.update_task_status(task.id, TaskStatus.COMPLETED, result=result)
+    # Results are serialized when recorded, not when the writer gets to them
+    result["open_ports"].append(23)
+    store.flush()
+
+    assert store.load_tasks("scan-3")[0].result == {"open_ports": [22]}
+    store.close()
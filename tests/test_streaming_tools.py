@@ -0,0 +1,94 @@
+import subprocess
+import time
+import pytest
+from conftest import install_stub
+from src.tools.ffuf_tool import FfufTool
+from src.tools.gobuster_tool import GobusterTool
+from src.tools.streaming import EarlyStop
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("admin\nlogin\n")
+    return str(path)
+
+def test_gobuster_stream_yields_discoveries(stub_path, wordlist):
+    install_stub(stub_path, "gobuster", """
+        import sys, time
+        print("/admin                (Status: 301) [Size: 178] [--> http://t/admin/]", flush=True)
+        print("noise line", flush=True)
+        print("/login                (Status: 200) [Size: 1024]", flush=True)
+    """)
+    items = list(GobusterTool().stream("http://t/", wordlist=wordlist))
+
+    assert items == [
+        {"path": "/admin", "status_code": 301, "size": 178, "redirect": "http://t/admin/"},
+        {"path": "/login", "status_code": 200, "size": 1024},
+    ]
+
+def test_ffuf_stream_stops_after_max_hits(stub_path, wordlist):
+    install_stub(stub_path, "ffuf", """
+        import json, time
+        for i in range(200):
+            print(json.dumps({"url": f"http://t/{i}", "status": 200, "length": i,
+                              "words": 1, "content-type": "text/html"}), flush=True)
+            time.sleep(0.05)
+    """)
+    start = time.monotonic()
+    items = list(FfufTool().stream("http://t/FUZZ", wordlist=wordlist, max_hits=3))
+
+    assert [item["url"] for item in items] == ["http://t/0", "http://t/1", "http://t/2"]
+    assert time.monotonic() - start < 5
+
+def test_stream_raises_on_failure(stub_path, wordlist):
+    install_stub(stub_path, "gobuster", """
+        import sys
+        print("boom", file=sys.stderr)
+        sys.exit(2)
+    """)
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        list(GobusterTool().stream("http://t/", wordlist=wordlist))
+    assert "boom" in excinfo.value.stderr
+
+def test_soft404_rate_triggers_stop():
+    stop = EarlyStop(max_soft404_rate=0.5, min_samples=10, soft404_repeat=2)
+    stopped = [stop.observe((200, 42)) for _ in range(10)]
+
+    assert stopped[-1] is True
+    assert stop.soft404_rate > 0.5
+    assert "soft-404" in stop.reason
+
+def test_parallel_runs_do_not_share_output(stub_path, wordlist, tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    install_stub(stub_path, "ffuf", """
+        import json, sys, time
+        target = sys.argv[sys.argv.index("-u") + 1]
+        for i in range(20):
+            print(json.dumps({"url": target.replace("FUZZ", str(i)), "status": 200,
+                              "length": i, "content-type": "text/html"}), flush=True)
+            time.sleep(0.005)
+    """)
+    install_stub(stub_path, "gobuster", """
+        import sys
+        target = sys.argv[sys.argv.index("-u") + 1]
+        print(f"/from-{target.split('//')[1].strip('/')}  (Status: 200) [Size: 1]")
+    """)
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    ffuf, gobuster = FfufTool(), GobusterTool()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ffuf_runs = [pool.submit(ffuf.run, f"http://h{i}/FUZZ", wordlist=wordlist) for i in range(2)]
+        gobuster_runs = [pool.submit(gobuster.run, f"http://g{i}/", wordlist=wordlist) for i in range(2)]
+
+    for i, future in enumerate(ffuf_runs):
+        records = future.result()["results"]["results"]
+        assert len(records) == 20
+        assert all(r["url"].startswith(f"http://h{i}/") for r in records)
+        parsed = ffuf.parse_results(future.result()["results"])
+        assert parsed["summary"]["total_discoveries"] == 20
+    for i, future in enumerate(gobuster_runs):
+        items = future.result()["parsed_results"]["discovered_items"]
+        assert items == [{"path": f"/from-g{i}", "status_code": 200, "size": 1}]
+    assert [p.name for p in workdir.iterdir()] == [".cache"]
@@ -0,0 +1,90 @@
+from src.core.task_manager import TaskManager, TaskStatus
+
+def test_tasks_get_unique_ids_and_timestamps():
+    manager = TaskManager()
+    first = manager.add_task(description="a", tool="nmap", parameters={"target": "10.0.0.1"})
+    second = manager.add_task(description="b", tool="nmap", parameters={"target": "10.0.0.2"})
+
+    assert first.id != second.id
+    assert second.created_at >= first.created_at
+    assert manager.get_task(second.id) is second
+
+def test_status_buckets_and_counters():
+    manager = TaskManager()
+    tasks = [
+        manager.add_task(description=str(i), tool="nmap", parameters={"target": f"10.0.0.{i}"})
+        for i in range(4)
+    ]
+    manager.update_task_status(tasks[0].id, TaskStatus.COMPLETED, result={"ok": True})
+    manager.update_task_status(tasks[1].id, TaskStatus.FAILED)
+    manager.update_task_status(tasks[2].id, TaskStatus.RUNNING)
+
+    assert manager.get_tasks(TaskStatus.COMPLETED) == [tasks[0]]
+    assert tasks[0].result == {"ok": True}
+    assert manager.summary() == {
+        "pending": 1, "running": 1, "completed": 1, "failed": 1, "total": 4
+    }
+    assert manager.tasks == tasks
+
+def test_next_task_follows_priority_then_insertion_order():
+    manager = TaskManager()
+    low = manager.add_task(description="low", tool="nmap", parameters={"target": "a"})
+    high = manager.add_task(description="high", tool="nmap", parameters={"target": "b"}, priority=5)
+    also_low = manager.add_task(description="low2", tool="nmap", parameters={"target": "c"})
+
+    assert manager.get_next_task() is high
+    manager.update_task_status(high.id, TaskStatus.RUNNING)
+    assert manager.get_next_task() is low
+    manager.update_task_status(low.id, TaskStatus.COMPLETED)
+    assert manager.get_next_task() is also_low
+
+    # A task put back to pending (retry) becomes eligible again
+    manager.update_task_status(high.id, TaskStatus.PENDING)
+    assert manager.get_next_task() is high
+    manager.update_task_status(high.id, TaskStatus.FAILED)
+    manager.update_task_status(also_low.id, TaskStatus.FAILED)
+    assert manager.get_next_task() is None
+
+def test_duplicate_invocations_are_dropped():
+    manager = TaskManager()
+    first = manager.add_task(description="scan", tool="nmap",
+                             parameters={"target": "Example.com", "ports": "443,80", "threads": 10})
+    duplicate = manager.add_task(description="scan again", tool="nmap",
+                                 parameters={"ports": "80, 443", "target": "example.com"})
+    different = manager.add_task(description="other ports", tool="nmap",
+                                 parameters={"target": "example.com", "ports": "22"})
+
+    assert first is not None
+    assert duplicate is None
+    assert different is not None
+    assert manager.find_by_fingerprint(first.fingerprint) is first
+    assert manager.count() == 2
+
+def test_url_targets_are_normalized():
+    manager = TaskManager()
+    manager.add_task(description="dirs", tool="gobuster", parameters={"target": "HTTP://Example.com/"})
+    assert manager.add_task(description="dirs", tool="gobuster", parameters={"target": "http://example.com"}) is None
+    assert manager.add_task(description="dirs", tool="ffuf", parameters={"target": "http://example.com"}) is not None
+
+def test_pending_heap_is_compacted_as_tasks_finish():
+    manager = TaskManager()
+    tasks = [manager.add_task(description=str(i), tool="nmap", parameters={"target": f"h{i}"})
+             for i in range(500)]
+    for task in tasks[:-1]:
+        manager.update_task_status(task.id, TaskStatus.RUNNING)
+        manager.update_task_status(task.id, TaskStatus.PENDING)
+        manager.update_task_status(task.id, TaskStatus.COMPLETED)
+
+    assert len(manager._pending_heap) <= 2 * len(manager._heap_seq) + 64
+    assert manager.get_next_task() is tasks[-1]
+
+def test_restore_keeps_completed_tasks_in_completion_order():
+    manager = TaskManager()
+    first = manager.add_task(description="a", tool="nmap", parameters={"target": "a"})
+    second = manager.add_task(description="b", tool="nmap", parameters={"target": "b"})
+    manager.update_task_status(second.id, TaskStatus.COMPLETED)
+    manager.update_task_status(first.id, TaskStatus.COMPLETED)
+
+    restored = TaskManager()
+    restored.restore([first, second])
+    assert restored.get_tasks(TaskStatus.COMPLETED) == [second, first]
@@ -0,0 +1,180 @@
+import subprocess
+import time
+import pytest
+from conftest import install_stub
+from src.agents.security_agent import SecurityAgent
+from src.core.scope import ScopeDefinition
+from src.core.task_manager import TaskStatus
+from src.tools.gobuster_tool import GobusterTool
+from src.tools.nmap_tool import NmapTool
+from src.tools.streaming import ToolInterrupted, collect
+from src.tools.wordlist import WordlistCache
+
+def _gone(pid, wait=2.0):
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Killed but not yet reaped by init
+                if f.read().split(")")[-1].split()[0] == "Z":
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_timeout_stops_the_process_group_and_keeps_output(stub_path, tmp_path):
+    pid_file = tmp_path / "child.pid"
+    install_stub(stub_path, "hang", f"""
+        import subprocess, time
+        child = subprocess.Popen(["sleep", "60"])
+        open({str(pid_file)!r}, "w").write(str(child.pid))
+        print("first", flush=True)
+        time.sleep(60)
+    """)
+    lines = []
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        collect(["hang"], lines, deadline=time.monotonic() + 1, timeout=1)
+
+    assert time.monotonic() - started < 10
+    assert lines == ["first"]
+    assert _gone(int(pid_file.read_text()))
+
+def test_gobuster_resumes_from_unfinished_chunks(stub_path, tmp_path, monkeypatch):
+    calls = tmp_path / "calls.log"
+    install_stub(stub_path, "gobuster", f"""
+        import os, sys, time
+        words = [w.strip() for w in open(sys.argv[sys.argv.index("-w") + 1])]
+        open({str(calls)!r}, "a").write(",".join(words) + "\\n")
+        for word in words:
+            print(f"/{{word}}  (Status: 200) [Size: 1]", flush=True)
+            if word == "hang" and os.environ.get("HANG"):
+                time.sleep(60)
+    """)
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("a\nb\nc\nd\nhang\nf\n")
+    tool = GobusterTool(WordlistCache(str(tmp_path / "cache")), chunk_words=2)
+    monkeypatch.setenv("HANG", "1")
+
+    with pytest.raises(ToolInterrupted) as excinfo:
+        tool.run("http://t/", wordlist=str(wordlist), timeout=1.5)
+    partial = excinfo.value.partial
+    assert partial["partial"] and partial["chunks_done"] == [0, 1]
+    assert [i["path"] for i in partial["parsed_results"]["discovered_items"]] == ["/a", "/b", "/c", "/d", "/hang"]
+
+    monkeypatch.delenv("HANG")
+    result = tool.run("http://t/", wordlist=str(wordlist), timeout=5, resume=partial)
+
+    # Only the interrupted chunk ran again, and its repeated line is kept once
+    assert calls.read_text().splitlines() == ["a,b", "c,d", "hang,f", "hang,f"]
+    assert [i["path"] for i in result["parsed_results"]["discovered_items"]] == ["/a", "/b", "/c", "/d", "/hang", "/f"]
+    assert result["chunks_done"] == [0, 1, 2] and "partial" not in result
+
+def test_nmap_resumes_by_excluding_finished_hosts(stub_path, tmp_path):
+    install_stub(stub_path, "nmap", """
+        import sys, time
+        host = '<host><status state="up"/><address addr="{}" addrtype="ipv4"/><ports>' \\
+               '<port protocol="tcp" portid="22"><state state="open"/></port></ports></host>'
+        print('<?xml version="1.0"?><nmaprun>', flush=True)
+        if "--exclude" not in sys.argv:
+            print(host.format("10.0.0.1"), flush=True)
+            time.sleep(60)
+        print(host.format("10.0.0.2") + '</nmaprun>', flush=True)
+    """)
+    tool = NmapTool()
+
+    with pytest.raises(ToolInterrupted) as excinfo:
+        tool.run("10.0.0.0/30", timeout=1)
+    partial = excinfo.value.partial
+    assert partial["scanned"] == ["10.0.0.1"]
+    assert [p["host"] for p in partial["open_ports"]] == ["10.0.0.1"]
+
+    result = tool.run("10.0.0.0/30", timeout=5, resume=partial)
+    assert "--exclude 10.0.0.1" in result["command"]
+    assert [h["address"] for h in result["hosts"]] == ["10.0.0.1", "10.0.0.2"]
+
+def test_nmap_keeps_hosts_parsed_before_malformed_xml(stub_path):
+    install_stub(stub_path, "nmap", """
+        print('<?xml version="1.0"?><nmaprun><host><status state="up"/>'
+              '<address addr="10.0.0.1" addrtype="ipv4"/><ports/></host><host><addr', flush=True)
+    """)
+
+    with pytest.raises(ToolInterrupted) as excinfo:
+        NmapTool().run("10.0.0.0/30", timeout=5)
+    partial = excinfo.value.partial
+    assert partial["scanned"] == ["10.0.0.1"] and partial["partial"]
+    assert not excinfo.value.timed_out
+
+class FlakyTool:
+    """Times out after one finding per attempt"""
+
+    def __init__(self, attempts_to_finish):
+        self.attempts_to_finish = attempts_to_finish
+        self.calls = []
+
+    def run(self, target, timeout=None, resume=None, **kwargs):
+        self.calls.append({"timeout": timeout, "resume": resume})
+        found = (resume or {}).get("open_ports", []) + [{"host": target, "port": 20 + len(self.calls)}]
+        if len(self.calls) < self.attempts_to_finish:
+            raise ToolInterrupted("budget exceeded", {"open_ports": found, "partial": True})
+        return {"open_ports": found}
+
+def _agent(tool):
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    return SecurityAgent(scope, use_llm_cache=False, use_result_cache=False, tools={"nmap": tool},
+                         tool_timeouts={"nmap": 30})
+
+def test_agent_retries_resume_from_partial_results():
+    tool = FlakyTool(attempts_to_finish=3)
+    agent = _agent(tool)
+    task = agent.task_manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.1"})
+    agent.executor.run_all([task], agent._execute_task)
+
+    # Retries get what is left of the task's budget, not a fresh one
+    timeouts = [call["timeout"] for call in tool.calls]
+    assert 29 < timeouts[0] <= 30 and timeouts == sorted(timeouts, reverse=True)
+    assert tool.calls[0]["resume"] is None
+    assert [p["port"] for p in tool.calls[2]["resume"]["open_ports"]] == [21, 22]
+    assert task.status == TaskStatus.COMPLETED
+    assert [p["port"] for p in task.result["open_ports"]] == [21, 22, 23]
+    assert agent.metrics.counter("interrupted_tasks") == 2
+
+def test_partial_results_are_kept_when_retries_run_out():
+    tool = FlakyTool(attempts_to_finish=10)
+    agent = _agent(tool)
+    task = agent.task_manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.1"})
+    agent.executor.run_all([task], agent._execute_task)
+
+    assert len(tool.calls) == task.max_retries + 1
+    assert task.status == TaskStatus.COMPLETED and task.result["partial"]
+    assert len(task.result["open_ports"]) == 4
+    assert agent.metrics.counter("partial_results") == 1
+    summary = agent._generate_report()["summary"]
+    assert (summary["completed_tasks"], summary["partial_tasks"]) == (0, 1)
+
+def test_retries_stop_once_the_task_budget_is_spent():
+    class SlowTool(FlakyTool):
+        def run(self, target, timeout=None, resume=None, **kwargs):
+            time.sleep(0.3)
+            return super().run(target, timeout, resume, **kwargs)
+
+    tool = SlowTool(attempts_to_finish=10)
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    agent = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False, tools={"nmap": tool},
+                          task_timeout=0.5)
+    task = agent.task_manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.1"})
+    agent.executor.run_all([task], agent._execute_task)
+
+    assert len(tool.calls) == 2 and tool.calls[1]["timeout"] < 0.3
+    assert task.status == TaskStatus.COMPLETED and task.result["partial"]
+
+def test_tasks_have_no_budget_by_default():
+    tool = FlakyTool(attempts_to_finish=1)
+    scope = ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+    agent = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False, tools={"nmap": tool})
+    task = agent.task_manager.add_task(description="scan", tool="nmap", parameters={"target": "10.0.0.0/16"})
+    agent.executor.run_all([task], agent._execute_task)
+
+    assert tool.calls[0]["timeout"] is None
+    assert task.status == TaskStatus.COMPLETED
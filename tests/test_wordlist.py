@@ -0,0 +1,46 @@
+import pytest
+from src.tools.wordlist import WordlistCache
+
+@pytest.fixture
+def raw_wordlist(tmp_path):
+    path = tmp_path / "raw.txt"
+    path.write_text("# comment\nadmin\n\nlogin\nadmin\n  backup  \nlogin\r\nimages\n")
+    return path
+
+def test_prepare_normalizes_and_reports_savings(tmp_path, raw_wordlist):
+    cache = WordlistCache(str(tmp_path / "cache"))
+    prepared = cache.prepare(str(raw_wordlist))
+
+    assert list(prepared) == ["admin", "login", "backup", "images"]
+    assert prepared.stats == {"raw_lines": 8, "unique_words": 4, "duplicates": 2, "skipped": 2}
+    assert prepared.requests_saved == 4
+    assert prepared.path.parent == tmp_path / "cache"
+
+def test_prepared_list_is_reused_by_content_hash(tmp_path, raw_wordlist):
+    cache = WordlistCache(str(tmp_path / "cache"))
+    first = cache.prepare(str(raw_wordlist))
+    copy = tmp_path / "copy.txt"
+    copy.write_bytes(raw_wordlist.read_bytes())
+
+    second = WordlistCache(str(tmp_path / "cache")).prepare(str(copy))
+
+    assert second.path == first.path
+    assert second.digest == first.digest
+
+def test_shards_are_disjoint_and_complete(tmp_path):
+    raw = tmp_path / "big.txt"
+    raw.write_text("\n".join(f"word{i}" for i in range(1001)) + "\n")
+    prepared = WordlistCache(str(tmp_path / "cache")).prepare(str(raw))
+
+    shards = prepared.shards(4)
+    words = [shard.read_text().split() for shard in shards]
+
+    assert len(shards) == 4
+    assert sum(len(w) for w in words) == 1001
+    assert [w for shard in words for w in shard] == list(prepared)
+    assert max(len(w) for w in words) - min(len(w) for w in words) <= 1
+    assert prepared.shards(4) == shards
+
+def test_missing_wordlist_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        WordlistCache(str(tmp_path / "cache")).prepare(str(tmp_path / "nope.txt"))
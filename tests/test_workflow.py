@@ -0,0 +1,53 @@
+import pytest
+from conftest import PlanningLLM, RecordingTool
+from src.agents.security_agent import SecurityAgent
+from src.core.scope import ScopeDefinition
+from src.core.store import ScanStore
+
+PLAN = "\n".join(f"Tool: nmap\nTarget: 10.0.0.{i}\nDescription: scan host {i}" for i in range(1, 4))
+
+@pytest.fixture
+def scope():
+    return ScopeDefinition(domains=[], ip_ranges=["10.0.0.0/24"], wildcards=[])
+
+def _agent(scope, store):
+    agent = SecurityAgent(scope, store=store, scan_id="scan-wf", use_llm_cache=False, use_result_cache=False)
+    agent.llm = PlanningLLM(PLAN)
+    agent.tools["nmap"] = RecordingTool()
+    return agent
+
+def test_resume_continues_from_last_checkpoint(scope, tmp_path):
+    store = ScanStore(str(tmp_path / "scans.db"))
+    agent = _agent(scope, store)
+
+    def crash():
+        raise RuntimeError("interrupted before the report")
+    agent._generate_report = crash
+    with pytest.raises(RuntimeError):
+        agent.run("scan the lab")
+    assert sorted(agent.tools["nmap"].targets) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    store.close()
+
+    store = ScanStore(str(tmp_path / "scans.db"))
+    checkpoint = store.load_checkpoint("scan-wf")
+    # The analyzed tasks are a count, so checkpoints do not grow with the scan
+    assert checkpoint["channel_values"]["analyze"]["analyzed"] == 3
+    resumed = _agent(scope, store)
+    report = resumed.resume("scan-wf")
+
+    # Plan, execute and analyze were checkpointed: only the report node runs again
+    assert resumed.llm.calls == 0
+    assert resumed.tools["nmap"].targets == []
+    assert report["summary"]["completed_tasks"] == 3
+    assert store.load_scan("scan-wf")["status"] == "completed"
+    store.close()
+
+def test_run_without_store_uses_graph(scope):
+    agent = SecurityAgent(scope, use_llm_cache=False, use_result_cache=False, max_workers=3)
+    agent.llm = PlanningLLM(PLAN)
+    agent.tools["nmap"] = RecordingTool()
+
+    report = agent.run("scan the lab")
+
+    assert set(agent.workflow.nodes) >= {"plan", "execute", "analyze", "report"}
+    assert report["summary"]["completed_tasks"] == 3